@@ -23,6 +23,12 @@ class Settings:
         self.openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
         self.openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-realtime-preview-2024-12-17")
         self.openai_voice: str = os.getenv("OPENAI_VOICE", "alloy")
+        self.openai_audio_queue_max: int = int(os.getenv("OPENAI_AUDIO_QUEUE_MAX", "250"))
+        self.openai_tool_concurrency: int = int(os.getenv("OPENAI_TOOL_CONCURRENCY", "2"))
+        self.openai_tool_timeout_s: float = float(os.getenv("OPENAI_TOOL_TIMEOUT_S", "10"))
+        self.openai_realtime_url: str = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")
+        self.openai_pool_size: int = int(os.getenv("OPENAI_POOL_SIZE", "2"))
+        self.openai_pool_max_idle_s: float = float(os.getenv("OPENAI_POOL_MAX_IDLE_S", "300"))
         
         # Twilio Configuration (for reference, actual auth handled by Twilio)
         self.twilio_account_sid: str = os.getenv("TWILIO_ACCOUNT_SID", "")
@@ -35,6 +41,32 @@ class Settings:
         # Data paths
         self.data_dir: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
         
+        # Storage
+        self.store_cache_enabled: bool = os.getenv("STORE_CACHE_ENABLED", "true").lower() == "true"
+        self.store_io_workers: int = int(os.getenv("STORE_IO_WORKERS", "4"))
+        self.store_group_commit_ms: float = float(os.getenv("STORE_GROUP_COMMIT_MS", "5"))
+        self.store_multiprocess: bool = os.getenv("STORE_MULTIPROCESS", "false").lower() == "true"
+        self.store_watch_interval_ms: float = float(os.getenv("STORE_WATCH_INTERVAL_MS", "500"))
+        self.store_encode_mode: str = os.getenv("STORE_ENCODE_MODE", "thread").lower()  # thread, process
+        self.appointment_store: str = os.getenv("APPOINTMENT_STORE", "json").lower()  # json, journal, sqlite, sharded
+        self.journal_compact_bytes: int = int(os.getenv("JOURNAL_COMPACT_BYTES", "1000000"))
+        self.sqlite_path: str = os.getenv("SQLITE_PATH", os.path.join(self.data_dir, "store.sqlite3"))
+        self.sqlite_pool_size: int = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+        
+        # Calls
+        self.audio_batch_ms: int = min(200, max(20, int(os.getenv("AUDIO_BATCH_MS", "100"))))
+        self.playout_lead_ms: int = max(20, int(os.getenv("PLAYOUT_LEAD_MS", "80")))
+        self.booking_horizon_days: int = int(os.getenv("BOOKING_HORIZON_DAYS", "60"))
+        self.availability_push_debounce_ms: float = float(os.getenv("AVAILABILITY_PUSH_DEBOUNCE_MS", "500"))
+        
+        # Dashboard
+        self.event_queue_max: int = int(os.getenv("EVENT_QUEUE_MAX", "256"))
+        self.event_slow_consumer_policy: str = os.getenv("EVENT_SLOW_CONSUMER_POLICY", "coalesce").lower()  # drop_oldest, coalesce, disconnect
+        self.transcript_coalesce_ms: float = float(os.getenv("TRANSCRIPT_COALESCE_MS", "100"))
+        self.event_replay_size: int = max(0, int(os.getenv("EVENT_REPLAY_SIZE", "1000")))
+        self.event_batch_ms: float = max(0.0, float(os.getenv("EVENT_BATCH_MS", "10")))
+        self.event_batch_max_bytes: int = max(1024, int(os.getenv("EVENT_BATCH_MAX_BYTES", "65536")))
+        
     def validate(self) -> List[str]:
         """Validate required settings and return list of errors."""
         errors = []
@@ -11,6 +11,11 @@ from app.config import settings
 from app.utils.logging import setup_logging, get_logger
 from app.routers import health, config, appointments, calls, websockets
 from app.services.event_bus import event_bus
+from app.services.appointment import appointment_service
+from app.services.availability import availability_view
+from app.services.session_pool import session_pool
+from app.utils.io_pool import io_pool
+from app.utils.json_store import json_store
 
 logger = get_logger(__name__)
 
@@ -27,11 +32,22 @@ async def lifespan(app: FastAPI):
     logger.info(f"   Port: {settings.port}")
     logger.info("=" * 60)
     
+    await appointment_service.startup()
+    await availability_view.startup()
+    json_store.start_watching()
+    await session_pool.startup()
+    
     yield
     
     # Shutdown
     logger.info("🦷 Dental Voice Assistant - Shutting down")
+    await session_pool.shutdown()
     await event_bus.shutdown()
+    await availability_view.shutdown()
+    await appointment_service.shutdown()
+    await json_store.stop_watching()
+    await json_store.flush()
+    io_pool.shutdown()
 
 
 app = FastAPI(
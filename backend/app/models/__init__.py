@@ -6,10 +6,13 @@ from app.models.events import (
     CallStartedEvent,
     CallEndedEvent,
     TranscriptEvent,
+    AgentTranscriptEvent,
     AppointmentEvent,
     ConnectionStatusEvent,
+    SnapshotEvent,
     ErrorEvent,
-    DashboardCommand
+    DashboardCommand,
+    TopicFilter
 )
 
 __all__ = [
@@ -24,8 +27,11 @@ __all__ = [
     "CallStartedEvent",
     "CallEndedEvent",
     "TranscriptEvent",
+    "AgentTranscriptEvent",
     "AppointmentEvent",
     "ConnectionStatusEvent",
+    "SnapshotEvent",
     "ErrorEvent",
-    "DashboardCommand"
+    "DashboardCommand",
+    "TopicFilter"
 ]
@@ -3,8 +3,18 @@ Pydantic models for appointments.
 """
 
 from datetime import datetime, date
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, Optional
+from pydantic import BaseModel, Field, field_validator
+
+
+def is_iso_date(value: Any) -> bool:
+    """Check that a value is a real date written as YYYY-MM-DD."""
+    if not isinstance(value, str):
+        return False
+    try:
+        return date.fromisoformat(value).isoformat() == value
+    except ValueError:
+        return False
 
 
 class AppointmentCreate(BaseModel):
@@ -16,6 +26,13 @@ class AppointmentCreate(BaseModel):
     patient_phone: str = Field(..., description="Patient's phone number")
     service_id: str = Field(..., description="ID of the service")
     
+    @field_validator("date")
+    @classmethod
+    def check_date(cls, value: str) -> str:
+        if not is_iso_date(value):
+            raise ValueError("date must be a valid YYYY-MM-DD date")
+        return value
+    
     class Config:
         json_schema_extra = {
             "example": {
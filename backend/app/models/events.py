@@ -17,12 +17,16 @@ EventType = Literal[
     "appointment_updated",
     "appointment_deleted",
     "connection_status",
+    "subscription",
+    "snapshot",
     "error"
 ]
 
 
 class DashboardEvent(BaseModel):
     """Base event model for dashboard WebSocket communication."""
+    # Event bus sequence number; a reconnecting dashboard sends the last one
+    seq: Optional[int] = None
     type: EventType
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
     data: Dict[str, Any] = Field(default_factory=dict)
@@ -51,8 +55,8 @@ class CallEndedEvent(DashboardEvent):
 
 
 class TranscriptEvent(DashboardEvent):
-    """Event for real-time transcription."""
-    type: Literal["transcript_user", "transcript_agent"]
+    """Event for a caller's transcribed utterance."""
+    type: Literal["transcript_user"] = "transcript_user"
     data: Dict[str, Any] = Field(
         default_factory=lambda: {
             "call_id": "",
@@ -62,6 +66,23 @@ class TranscriptEvent(DashboardEvent):
     )
 
 
+class AgentTranscriptEvent(DashboardEvent):
+    """
+    Event for a piece of the agent's transcript.
+    `seq` counts up per call; the final event of a message also carries
+    the message's full `text`.
+    """
+    type: Literal["transcript_agent"] = "transcript_agent"
+    data: Dict[str, Any] = Field(
+        default_factory=lambda: {
+            "call_id": "",
+            "seq": 0,
+            "delta": "",
+            "is_final": False
+        }
+    )
+
+
 class AppointmentEvent(DashboardEvent):
     """Event for appointment changes."""
     type: Literal["appointment_created", "appointment_updated", "appointment_deleted"]
@@ -78,11 +99,23 @@ class ConnectionStatusEvent(DashboardEvent):
     data: Dict[str, Any] = Field(
         default_factory=lambda: {
             "status": "connected",  # connected, disconnected, reconnecting
-            "message": ""
+            "message": "",
+            "epoch": "",
+            "seq": 0,
+            "resumed": False
         }
     )
 
 
+class SnapshotEvent(DashboardEvent):
+    """
+    Event with the full schedule (the /api/config payload), sent to a
+    reconnecting dashboard whose missed events are no longer kept.
+    """
+    type: Literal["snapshot"] = "snapshot"
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
 class ErrorEvent(DashboardEvent):
     """Event for error notifications."""
     type: Literal["error"] = "error"
@@ -96,6 +129,31 @@ class ErrorEvent(DashboardEvent):
 
 # Message from frontend to backend
 class DashboardCommand(BaseModel):
-    """Command from dashboard to backend."""
+    """
+    Command from dashboard to backend.
+    `subscribe` replaces the dashboard's topic filter with the TopicFilter
+    in `data`; `unsubscribe` clears it, so every event is sent again.
+    """
     command: Literal["subscribe", "unsubscribe", "ping"]
     data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class TopicFilter(BaseModel):
+    """
+    Events a dashboard wants. An event is sent if it matches every
+    non-empty list; events without a call (or without an appointment,
+    for doctor and date) don't match a filter on that field.
+    """
+    types: List[EventType] = Field(default_factory=list)
+    call_ids: List[str] = Field(default_factory=list)
+    doctor_ids: List[str] = Field(default_factory=list)
+    dates: List[str] = Field(default_factory=list)
+    
+    def to_topics(self) -> Dict[str, List[str]]:
+        """Get the filter keyed by event bus topic dimension."""
+        return {
+            "type": list(self.types),
+            "call_id": self.call_ids,
+            "doctor_id": self.doctor_ids,
+            "date": self.dates
+        }
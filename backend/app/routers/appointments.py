@@ -6,7 +6,7 @@ from datetime import date
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Query
 
-from app.models.appointment import AppointmentCreate, Appointment, AppointmentResponse
+from app.models.appointment import AppointmentCreate, Appointment, AppointmentResponse, is_iso_date
 from app.services.appointment import appointment_service
 
 router = APIRouter()
@@ -63,6 +63,9 @@ async def update_appointment(
     updates: Dict[str, Any]
 ) -> AppointmentResponse:
     """Update an existing appointment."""
+    if "date" in updates and not is_iso_date(updates["date"]):
+        raise HTTPException(status_code=422, detail="date must be a valid YYYY-MM-DD date")
+    
     success, message, appointment = await appointment_service.update(
         appointment_id, updates
     )
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 
 from app.utils.logging import get_logger
+from app.services.session_pool import session_pool
 
 logger = get_logger(__name__)
 
@@ -25,11 +26,17 @@ async def incoming_call(request: Request) -> HTMLResponse:
     # Determine protocol (ws or wss)
     protocol = "wss" if request.url.scheme == "https" else "ws"
     
+    # Set a pre-connected OpenAI session aside; the media stream gets its
+    # token back in the 'start' message's customParameters
+    token = session_pool.reserve()
+    parameter = f'\n            <Parameter name="session" value="{token}" />' if token else ""
+    
     # TwiML response - connects call to our media stream WebSocket
     twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Connect>
-        <Stream url="{protocol}://{host}{port_suffix}/media-stream" />
+        <Stream url="{protocol}://{host}{port_suffix}/media-stream">{parameter}
+        </Stream>
     </Connect>
 </Response>"""
     
@@ -7,6 +7,9 @@ from fastapi.responses import HTMLResponse
 
 from app.config import settings
 from app.services.event_bus import event_bus
+from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.session_pool import session_pool
+from app.utils.json_store import json_store
 
 router = APIRouter()
 
@@ -52,5 +55,11 @@ async def health_check():
         "service": "dental-voice-assistant",
         "version": "1.0.0",
         "environment": settings.environment,
-        "dashboard_connections": event_bus.subscriber_count
+        "dashboard_connections": event_bus.subscriber_count,
+        "dashboard_subscribers": event_bus.subscriber_stats,
+        "dashboard_replay": event_bus.replay_stats,
+        "store_cache": json_store.cache_stats,
+        "store_writes": json_store.write_stats,
+        "openai_send_queues": OpenAIRealtimeService.aggregate_send_queue_stats(),
+        "openai_pool": session_pool.stats
     }
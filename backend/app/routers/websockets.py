@@ -4,12 +4,18 @@ WebSocket endpoints for Twilio media stream and dashboard real-time updates.
 
 import uuid
 import json
+import time
 import asyncio
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 
 from app.utils.logging import get_logger
 from app.services.call_handler import CallHandler
-from app.services.event_bus import event_bus
+from app.config import settings
+from app.services.event_bus import event_bus, Subscriber, EncodedEvent, batch_frame
+from app.models.events import DashboardCommand, TopicFilter
+from app.routers.config import get_config
 
 logger = get_logger(__name__)
 
@@ -46,12 +52,31 @@ async def dashboard_websocket(websocket: WebSocket):
     """
     WebSocket endpoint for dashboard real-time updates.
     Sends call events, transcriptions, and appointment updates.
+    
+    A reconnecting dashboard passes `?epoch=...&last_seq=...` from the last
+    event it saw and is sent only the events it missed, or a snapshot of
+    the schedule if those are no longer kept. `?topics=...` (a JSON topic
+    filter, as sent with the subscribe command) applies the filter from
+    the start, so only matching events are replayed.
     """
     await websocket.accept()
     logger.info("📊 Dashboard WebSocket connected")
     
-    # Subscribe to events
-    queue = await event_bus.subscribe()
+    epoch = websocket.query_params.get("epoch")
+    try:
+        last_seq: Optional[int] = int(websocket.query_params["last_seq"])
+    except (KeyError, ValueError):
+        last_seq = None
+    topic_filter = _query_topic_filter(websocket)
+    topics = topic_filter.to_topics() if topic_filter else None
+    
+    # Subscribe to events, picking up where the dashboard left off
+    client = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else ""
+    if last_seq is None:
+        subscriber = await event_bus.subscribe(client, topics)
+        seq, replay = event_bus.seq, []
+    else:
+        subscriber, seq, replay = await event_bus.resume(epoch, last_seq, client, topics)
     
     try:
         # Send initial connection confirmation
@@ -59,13 +84,24 @@ async def dashboard_websocket(websocket: WebSocket):
             "type": "connection_status",
             "data": {
                 "status": "connected",
-                "message": "Connected to dashboard WebSocket"
+                "message": "Connected to dashboard WebSocket",
+                "epoch": event_bus.epoch,
+                "seq": seq,
+                "resumed": replay is not None and last_seq is not None
             }
         })
+        if topic_filter:
+            await _send_subscription(websocket, topic_filter)
+        
+        if replay is None:
+            await websocket.send_text(await _snapshot_frame(seq))
+        else:
+            for batch in _replay_batches(replay):
+                await websocket.send_text(batch_frame(batch))
         
         # Handle both incoming messages and outgoing events
-        receive_task = asyncio.create_task(_handle_dashboard_receive(websocket))
-        send_task = asyncio.create_task(_handle_dashboard_send(websocket, queue))
+        receive_task = asyncio.create_task(_handle_dashboard_receive(websocket, subscriber))
+        send_task = asyncio.create_task(_handle_dashboard_send(websocket, subscriber))
         
         # Wait for either task to complete (usually due to disconnect)
         done, pending = await asyncio.wait(
@@ -88,29 +124,78 @@ async def dashboard_websocket(websocket: WebSocket):
     except Exception as e:
         logger.error(f"❌ Error in dashboard WebSocket: {e}")
     finally:
-        await event_bus.unsubscribe(queue)
+        await event_bus.unsubscribe(subscriber)
         logger.info("📊 Dashboard WebSocket closed")
 
 
-async def _handle_dashboard_receive(websocket: WebSocket) -> None:
+def _query_topic_filter(websocket: WebSocket) -> Optional[TopicFilter]:
+    """Get the topic filter passed when connecting, if any."""
+    raw = websocket.query_params.get("topics")
+    if not raw:
+        return None
+    try:
+        return TopicFilter(**json.loads(raw))
+    except (json.JSONDecodeError, TypeError, ValidationError) as e:
+        logger.warning(f"Ignoring invalid topic filter from dashboard: {e}")
+        return None
+
+
+# (seq, built at, frame) of the last snapshot, shared by dashboards that
+# reconnect together
+_snapshot_cache: Optional[Tuple[int, float, str]] = None
+SNAPSHOT_TTL_S = 5
+
+
+async def _snapshot_frame(seq: int) -> str:
+    """Get the schedule snapshot frame for a dashboard resuming at `seq`."""
+    global _snapshot_cache
+    if _snapshot_cache is not None:
+        cached_seq, built_at, frame = _snapshot_cache
+        if cached_seq == seq and time.monotonic() - built_at < SNAPSHOT_TTL_S:
+            return frame
+    
+    data: Dict[str, Any] = await get_config()
+    frame = json.dumps({
+        "seq": seq,
+        "type": "snapshot",
+        "data": data
+    }, separators=(",", ":"), ensure_ascii=False)
+    _snapshot_cache = (seq, time.monotonic(), frame)
+    return frame
+
+
+async def _handle_dashboard_receive(websocket: WebSocket, subscriber: Subscriber) -> None:
     """Handle incoming messages from dashboard."""
     try:
         while True:
             try:
                 data = await websocket.receive_text()
-                message = json.loads(data)
-                
-                command = message.get("command", "")
+                message = DashboardCommand(**json.loads(data))
                 
-                if command == "ping":
+                if message.command == "ping":
                     await websocket.send_json({
                         "type": "pong",
                         "data": {}
                     })
-                # Add more commands as needed
+                elif message.command == "subscribe":
+                    topic_filter = TopicFilter(**message.data)
+                    await event_bus.set_topics(subscriber, topic_filter.to_topics())
+                    await _send_subscription(websocket, topic_filter)
+                elif message.command == "unsubscribe":
+                    await event_bus.set_topics(subscriber, None)
+                    await _send_subscription(websocket, TopicFilter())
                 
             except json.JSONDecodeError:
                 logger.warning("Received invalid JSON from dashboard")
+            except (TypeError, ValidationError) as e:
+                logger.warning(f"Received invalid command from dashboard: {e}")
+                await websocket.send_json({
+                    "type": "error",
+                    "data": {
+                        "code": "invalid_command",
+                        "message": "Invalid dashboard command"
+                    }
+                })
                 
     except WebSocketDisconnect:
         # Normal disconnection, just exit the loop
@@ -119,18 +204,47 @@ async def _handle_dashboard_receive(websocket: WebSocket) -> None:
         logger.error(f"Error receiving dashboard message: {e}")
 
 
-async def _handle_dashboard_send(websocket: WebSocket, queue: asyncio.Queue) -> None:
-    """Send events from queue to dashboard."""
+async def _send_subscription(websocket: WebSocket, topic_filter: TopicFilter) -> None:
+    """Confirm the dashboard's current topic filter."""
+    await websocket.send_json({
+        "type": "subscription",
+        "data": topic_filter.model_dump()
+    })
+
+
+def _replay_batches(events: List[EncodedEvent]) -> Iterator[List[EncodedEvent]]:
+    """Split replayed events into batches within the frame size limit."""
+    batch: List[EncodedEvent] = []
+    size = 0
+    for event in events:
+        if batch and size + len(event.frame) + 1 > settings.event_batch_max_bytes:
+            yield batch
+            batch, size = [], 0
+        batch.append(event)
+        size += len(event.frame) + 1
+    if batch:
+        yield batch
+
+
+async def _handle_dashboard_send(websocket: WebSocket, subscriber: Subscriber) -> None:
+    """
+    Send events from the subscriber's queue to dashboard.
+    Events that queue up together go out as one array frame, up to
+    EVENT_BATCH_MAX_BYTES and EVENT_BATCH_MS.
+    """
     try:
         while True:
-            event = await queue.get()
+            batch = await subscriber.get_batch(
+                settings.event_batch_max_bytes, settings.event_batch_ms
+            )
             
-            # Check for shutdown signal
-            if event.get("type") == "shutdown":
+            # Empty once the subscriber is closed
+            if not batch:
                 break
             
             try:
-                await websocket.send_json(event)
+                # Encoded once by the event bus for all dashboards
+                await websocket.send_text(batch_frame(batch))
             except Exception as e:
                 logger.debug(f"Failed to send event: {e}")
                 break
@@ -1,14 +1,21 @@
 # Services module
-from app.services.event_bus import event_bus, EventBus
+from app.services.event_bus import event_bus, EventBus, Subscriber
 from app.services.appointment import appointment_service, AppointmentService
+from app.services.availability import availability_view, AvailabilityView
 from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.session_pool import session_pool, RealtimeSessionPool
 from app.services.call_handler import CallHandler
 
 __all__ = [
     "event_bus",
     "EventBus",
+    "Subscriber",
     "appointment_service",
     "AppointmentService", 
+    "availability_view",
+    "AvailabilityView",
     "OpenAIRealtimeService",
+    "session_pool",
+    "RealtimeSessionPool",
     "CallHandler"
 ]
@@ -4,20 +4,189 @@ Handles CRUD operations and validation.
 """
 
 import uuid
+import asyncio
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Callable, List, Optional, Dict, Any, Tuple
 
+from app.config import settings
 from app.utils.logging import get_logger
+from app.models.appointment import is_iso_date
 from app.utils.json_store import json_store
+from app.utils.journal_store import JournalStore
+from app.utils.sqlite_store import SqliteStore
+from app.utils.sharded_store import ShardedStore
+from app.utils.slot_grid import SlotGrid, slot_grid_for, parse_time, format_time
 from app.services.event_bus import event_bus
+from app.services.appointment_index import AppointmentIndex
 
 logger = get_logger(__name__)
 
 
+def create_appointment_store(engine: str) -> Any:
+    """
+    Create the storage engine for appointments.
+    
+    Args:
+        engine: 'json' (single JSON file), 'journal' (append-only journal),
+            'sqlite' (indexed SQLite database) or 'sharded' (one JSON file per date)
+        
+    Returns:
+        Store exposing the JsonStore list contract.
+    """
+    if engine == "journal":
+        return JournalStore(
+            json_store,
+            compact_threshold_bytes=settings.journal_compact_bytes
+        )
+    if engine == "sqlite":
+        return SqliteStore(settings.sqlite_path, pool_size=settings.sqlite_pool_size)
+    if engine == "sharded":
+        return ShardedStore(json_store)
+    if engine != "json":
+        logger.warning(f"Unknown appointment store '{engine}', using 'json'")
+    return json_store
+
+
 class AppointmentService:
-    """Service for managing appointments."""
+    """
+    Service for managing appointments.
+    Lookups by id, doctor/date and phone are served from in-memory
+    indexes that are rebuilt from the store on startup and kept in sync
+    on every create, update and delete. Appointments occupy their
+    service's duration_minutes, so a 60 minute service at 10:00 also
+    blocks 10:30.
+    """
     
     APPOINTMENTS_FILE = "appointments.json"
+    SERVICES_FILE = "services.json"
+    
+    def __init__(self, store: Any = None):
+        self.store = store if store is not None else create_appointment_store(
+            settings.appointment_store
+        )
+        self.index = AppointmentIndex()
+        self._index_ready = False
+        self._index_lock = asyncio.Lock()
+        # Serializes check-and-book so two callers can't take the same slot
+        self._write_lock = asyncio.Lock()
+        self._listeners: List[Callable[[Optional[Dict[str, Any]]], None]] = []
+        
+        # Appointments as last seen, while another worker's change is
+        # being reloaded; kept in step with our own writes meanwhile
+        self._external_before: Optional[Dict[str, Dict[str, Any]]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+    
+    async def startup(self) -> None:
+        """Load appointment state so the first call doesn't pay for it."""
+        appointments = await self.store.read(self.APPOINTMENTS_FILE)
+        self.index.rebuild(appointments, await self._load_durations())
+        self._index_ready = True
+        
+        if settings.store_multiprocess:
+            if self.store is json_store:
+                # Other workers' bookings invalidate our index
+                json_store.watch(self.APPOINTMENTS_FILE, self._on_store_changed)
+            else:
+                logger.warning(
+                    f"STORE_MULTIPROCESS is only supported with APPOINTMENT_STORE=json; "
+                    f"'{settings.appointment_store}' indexes will not see other workers' changes"
+                )
+        logger.info(
+            f"Appointment store ready ({type(self.store).__name__}, "
+            f"{len(appointments)} appointments)"
+        )
+    
+    async def shutdown(self) -> None:
+        """Flush and close the appointment store if it holds resources."""
+        close = getattr(self.store, "close", None)
+        if close is not None:
+            await close()
+    
+    async def _load_durations(self) -> Dict[str, int]:
+        """Get service durations in minutes from the services config."""
+        services = await json_store.read(self.SERVICES_FILE)
+        return {
+            svc["id"]: svc["duration_minutes"]
+            for svc in services or [] if svc.get("duration_minutes")
+        }
+    
+    def add_listener(self, callback: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        """
+        Register a callback for appointment changes made through this service.
+        
+        The callback is called synchronously with each created, deleted or
+        updated appointment (for updates, with both the old and new
+        version), or with None when the whole index was reloaded.
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, appointment: Optional[Dict[str, Any]]) -> None:
+        """Tell listeners an appointment changed."""
+        for callback in self._listeners:
+            try:
+                callback(appointment)
+            except Exception as e:
+                logger.error(f"Error in appointment listener: {e}")
+    
+    def _on_store_changed(self, filename: str) -> None:
+        """Reload the index after another process changed the store."""
+        if self._external_before is None:
+            self._external_before = dict(self.index.by_id)
+        self._index_ready = False
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload_external_changes())
+    
+    def _track_local(self, appointment_id: str, appointment: Optional[Dict[str, Any]]) -> None:
+        """Record our own write so a pending reload doesn't report it as external."""
+        if self._external_before is None:
+            return
+        if appointment is None:
+            self._external_before.pop(appointment_id, None)
+        else:
+            self._external_before[appointment_id] = appointment
+    
+    async def _reload_external_changes(self) -> None:
+        """
+        Rebuild the index from the store and pass on what other workers
+        changed: listeners (availability lines, in-flight calls) and this
+        worker's dashboards get the same notifications and events as for
+        local changes.
+        """
+        try:
+            async with self._write_lock:
+                index = await self._get_index()
+                before = self._external_before or {}
+                self._external_before = None
+                after = dict(index.by_id)
+            
+            for appointment_id, appointment in after.items():
+                previous = before.get(appointment_id)
+                if previous is None:
+                    self._notify(appointment)
+                    await event_bus.publish_appointment_created(appointment)
+                elif previous != appointment:
+                    self._notify(previous)
+                    self._notify(appointment)
+                    await event_bus.publish_appointment_updated(appointment, previous)
+            for appointment_id, previous in before.items():
+                if appointment_id not in after:
+                    self._notify(previous)
+                    await event_bus.publish_appointment_deleted(appointment_id, previous)
+        except Exception as e:
+            logger.error(f"Error reloading appointments changed by another worker: {e}")
+    
+    async def _get_index(self) -> AppointmentIndex:
+        """Get the appointment index, building it on first use."""
+        if not self._index_ready:
+            async with self._index_lock:
+                if not self._index_ready:
+                    self.index.rebuild(
+                        await self.store.read(self.APPOINTMENTS_FILE),
+                        await self._load_durations()
+                    )
+                    self._index_ready = True
+                    self._notify(None)
+        return self.index
     
     async def get_all(self, filter_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -29,25 +198,15 @@ class AppointmentService:
         Returns:
             List of appointments.
         """
-        appointments = await json_store.read(self.APPOINTMENTS_FILE)
-        
         if filter_date:
-            appointments = [
-                apt for apt in appointments 
-                if apt.get("date") == filter_date
-            ]
+            return await self.store.find_in_list(self.APPOINTMENTS_FILE, date=filter_date)
         
-        return appointments
+        return await self.store.read(self.APPOINTMENTS_FILE)
     
     async def get_by_id(self, appointment_id: str) -> Optional[Dict[str, Any]]:
         """Get a single appointment by ID."""
-        appointments = await json_store.read(self.APPOINTMENTS_FILE)
-        
-        for apt in appointments:
-            if apt.get("id") == appointment_id:
-                return apt
-        
-        return None
+        index = await self._get_index()
+        return index.get(appointment_id)
     
     async def get_by_doctor_and_date(
         self, 
@@ -55,23 +214,35 @@ class AppointmentService:
         target_date: str
     ) -> List[Dict[str, Any]]:
         """Get all appointments for a specific doctor on a specific date."""
-        appointments = await json_store.read(self.APPOINTMENTS_FILE)
-        
-        return [
-            apt for apt in appointments
-            if apt.get("doctor_id") == doctor_id and apt.get("date") == target_date
-        ]
+        index = await self._get_index()
+        return index.for_doctor_and_date(doctor_id, target_date)
+    
+    async def get_by_phone(self, patient_phone: str) -> List[Dict[str, Any]]:
+        """Get all appointments booked with a patient phone number."""
+        index = await self._get_index()
+        return [index.get(apt_id) for apt_id in index.ids_for_phone(patient_phone)]
     
     async def is_slot_available(
         self, 
         doctor_id: str, 
         target_date: str, 
-        time: str
+        time: str,
+        service_id: Optional[str] = None
     ) -> bool:
-        """Check if a time slot is available for a doctor."""
-        doctor_appointments = await self.get_by_doctor_and_date(doctor_id, target_date)
-        booked_times = {apt.get("time") for apt in doctor_appointments}
-        return time not in booked_times
+        """
+        Check if a time slot is available for a doctor.
+        
+        Args:
+            doctor_id: Doctor ID
+            target_date: Date string (YYYY-MM-DD)
+            time: Start time (HH:MM)
+            service_id: Optional service; its full duration must be free
+        """
+        index = await self._get_index()
+        span = index.span_of({"time": time, "service_id": service_id})
+        if span is None:
+            return False
+        return not index.overlaps(doctor_id, target_date, *span)
     
     async def create(
         self,
@@ -89,13 +260,8 @@ class AppointmentService:
         Returns:
             Tuple of (success, message, appointment_or_none)
         """
-        # Validate slot availability
-        if not await self.is_slot_available(doctor_id, target_date, time):
-            return (
-                False, 
-                f"Ora {time} nu este disponibilă pentru acest doctor.", 
-                None
-            )
+        if not is_iso_date(target_date):
+            return (False, "Data trebuie să fie în formatul YYYY-MM-DD.", None)
         
         # Create appointment
         appointment = {
@@ -111,8 +277,39 @@ class AppointmentService:
             "status": "confirmed"
         }
         
-        # Save to store
-        await json_store.append_to_list(self.APPOINTMENTS_FILE, appointment)
+        async with self._write_lock:
+            # Validate slot availability
+            if not await self.is_slot_available(doctor_id, target_date, time, service_id):
+                return (
+                    False, 
+                    f"Ora {time} nu este disponibilă pentru acest doctor.", 
+                    None
+                )
+            
+            # Save to store; the store re-checks for overlaps atomically
+            # in case another worker booked since our index was built
+            start, end = self.index.span_of(appointment)
+            
+            def overlaps(existing: Dict[str, Any]) -> bool:
+                span = self.index.span_of(existing)
+                return span is not None and span[0] < end and start < span[1]
+            
+            added = await self.store.append_to_list(
+                self.APPOINTMENTS_FILE,
+                appointment,
+                conflict_scope=("doctor_id", "date"),
+                conflicts=overlaps
+            )
+            if not added:
+                self._index_ready = False
+                return (
+                    False, 
+                    f"Ora {time} nu este disponibilă pentru acest doctor.", 
+                    None
+                )
+            self.index.add(appointment)
+            self._track_local(appointment["id"], appointment)
+            self._notify(appointment)
         
         # Broadcast event to dashboard
         await event_bus.publish_appointment_created(appointment)
@@ -134,16 +331,27 @@ class AppointmentService:
         """
         # Don't allow changing ID
         updates.pop("id", None)
+        if "date" in updates and not is_iso_date(updates["date"]):
+            return (False, "Data trebuie să fie în formatul YYYY-MM-DD.", None)
         updates["updated_at"] = datetime.utcnow().isoformat()
         
-        appointment = await json_store.update_in_list(
-            self.APPOINTMENTS_FILE,
-            appointment_id,
-            updates
-        )
+        await self._get_index()
+        async with self._write_lock:
+            previous = self.index.get(appointment_id)
+            appointment = await self.store.update_in_list(
+                self.APPOINTMENTS_FILE,
+                appointment_id,
+                updates
+            )
+            if appointment:
+                self.index.replace(appointment)
+                self._track_local(appointment_id, appointment)
+                if previous is not None:
+                    self._notify(previous)
+                self._notify(appointment)
         
         if appointment:
-            await event_bus.publish_appointment_updated(appointment)
+            await event_bus.publish_appointment_updated(appointment, previous)
             logger.info(f"Updated appointment {appointment_id}")
             return (True, "Programare actualizată!", appointment)
         
@@ -156,23 +364,37 @@ class AppointmentService:
         Returns:
             Tuple of (success, message)
         """
-        deleted = await json_store.delete_from_list(
-            self.APPOINTMENTS_FILE,
-            appointment_id
-        )
+        await self._get_index()
+        async with self._write_lock:
+            deleted = await self.store.delete_from_list(
+                self.APPOINTMENTS_FILE,
+                appointment_id
+            )
+            removed = None
+            if deleted:
+                removed = self.index.remove(appointment_id)
+                self._track_local(appointment_id, None)
+                if removed is not None:
+                    self._notify(removed)
         
         if deleted:
-            await event_bus.publish_appointment_deleted(appointment_id)
+            await event_bus.publish_appointment_deleted(appointment_id, removed)
             logger.info(f"Deleted appointment {appointment_id}")
             return (True, "Programare anulată!")
         
         return (False, "Programarea nu a fost găsită.")
     
+    async def get_booked_mask(self, doctor_id: str, target_date: str, grid: SlotGrid) -> int:
+        """Get the bitmask of a doctor's booked slots on a date (see AppointmentIndex)."""
+        index = await self._get_index()
+        return index.booked_mask(doctor_id, target_date, grid)
+    
     async def get_available_slots(
         self,
         doctor_id: str,
         target_date: str,
-        working_hours: Dict[str, Any]
+        working_hours: Dict[str, Any],
+        service_id: Optional[str] = None
     ) -> List[str]:
         """
         Get all available time slots for a doctor on a date.
@@ -181,32 +403,79 @@ class AppointmentService:
             doctor_id: Doctor ID
             target_date: Date string (YYYY-MM-DD)
             working_hours: Dict with start, end, slot_duration_minutes
+            service_id: Optional service; only slots with room for its
+                full duration are returned
             
         Returns:
             List of available time strings (HH:MM)
         """
-        # Generate all slots
-        start_hour, start_min = map(int, working_hours["start"].split(":"))
-        end_hour, end_min = map(int, working_hours["end"].split(":"))
-        slot_duration = working_hours.get("slot_duration_minutes", 30)
-        
-        all_slots = []
-        current_hour, current_min = start_hour, start_min
-        
-        while (current_hour < end_hour) or (current_hour == end_hour and current_min < end_min):
-            all_slots.append(f"{current_hour:02d}:{current_min:02d}")
-            current_min += slot_duration
-            if current_min >= 60:
-                current_hour += 1
-                current_min = 0
+        grid = slot_grid_for(working_hours)
+        index = await self._get_index()
+        booked = index.booked_mask(doctor_id, target_date, grid)
+        slots = grid.slots_for_duration(index.duration_for(service_id)) if service_id else 1
+        return grid.times_for(grid.starts_with_room(grid.free_mask(booked), slots))
+    
+    async def get_next_free_slots(
+        self,
+        doctor_id: str,
+        target_date: str,
+        working_hours: Dict[str, Any],
+        count: int,
+        after: Optional[str] = None,
+        service_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        Get the next free time slots for a doctor on a date.
         
-        # Get booked slots
-        appointments = await self.get_by_doctor_and_date(doctor_id, target_date)
-        booked_times = {apt.get("time") for apt in appointments}
+        Args:
+            doctor_id: Doctor ID
+            target_date: Date string (YYYY-MM-DD)
+            working_hours: Dict with start, end, slot_duration_minutes
+            count: Maximum number of slots to return
+            after: Optional time (HH:MM); only slots from then on are returned
+            service_id: Optional service; only slots with room for its
+                full duration are returned
+            
+        Returns:
+            List of up to `count` available time strings (HH:MM)
+        """
+        grid = slot_grid_for(working_hours)
+        index = await self._get_index()
+        booked = index.booked_mask(doctor_id, target_date, grid)
+        slots = grid.slots_for_duration(index.duration_for(service_id)) if service_id else 1
+        return grid.next_free(booked, count, after=after, slots=slots)
+    
+    async def find_earliest_slot(
+        self,
+        doctor_id: str,
+        target_date: str,
+        working_hours: Dict[str, Any],
+        service_id: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Find the earliest start time with room for a service.
         
-        # Return free slots
-        return [slot for slot in all_slots if slot not in booked_times]
-
+        Args:
+            doctor_id: Doctor ID
+            target_date: Date string (YYYY-MM-DD)
+            working_hours: Dict with start, end, slot_duration_minutes
+            service_id: Optional service whose duration must fit
+            after: Optional time (HH:MM) to search from
+            
+        Returns:
+            Start time (HH:MM), or None if the day is full.
+        """
+        grid = slot_grid_for(working_hours)
+        index = await self._get_index()
+        start = index.earliest_gap(
+            doctor_id,
+            target_date,
+            index.duration_for(service_id),
+            grid,
+            not_before=parse_time(after) if after else None
+        )
+        return format_time(start) if start is not None else None
 
 # Global service instance
 appointment_service = AppointmentService()
@@ -0,0 +1,206 @@
+"""
+In-memory secondary indexes over appointments.
+Keeps lookups by id, by doctor and date, and by patient phone O(1),
+and the time each appointment occupies for overlap checks.
+"""
+
+from typing import Dict, List, Optional, Tuple, Any
+
+from app.utils.logging import get_logger
+from app.utils.interval_index import IntervalIndex
+from app.utils.slot_grid import SlotGrid, parse_time
+
+logger = get_logger(__name__)
+
+# Used for appointments whose service has no known duration
+DEFAULT_DURATION_MINUTES = 30
+
+
+class AppointmentIndex:
+    """
+    Secondary indexes kept in sync with the appointment store.
+    
+    - by_id: appointment id -> appointment
+    - by_slot: (doctor_id, date) -> {time: appointment}
+    - by_phone: patient_phone -> [appointment ids]
+    - intervals: (doctor_id, date) -> [start, end) minutes of each
+      appointment, using its service's duration
+    - booked masks: (doctor_id, date) -> (grid, bitmask of booked slots),
+      built on first query and then kept up to date bit by bit
+    """
+    
+    def __init__(self, durations: Optional[Dict[str, int]] = None):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_slot: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self.by_phone: Dict[str, List[str]] = {}
+        self.intervals: Dict[Tuple[str, str], IntervalIndex] = {}
+        self._masks: Dict[Tuple[str, str], Tuple[SlotGrid, int]] = {}
+        # service_id -> duration in minutes
+        self.durations: Dict[str, int] = dict(durations or {})
+    
+    def duration_for(self, service_id: Optional[str]) -> int:
+        """Get the duration of a service in minutes."""
+        return self.durations.get(service_id, DEFAULT_DURATION_MINUTES)
+    
+    def span_of(self, appointment: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """Get the [start, end) minutes an appointment occupies, or None if it has no valid time."""
+        try:
+            start = parse_time(appointment.get("time"))
+        except (AttributeError, ValueError):
+            return None
+        return start, start + self.duration_for(appointment.get("service_id"))
+    
+    def rebuild(
+        self,
+        appointments: List[Dict[str, Any]],
+        durations: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Rebuild all indexes from a full list of appointments.
+        
+        Args:
+            appointments: All appointments
+            durations: Optional new service_id -> minutes map
+        """
+        if durations is not None:
+            self.durations = dict(durations)
+        self.by_id.clear()
+        self.by_slot.clear()
+        self.by_phone.clear()
+        self.intervals.clear()
+        self._masks.clear()
+        for appointment in appointments:
+            self.add(appointment)
+        logger.info(f"Appointment index rebuilt ({len(self.by_id)} appointments)")
+    
+    def add(self, appointment: Dict[str, Any]) -> None:
+        """Index a new appointment."""
+        appointment_id = appointment.get("id")
+        if appointment_id in self.by_id:
+            self.remove(appointment_id)
+        
+        self.by_id[appointment_id] = appointment
+        
+        slot_key = (appointment.get("doctor_id"), appointment.get("date"))
+        self.by_slot.setdefault(slot_key, {})[appointment.get("time")] = appointment
+        
+        span = self.span_of(appointment)
+        if span is not None:
+            self.intervals.setdefault(slot_key, IntervalIndex()).add(*span, appointment_id)
+            cached = self._masks.get(slot_key)
+            if cached is not None:
+                grid, mask = cached
+                self._masks[slot_key] = (grid, mask | grid.mask_for_range(*span))
+        
+        phone = appointment.get("patient_phone")
+        if phone:
+            self.by_phone.setdefault(phone, []).append(appointment_id)
+    
+    def remove(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove an appointment from all indexes.
+        
+        Returns:
+            The removed appointment, or None if it wasn't indexed.
+        """
+        appointment = self.by_id.pop(appointment_id, None)
+        if appointment is None:
+            return None
+        
+        slot_key = (appointment.get("doctor_id"), appointment.get("date"))
+        slots = self.by_slot.get(slot_key)
+        if slots is not None:
+            time = appointment.get("time")
+            if slots.get(time) is appointment:
+                del slots[time]
+            if not slots:
+                del self.by_slot[slot_key]
+        
+        intervals = self.intervals.get(slot_key)
+        span = self.span_of(appointment)
+        if intervals is not None and span is not None:
+            intervals.remove(span[0], appointment_id)
+            if not intervals:
+                del self.intervals[slot_key]
+        # Other appointments may cover the same slots; rebuild on next query
+        self._masks.pop(slot_key, None)
+        
+        phone = appointment.get("patient_phone")
+        ids = self.by_phone.get(phone)
+        if ids is not None:
+            if appointment_id in ids:
+                ids.remove(appointment_id)
+            if not ids:
+                del self.by_phone[phone]
+        
+        return appointment
+    
+    def replace(self, appointment: Dict[str, Any]) -> None:
+        """Re-index an appointment after an update."""
+        self.remove(appointment.get("id"))
+        self.add(appointment)
+    
+    def get(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """Get an appointment by ID."""
+        return self.by_id.get(appointment_id)
+    
+    def for_doctor_and_date(self, doctor_id: str, target_date: str) -> List[Dict[str, Any]]:
+        """Get all appointments for a doctor on a date."""
+        return list(self.by_slot.get((doctor_id, target_date), {}).values())
+    
+    def overlaps(self, doctor_id: str, target_date: str, start: int, end: int) -> bool:
+        """Check whether [start, end) minutes overlaps any of a doctor's appointments."""
+        intervals = self.intervals.get((doctor_id, target_date))
+        return intervals is not None and intervals.overlaps(start, end)
+    
+    def earliest_gap(
+        self,
+        doctor_id: str,
+        target_date: str,
+        length: int,
+        grid: SlotGrid,
+        not_before: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Find the earliest grid-aligned start with `length` free minutes.
+        
+        Returns:
+            Start in minutes since midnight, or None if the day has no room.
+        """
+        start = grid.start_minute if not_before is None else max(grid.start_minute, not_before)
+        intervals = self.intervals.get((doctor_id, target_date))
+        if intervals is None:
+            intervals = IntervalIndex()
+        return intervals.earliest_gap(
+            length, start, grid.end_minute, step=grid.slot_minutes, origin=grid.start_minute
+        )
+    
+    def booked_mask(self, doctor_id: str, target_date: str, grid: SlotGrid) -> int:
+        """
+        Get the bitmask of a doctor's booked slots on a date.
+        
+        Args:
+            doctor_id: Doctor ID
+            target_date: Date string (YYYY-MM-DD)
+            grid: Slot grid for the working day
+            
+        Returns:
+            Mask with bit i set if grid slot i is booked.
+        """
+        slot_key = (doctor_id, target_date)
+        cached = self._masks.get(slot_key)
+        if cached is not None and cached[0] is grid:
+            return cached[1]
+        
+        mask = 0
+        for start, end, _ in self.intervals.get(slot_key, ()):
+            mask |= grid.mask_for_range(start, end)
+        self._masks[slot_key] = (grid, mask)
+        return mask
+    
+    def ids_for_phone(self, phone: str) -> List[str]:
+        """Get appointment IDs booked with a phone number."""
+        return list(self.by_phone.get(phone, []))
+    
+    def __len__(self) -> int:
+        return len(self.by_id)
@@ -0,0 +1,109 @@
+"""
+Inbound audio batching for OpenAI.
+Joins Twilio's 20 ms μ-law frames into larger chunks so each call sends
+a handful of input_audio_buffer.append messages per second instead of 50.
+"""
+
+import asyncio
+import binascii
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Twilio media streams are 8 kHz μ-law: one byte per sample
+BYTES_PER_MS = 8
+FRAME_MS = 20
+
+
+class AudioBatcher:
+    """
+    Collects decoded audio frames and sends them in chunks of `batch_ms`.
+    
+    A chunk is sent as soon as it is full, or `batch_ms` after its first
+    frame if frames stop arriving, so the added latency never exceeds
+    `batch_ms`. With `batch_ms` at or below one frame, frames are passed
+    through untouched.
+    """
+    
+    def __init__(self, send: Callable[[str], Awaitable[None]], batch_ms: int):
+        self._send = send
+        self.batch_ms = batch_ms
+        self._batch_bytes = batch_ms * BYTES_PER_MS
+        self._buffer = bytearray()
+        # A cheap timer handle; a flush task is only created if it fires
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        self.frames_in = 0
+        self.messages_out = 0
+    
+    @property
+    def passthrough(self) -> bool:
+        return self.batch_ms <= FRAME_MS
+    
+    async def add(self, payload: str) -> None:
+        """
+        Add one base64 μ-law frame from Twilio.
+        
+        Args:
+            payload: Base64 audio payload of a media event
+        """
+        self.frames_in += 1
+        if self.passthrough:
+            self.messages_out += 1
+            await self._send(payload)
+            return
+        
+        self._buffer += binascii.a2b_base64(payload)
+        if len(self._buffer) >= self._batch_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.batch_ms / 1000, self._on_timer
+            )
+    
+    def _on_timer(self) -> None:
+        """Send a partial chunk if no more frames arrived in time."""
+        self._timer = None
+        if self._buffer and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._timed_flush())
+    
+    async def _timed_flush(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            self._flush_task = None
+    
+    async def flush(self) -> None:
+        """Send whatever audio is buffered now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        
+        chunk = binascii.b2a_base64(self._buffer, newline=False).decode("ascii")
+        self._buffer.clear()
+        self.messages_out += 1
+        try:
+            await self._send(chunk)
+        except Exception as e:
+            logger.error(f"Error sending batched audio: {e}")
+    
+    async def close(self) -> None:
+        """Flush remaining audio and stop the timer."""
+        await self.flush()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get frame and message counters."""
+        return {
+            "batch_ms": self.batch_ms,
+            "frames_in": self.frames_in,
+            "messages_out": self.messages_out
+        }
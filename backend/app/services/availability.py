@@ -0,0 +1,303 @@
+"""
+Materialized view of today's availability and the clinic config, used to
+build call prompts and answer the availability tools.
+Keeps the rendered prompt pieces in memory so call setup doesn't re-read
+the config files or recompute every doctor's free slots.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.logging import get_logger
+from app.utils.json_store import json_store
+from app.utils.prompt_builder import (
+    render_static_sections,
+    render_availability_line,
+    assemble_system_prompt,
+    pick_greeting
+)
+from app.utils.slot_grid import SlotGrid, slot_grid_for, parse_time
+from app.services.appointment import AppointmentService, appointment_service
+
+logger = get_logger(__name__)
+
+
+class AvailabilityView:
+    """
+    Today's availability per doctor, plus the pre-rendered static prompt.
+    
+    - The static sections (clinic, doctors, services) are rendered once
+      and reused until one of the config files changes on disk.
+    - Each doctor's availability line is rendered from the appointment
+      index's booked mask and re-rendered in place when the appointment
+      service reports a booking change for that doctor today.
+    - At midnight the view rolls over to the new day.
+    """
+    
+    CONFIG_FILES = ("clinic.json", "doctors.json", "services.json")
+    
+    def __init__(self, service: AppointmentService):
+        self._service = service
+        
+        self._signatures: Optional[Tuple[Any, ...]] = None
+        self._sections: Optional[Dict[str, Any]] = None
+        self._doctors: List[Dict[str, Any]] = []
+        self._working_hours: Dict[str, Any] = {}
+        self._grid: Optional[SlotGrid] = None
+        
+        self._date: Optional[str] = None
+        # doctor_id -> rendered availability line for self._date
+        self._lines: Dict[str, str] = {}
+        # Bumped whenever all lines are dropped
+        self._generation = 0
+        self._rollover_task: Optional[asyncio.Task] = None
+        
+        service.add_listener(self._on_appointment_changed)
+    
+    async def startup(self) -> None:
+        """Render the view and start the midnight rollover."""
+        await self.get_availability_info()
+        if self._rollover_task is None:
+            self._rollover_task = asyncio.create_task(self._rollover_loop())
+    
+    async def shutdown(self) -> None:
+        """Stop the midnight rollover."""
+        if self._rollover_task is not None:
+            self._rollover_task.cancel()
+            try:
+                await self._rollover_task
+            except asyncio.CancelledError:
+                pass
+            self._rollover_task = None
+    
+    def _drop_lines(self) -> None:
+        self._lines.clear()
+        self._generation += 1
+    
+    async def _refresh_config(self) -> None:
+        """Re-render the static sections if a config file changed on disk."""
+        signatures = tuple(json_store.signature(f) for f in self.CONFIG_FILES)
+        if signatures == self._signatures and self._sections is not None:
+            return
+        
+        clinic = await json_store.read("clinic.json")
+        doctors = await json_store.read("doctors.json")
+        services = await json_store.read("services.json")
+        
+        self._sections = render_static_sections(clinic, doctors, services)
+        self._doctors = list(doctors)
+        self._working_hours = {
+            **self._sections["working_hours"],
+            "slot_duration_minutes": self._sections["slot_duration"]
+        }
+        self._grid = slot_grid_for(self._working_hours)
+        self._signatures = signatures
+        self._drop_lines()
+        logger.info("Prompt config sections rendered")
+    
+    def _roll_over_if_needed(self) -> None:
+        """Switch the view to today if the date changed."""
+        today = date.today().isoformat()
+        if today != self._date:
+            self._date = today
+            self._drop_lines()
+    
+    def _on_appointment_changed(self, appointment: Optional[Dict[str, Any]]) -> None:
+        """Update the affected doctor's line after a booking change."""
+        if appointment is None:
+            self._drop_lines()
+            return
+        if appointment.get("date") != self._date or self._grid is None:
+            return
+        
+        doctor_id = appointment.get("doctor_id")
+        doctor = next((d for d in self._doctors if d["id"] == doctor_id), None)
+        if doctor is not None:
+            booked = self._service.index.booked_mask(doctor_id, self._date, self._grid)
+            self._lines[doctor_id] = render_availability_line(doctor, self._grid, booked)
+    
+    async def get_availability_info(self) -> str:
+        """Get today's rendered availability lines for all doctors."""
+        await self._refresh_config()
+        self._roll_over_if_needed()
+        
+        # Getting a mask can reload the index, which drops every line;
+        # start over if that happens mid-way
+        while True:
+            generation = self._generation
+            for doctor in self._doctors:
+                if doctor["id"] in self._lines:
+                    continue
+                booked = await self._service.get_booked_mask(doctor["id"], self._date, self._grid)
+                if self._generation != generation:
+                    break
+                self._lines[doctor["id"]] = render_availability_line(doctor, self._grid, booked)
+            else:
+                break
+        
+        return "\n".join(self._lines[doctor["id"]] for doctor in self._doctors)
+    
+    async def get_doctor_lines(self, doctor_ids: Optional[Iterable[str]] = None) -> str:
+        """
+        Get today's availability lines for some doctors.
+        
+        Args:
+            doctor_ids: Doctors to include; all doctors if omitted
+        """
+        await self.get_availability_info()
+        wanted = None if doctor_ids is None else set(doctor_ids)
+        return "\n".join(
+            self._lines[doctor["id"]] for doctor in self._doctors
+            if wanted is None or doctor["id"] in wanted
+        )
+    
+    @property
+    def today(self) -> Optional[str]:
+        """Date (YYYY-MM-DD) the view currently shows."""
+        return self._date
+    
+    async def pick_greeting(self) -> str:
+        """Pick a random greeting for a new call."""
+        await self._refresh_config()
+        return pick_greeting(self._sections)
+    
+    async def get_system_prompt(self, greeting: Optional[str] = None) -> str:
+        """
+        Build the system prompt for a new call.
+        
+        Args:
+            greeting: Greeting to use; a random one if omitted. A pooled
+                session passes the one it was configured with, so its
+                instructions don't change when a call takes it.
+        """
+        await self._refresh_config()
+        self._roll_over_if_needed()
+        return assemble_system_prompt(
+            self._sections,
+            greeting if greeting is not None else pick_greeting(self._sections),
+            date.fromisoformat(self._date)
+        )
+    
+    def _doctors_for(self, service_id: str, doctor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the doctors offering a service, optionally just one doctor."""
+        return [
+            doctor for doctor in self._doctors
+            if (doctor_id is None or doctor["id"] == doctor_id)
+            and service_id in doctor.get("available_services", [])
+        ]
+    
+    def _not_before(self, target_date: str) -> Optional[str]:
+        """Earliest bookable time on a date: now for today, any time later on."""
+        if target_date == date.today().isoformat():
+            return datetime.now().strftime("%H:%M")
+        return None
+    
+    async def check_availability(
+        self,
+        target_date: str,
+        service_id: str,
+        doctor_id: Optional[str] = None,
+        limit: int = 12
+    ) -> List[Dict[str, Any]]:
+        """
+        Get free start times on a date for a service.
+        
+        Args:
+            target_date: Date string (YYYY-MM-DD)
+            service_id: Service whose full duration must fit
+            doctor_id: Optional doctor; all doctors offering the service if omitted
+            limit: Maximum number of times listed per doctor
+        
+        Returns:
+            One entry per doctor with doctor_id, doctor_name, free_count
+            and the first `limit` free times.
+        """
+        await self._refresh_config()
+        results = []
+        for doctor in self._doctors_for(service_id, doctor_id):
+            slots = await self._service.get_next_free_slots(
+                doctor["id"],
+                target_date,
+                self._working_hours,
+                len(self._grid),
+                after=self._not_before(target_date),
+                service_id=service_id
+            )
+            results.append({
+                "doctor_id": doctor["id"],
+                "doctor_name": doctor["name"],
+                "free_count": len(slots),
+                "slots": slots[:limit]
+            })
+        return results
+    
+    async def find_next_free_slot(
+        self,
+        service_id: str,
+        doctor_id: Optional[str] = None,
+        after_date: Optional[str] = None,
+        after_time: Optional[str] = None,
+        horizon_days: int = 60
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the earliest free start time for a service.
+        
+        Args:
+            service_id: Service whose full duration must fit
+            doctor_id: Optional doctor; all doctors offering the service if omitted
+            after_date: Optional first date to search (YYYY-MM-DD), default today
+            after_time: Optional earliest time on the first date (HH:MM)
+            horizon_days: How many days ahead of today to search
+        
+        Returns:
+            Dict with doctor_id, doctor_name, date and time, or None.
+        """
+        await self._refresh_config()
+        doctors = self._doctors_for(service_id, doctor_id)
+        if not doctors:
+            return None
+        
+        today = date.today()
+        day = max(today, date.fromisoformat(after_date)) if after_date else today
+        last_day = today + timedelta(days=horizon_days)
+        
+        while day <= last_day:
+            target_date = day.isoformat()
+            after = self._not_before(target_date)
+            if after_time and target_date == after_date:
+                after = max(after, after_time, key=parse_time) if after else after_time
+            
+            best: Optional[Tuple[str, Dict[str, Any]]] = None
+            for doctor in doctors:
+                time = await self._service.find_earliest_slot(
+                    doctor["id"], target_date, self._working_hours, service_id, after=after
+                )
+                if time is not None and (best is None or time < best[0]):
+                    best = (time, doctor)
+            
+            if best is not None:
+                return {
+                    "doctor_id": best[1]["id"],
+                    "doctor_name": best[1]["name"],
+                    "date": target_date,
+                    "time": best[0]
+                }
+            day += timedelta(days=1)
+        return None
+    
+    async def _rollover_loop(self) -> None:
+        """Roll the view over shortly after each midnight."""
+        while True:
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            await asyncio.sleep((midnight - now).total_seconds() + 1)
+            try:
+                await self.get_availability_info()
+                logger.info(f"Availability view rolled over to {self._date}")
+            except Exception as e:
+                logger.error(f"Error rolling over availability view: {e}")
+
+
+# Global view instance
+availability_view = AvailabilityView(appointment_service)
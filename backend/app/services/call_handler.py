@@ -6,19 +6,29 @@ Manages the full lifecycle of a voice call.
 import json
 import asyncio
 from datetime import datetime, date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 from fastapi import WebSocket
 
 from app.config import settings
 from app.utils.logging import get_logger, CallLogger
 from app.utils.json_store import json_store
-from app.utils.prompt_builder import build_system_prompt, get_appointment_tool_definition
+from app.utils.prompt_builder import get_tool_definitions
+from app.utils.twilio_media import extract_media_payload
+from app.utils.slot_grid import parse_time, format_time
 from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.session_pool import session_pool
+from app.services.audio_batcher import AudioBatcher
+from app.services.playout_buffer import PlayoutBuffer
+from app.services.transcript_stream import TranscriptStream
 from app.services.appointment import appointment_service
+from app.services.availability import availability_view
 from app.services.event_bus import event_bus
 
 logger = get_logger(__name__)
 
+# Events that can change a doctor's availability
+APPOINTMENT_EVENTS = ("appointment_created", "appointment_updated", "appointment_deleted")
+
 
 class CallHandler:
     """
@@ -32,13 +42,21 @@ class CallHandler:
         
         self.twilio_ws: Optional[WebSocket] = None
         self.openai_service: Optional[OpenAIRealtimeService] = None
+        self.audio_batcher: Optional[AudioBatcher] = None
+        self.playout: Optional[PlayoutBuffer] = None
         
         self.stream_sid: Optional[str] = None
         self.caller_number: Optional[str] = None
+        # Pooled session reserved for this call by /incoming-call
+        self.session_token: Optional[str] = None
         self.call_start_time: Optional[datetime] = None
         
         self._running = False
-        self._agent_transcript_buffer = ""
+        self.agent_transcript = TranscriptStream(call_id, settings.transcript_coalesce_ms)
+        
+        # Doctors whose availability changed since the last push
+        self._availability_changes: Set[str] = set()
+        self._availability_push_task: Optional[asyncio.Task] = None
     
     async def handle_call(self, twilio_ws: WebSocket) -> None:
         """
@@ -50,11 +68,25 @@ class CallHandler:
         self._running = True
         
         try:
-            # Load clinic data for the AI
-            clinic_data = await self._load_clinic_data()
+            # Twilio's 'start' message names the session reserved for us
+            if not await self._wait_for_start():
+                return
             
-            # Initialize OpenAI connection
-            self.openai_service = OpenAIRealtimeService(self.call_id)
+            tools = get_tool_definitions()
+            
+            # A pre-connected session skips the connect and handshake
+            self.openai_service = session_pool.take(self.session_token, self.call_id)
+            if self.openai_service:
+                self.log.info("Using a pre-connected OpenAI session")
+                system_prompt = await availability_view.get_system_prompt(self.openai_service.greeting)
+                await self.openai_service.update_session(system_prompt, tools)
+            else:
+                system_prompt = await availability_view.get_system_prompt()
+                self.openai_service = OpenAIRealtimeService(self.call_id)
+                connected = await self.openai_service.connect(system_prompt, tools)
+                if not connected:
+                    self.log.error("Failed to connect to OpenAI")
+                    return
             
             # Set up callbacks
             self.openai_service.on_audio = self._handle_openai_audio
@@ -62,22 +94,19 @@ class CallHandler:
             self.openai_service.on_transcript_agent = self._handle_agent_transcript
             self.openai_service.on_function_call = self._handle_function_call
             self.openai_service.on_error = self._handle_openai_error
+            self.openai_service.on_interruption = self._handle_interruption
             
-            # Connect to OpenAI
-            system_prompt = build_system_prompt(
-                clinic=clinic_data["clinic"],
-                doctors=clinic_data["doctors"],
-                services=clinic_data["services"],
-                appointments=clinic_data["appointments"],
-                target_date=date.today()
+            # Caller audio goes to OpenAI in chunks of AUDIO_BATCH_MS
+            self.audio_batcher = AudioBatcher(
+                self.openai_service.send_audio, settings.audio_batch_ms
             )
             
-            tools = [get_appointment_tool_definition()]
+            # Agent audio is paced to Twilio in real time
+            self.playout = PlayoutBuffer(self._send_twilio_audio, settings.playout_lead_ms)
+            self.playout.start()
             
-            connected = await self.openai_service.connect(system_prompt, tools)
-            if not connected:
-                self.log.error("Failed to connect to OpenAI")
-                return
+            # Keep the agent's view of free slots current while the call runs
+            event_bus.add_listener(self._on_bus_event)
             
             # Run both handlers concurrently
             twilio_task = asyncio.create_task(self._handle_twilio_messages())
@@ -102,27 +131,55 @@ class CallHandler:
         finally:
             await self._cleanup()
     
-    async def _load_clinic_data(self) -> Dict[str, Any]:
-        """Load all clinic data needed for the AI."""
-        clinic = await json_store.read("clinic.json")
-        doctors = await json_store.read("doctors.json")
-        services = await json_store.read("services.json")
-        appointments = await appointment_service.get_all(
-            filter_date=date.today().isoformat()
-        )
+    async def _wait_for_start(self) -> bool:
+        """
+        Read Twilio's opening messages up to 'start'.
+        Twilio sends them as soon as the stream opens, before any audio.
         
-        return {
-            "clinic": clinic,
-            "doctors": doctors,
-            "services": services,
-            "appointments": appointments
-        }
+        Returns:
+            False if the stream stopped before it started.
+        """
+        while True:
+            data = json.loads(await self.twilio_ws.receive_text())
+            event_type = data.get("event")
+            
+            if event_type == "connected":
+                self.log.info("Twilio stream connected")
+                
+            elif event_type == "start":
+                await self._handle_stream_start(data)
+                return True
+                
+            elif event_type == "stop":
+                self.log.info("Twilio stream stopped before it started")
+                return False
+    
+    async def _handle_stream_start(self, data: Dict[str, Any]) -> None:
+        """Handle Twilio's 'start' message."""
+        self.stream_sid = data["start"]["streamSid"]
+        self.caller_number = data["start"].get("callSid", "unknown")
+        self.session_token = data["start"].get("customParameters", {}).get("session")
+        self.log.info(f"Stream started - SID: {self.stream_sid[:20]}...")
+        
+        # Notify dashboard
+        await event_bus.publish_call_started(
+            self.call_id, 
+            self.caller_number
+        )
     
     async def _handle_twilio_messages(self) -> None:
         """Process incoming messages from Twilio."""
         try:
             while self._running:
                 message = await self.twilio_ws.receive_text()
+                
+                # Fast path for the ~50 media frames per second
+                audio_payload = extract_media_payload(message)
+                if audio_payload is not None:
+                    if self.openai_service and self.openai_service.is_connected:
+                        await self.audio_batcher.add(audio_payload)
+                    continue
+                
                 data = json.loads(message)
                 event_type = data.get("event")
                 
@@ -130,24 +187,17 @@ class CallHandler:
                     self.log.info("Twilio stream connected")
                     
                 elif event_type == "start":
-                    self.stream_sid = data["start"]["streamSid"]
-                    self.caller_number = data["start"].get("callSid", "unknown")
-                    self.log.info(f"Stream started - SID: {self.stream_sid[:20]}...")
-                    
-                    # Notify dashboard
-                    await event_bus.publish_call_started(
-                        self.call_id, 
-                        self.caller_number
-                    )
+                    await self._handle_stream_start(data)
                     
                 elif event_type == "media":
-                    # Forward audio to OpenAI
+                    # Media frames the fast path couldn't handle
                     audio_payload = data["media"]["payload"]
                     if self.openai_service and self.openai_service.is_connected:
-                        await self.openai_service.send_audio(audio_payload)
+                        await self.audio_batcher.add(audio_payload)
                         
                 elif event_type == "stop":
                     self.log.info("Twilio stream stopped")
+                    await self.audio_batcher.flush()
                     self._running = False
                     break
                     
@@ -155,22 +205,25 @@ class CallHandler:
             self.log.error(f"Error in Twilio handler: {e}")
             self._running = False
     
-    async def _handle_openai_audio(self, audio_base64: str) -> None:
-        """Send audio from OpenAI to Twilio."""
+    async def _handle_openai_audio(self, audio_base64: str, item_id: Optional[str] = None) -> None:
+        """Queue audio from OpenAI for playout to Twilio."""
+        if not self.stream_sid or not self.playout:
+            return
+        self.playout.push(audio_base64, item_id)
+    
+    async def _send_twilio_audio(self, audio_base64: str) -> None:
+        """Send one paced frame of agent audio to Twilio."""
         if not self.twilio_ws or not self.stream_sid:
             return
             
-        try:
-            media_message = {
-                "event": "media",
-                "streamSid": self.stream_sid,
-                "media": {
-                    "payload": audio_base64
-                }
+        media_message = {
+            "event": "media",
+            "streamSid": self.stream_sid,
+            "media": {
+                "payload": audio_base64
             }
-            await self.twilio_ws.send_json(media_message)
-        except Exception as e:
-            self.log.error(f"Error sending audio to Twilio: {e}")
+        }
+        await self.twilio_ws.send_json(media_message)
     
     async def _handle_user_transcript(self, text: str, is_final: bool) -> None:
         """Handle user speech transcription."""
@@ -185,18 +238,7 @@ class CallHandler:
     
     async def _handle_agent_transcript(self, delta: str) -> None:
         """Handle agent response transcription (streaming)."""
-        self._agent_transcript_buffer += delta
-        
-        # Send periodic updates for long responses
-        if len(self._agent_transcript_buffer) > 50 or delta.endswith(('.', '!', '?')):
-            await event_bus.publish_transcript(
-                self.call_id,
-                self._agent_transcript_buffer,
-                is_user=False,
-                is_final=delta.endswith(('.', '!', '?'))
-            )
-            if delta.endswith(('.', '!', '?')):
-                self._agent_transcript_buffer = ""
+        await self.agent_transcript.add(delta)
     
     async def _handle_function_call(
         self, 
@@ -209,18 +251,124 @@ class CallHandler:
         """
         if function_name == "create_appointment":
             return await self._create_appointment(arguments)
+        if function_name == "check_availability":
+            return await self._check_availability(arguments)
+        if function_name == "find_next_free_slot":
+            return await self._find_next_free_slot(arguments)
         
         return json.dumps({
             "success": False,
             "error": f"Unknown function: {function_name}"
         })
     
+    @staticmethod
+    def _parse_booking_date(value: Optional[str]) -> Optional[str]:
+        """
+        Validate a date argument from the model.
+        
+        Returns:
+            The date as YYYY-MM-DD (today if missing), or None if it is
+            invalid, in the past or beyond the booking horizon.
+        """
+        today = date.today()
+        if not value:
+            return today.isoformat()
+        try:
+            target = date.fromisoformat(value)
+        except ValueError:
+            return None
+        if target < today or (target - today).days > settings.booking_horizon_days:
+            return None
+        return target.isoformat()
+    
+    def _invalid_date_result(self) -> str:
+        return json.dumps({
+            "success": False,
+            "error": (
+                f"Data trebuie să fie în formatul YYYY-MM-DD, între azi și "
+                f"următoarele {settings.booking_horizon_days} zile."
+            )
+        })
+    
+    @staticmethod
+    def _parse_booking_time(value: str) -> Optional[str]:
+        """Validate a time argument from the model; HH:MM, or None if invalid."""
+        try:
+            minutes = parse_time(value)
+        except ValueError:
+            return None
+        # parse_time doesn't range-check the parts, e.g. "9:75"
+        if not 0 <= minutes < 24 * 60 or not 0 <= int(value.split(":")[1]) < 60:
+            return None
+        return format_time(minutes)
+    
+    def _invalid_time_result(self) -> str:
+        return json.dumps({
+            "success": False,
+            "error": "Ora trebuie să fie în formatul HH:MM."
+        })
+    
+    async def _check_availability(self, args: Dict[str, Any]) -> str:
+        """Handle check_availability function call."""
+        target_date = self._parse_booking_date(args.get("date"))
+        if target_date is None:
+            return self._invalid_date_result()
+        
+        doctors = await availability_view.check_availability(
+            target_date,
+            args.get("service_id", ""),
+            doctor_id=args.get("doctor_id") or None
+        )
+        if not doctors:
+            return json.dumps({
+                "success": False,
+                "error": "Niciun doctor nu oferă acest serviciu."
+            })
+        
+        return json.dumps({
+            "success": True,
+            "date": target_date,
+            "doctors": doctors
+        }, ensure_ascii=False)
+    
+    async def _find_next_free_slot(self, args: Dict[str, Any]) -> str:
+        """Handle find_next_free_slot function call."""
+        after_date = args.get("after_date")
+        if after_date:
+            after_date = self._parse_booking_date(after_date)
+            if after_date is None:
+                return self._invalid_date_result()
+        after_time = args.get("after_time")
+        if after_time:
+            after_time = self._parse_booking_time(str(after_time))
+            if after_time is None:
+                return self._invalid_time_result()
+        
+        slot = await availability_view.find_next_free_slot(
+            args.get("service_id", ""),
+            doctor_id=args.get("doctor_id") or None,
+            after_date=after_date,
+            after_time=after_time or None,
+            horizon_days=settings.booking_horizon_days
+        )
+        if slot is None:
+            return json.dumps({
+                "success": False,
+                "error": "Nu există ore libere pentru acest serviciu în perioada următoare."
+            })
+        
+        return json.dumps({"success": True, "slot": slot}, ensure_ascii=False)
+    
     async def _create_appointment(self, args: Dict[str, Any]) -> str:
         """Handle create_appointment function call."""
+        target_date = self._parse_booking_date(args.get("date"))
+        if target_date is None:
+            return self._invalid_date_result()
+        
         try:
             success, message, appointment = await appointment_service.create(
                 doctor_id=args.get("doctor_id", ""),
-                target_date=date.today().isoformat(),
+                target_date=target_date,
                 time=args.get("time", ""),
                 patient_name=args.get("patient_name", ""),
                 patient_phone=args.get("patient_phone", ""),
@@ -266,11 +414,83 @@ class CallHandler:
                 "error": "A apărut o eroare. Vă rugăm să încercați din nou."
             })
     
+    def _on_bus_event(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Collect availability changes made elsewhere and schedule a push."""
+        if event_type not in APPOINTMENT_EVENTS:
+            return
+        
+        appointment = data.get("appointment") or {}
+        if (event_type == "appointment_created"
+                and appointment.get("created_by") == f"call-{self.call_id[:8]}"):
+            # The agent already knows about its own bookings
+            return
+        
+        if appointment:
+            # A move off today frees a slot the old version held
+            versions = [v for v in (data.get("previous"), appointment) if v]
+            doctors = {
+                v.get("doctor_id") or "*"
+                for v in versions if v.get("date") == availability_view.today
+            }
+            if not doctors:
+                return
+        else:
+            # Deletes without details could have freed any doctor's slot
+            doctors = {"*"}
+        
+        self._availability_changes.update(doctors)
+        if self._availability_push_task is None or self._availability_push_task.done():
+            self._availability_push_task = asyncio.create_task(self._push_availability())
+    
+    async def _push_availability(self) -> None:
+        """Send the changed doctors' availability to OpenAI after a short debounce."""
+        await asyncio.sleep(settings.availability_push_debounce_ms / 1000)
+        
+        changed = self._availability_changes
+        self._availability_changes = set()
+        if not self.openai_service or not self.openai_service.is_connected:
+            return
+        
+        try:
+            lines = await availability_view.get_doctor_lines(
+                None if "*" in changed else changed
+            )
+            if not lines:
+                return
+            await self.openai_service.send_system_message(
+                "ACTUALIZARE: orele libere de azi s-au schimbat pentru acești doctori:\n"
+                f"{lines}"
+            )
+            self.log.info(f"Pushed availability update for {len(changed)} doctor(s)")
+        except Exception as e:
+            self.log.error(f"Error pushing availability update: {e}")
+    
     async def _handle_openai_error(self, error: str) -> None:
         """Handle errors from OpenAI."""
         self.log.error(f"OpenAI error: {error}")
         await event_bus.publish_error("openai_error", error)
     
+    async def _handle_interruption(self) -> None:
+        """
+        Silence the agent when the caller talks over it.
+        Drops unplayed audio here and at Twilio, then truncates the
+        agent's message to the part the caller actually heard.
+        """
+        if not self.playout:
+            return
+        
+        cut = self.playout.flush()
+        if cut is None:
+            # Nothing was left to play
+            return
+        
+        await self._clear_twilio_buffer()
+        await self.agent_transcript.flush(final=True)
+        item_id, played_ms = cut
+        if item_id:
+            await self.openai_service.truncate_item(item_id, played_ms)
+        self.log.info(f"Caller interrupted; agent cut off after {played_ms}ms")
+    
     async def _clear_twilio_buffer(self) -> None:
         """Clear Twilio's audio buffer (for interruptions)."""
         if self.twilio_ws and self.stream_sid:
@@ -288,11 +508,25 @@ class CallHandler:
         """Clean up resources when call ends."""
         self._running = False
         
+        event_bus.remove_listener(self._on_bus_event)
+        if self._availability_push_task and not self._availability_push_task.done():
+            self._availability_push_task.cancel()
+        
         # Calculate call duration
         duration = 0
         if self.call_start_time:
             duration = int((datetime.utcnow() - self.call_start_time).total_seconds())
         
+        if self.audio_batcher:
+            await self.audio_batcher.close()
+            self.log.info(f"Inbound audio: {self.audio_batcher.stats}")
+        
+        if self.playout:
+            await self.playout.close()
+            self.log.info(f"Outbound audio: {self.playout.stats}")
+        
+        await self.agent_transcript.close()
+        
         # Disconnect from OpenAI
         if self.openai_service:
             await self.openai_service.disconnect()
@@ -4,50 +4,508 @@ Implements a simple pub/sub pattern using asyncio.
 """
 
 import asyncio
-from typing import Dict, Set, Any, Callable, Awaitable
+import itertools
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Any, Callable, Awaitable, Tuple
 from datetime import datetime
 import json
 
+from app.config import settings
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Upper bounds of the batch size histogram buckets; larger batches count as "more"
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+# Dimensions a dashboard can filter on, most selective first. A filtered
+# subscriber is indexed under the first dimension its filter uses.
+TOPIC_DIMENSIONS = ("call_id", "doctor_id", "date", "type")
+
+
+def event_topics(event_type: str, data: Dict[str, Any]) -> Dict[str, str]:
+    """Get the topic values of an event, for the dimensions it has."""
+    topics = {"type": event_type}
+    if "call_id" in data:
+        topics["call_id"] = data["call_id"]
+    appointment = data.get("appointment")
+    if appointment:
+        if appointment.get("doctor_id"):
+            topics["doctor_id"] = appointment["doctor_id"]
+        if appointment.get("date"):
+            topics["date"] = appointment["date"]
+    return topics
+
+
+def _topic_filters(
+    topics: Optional[Dict[str, Iterable[str]]]
+) -> Optional[Dict[str, FrozenSet[str]]]:
+    """Keep the known, non-empty dimensions of a filter; None if none are left."""
+    filters = {
+        dimension: frozenset(values)
+        for dimension, values in (topics or {}).items()
+        if dimension in TOPIC_DIMENSIONS and values
+    }
+    return filters or None
+
+
+def coalesce_key(event_type: str, data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Key under which a newer event supersedes an older queued one, or None
+    if every event of this kind must be delivered.
+    
+    An appointment update carries the whole appointment, so only the
+    latest one matters. Transcript deltas never coalesce; each one is
+    part of the text.
+    """
+    if event_type == "appointment_updated":
+        return (event_type, data.get("appointment", {}).get("id", ""))
+    return None
+
+
+class EncodedEvent:
+    """
+    An event with its WebSocket frame encoded once at publish time.
+    Every dashboard is sent the same `frame` text, so fan-out doesn't
+    re-encode the event per subscriber.
+    """
+    
+    __slots__ = ("type", "data", "frame", "key", "seq", "published")
+    
+    def __init__(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        frame: str,
+        key: Optional[Tuple[str, str]] = None,
+        seq: Optional[int] = None
+    ):
+        self.type = event_type
+        self.data = data
+        self.frame = frame
+        self.key = key
+        self.seq = seq
+        self.published = time.monotonic()
+    
+    @classmethod
+    def encode(
+        cls,
+        event_type: str,
+        data: Dict[str, Any],
+        seq: Optional[int] = None
+    ) -> "EncodedEvent":
+        """Build the event envelope and encode it as send_json would."""
+        envelope: Dict[str, Any] = {}
+        if seq is not None:
+            envelope["seq"] = seq
+        envelope["type"] = event_type
+        envelope["timestamp"] = datetime.utcnow().isoformat()
+        envelope["data"] = data
+        frame = json.dumps(envelope, separators=(",", ":"), ensure_ascii=False)
+        return cls(event_type, data, frame, coalesce_key(event_type, data), seq)
+
+
+def batch_frame(events: List[EncodedEvent]) -> str:
+    """
+    Join encoded events into one WebSocket frame: a single event is sent
+    as is, several as a JSON array of their frames, without re-encoding.
+    """
+    if len(events) == 1:
+        return events[0].frame
+    return "[" + ",".join(event.frame for event in events) + "]"
+
+
+class Subscriber:
+    """
+    A dashboard's bounded event queue.
+    
+    At most `maxsize` events wait for a slow dashboard; `policy` decides
+    what gives when it falls behind:
+    - drop_oldest: the oldest queued event is dropped.
+    - coalesce: a newer event with the same coalesce key replaces the
+      queued one; if the queue is still full the oldest is dropped.
+    - disconnect: the subscriber is closed and the dashboard has to
+      reconnect.
+    """
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, maxsize: int, policy: str, name: str = ""):
+        self.id = next(self._ids)
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.closed = False
+        # dimension -> accepted values; None receives every event
+        self.topics: Optional[Dict[str, FrozenSet[str]]] = None
+        
+        self._events: Deque[EncodedEvent] = deque()
+        # Coalesce key -> the queued event holding it
+        self._keyed: Dict[Tuple[str, str], EncodedEvent] = {}
+        self._ready = asyncio.Event()
+        
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.batches = 0
+        self.batch_sizes: Dict[str, int] = {
+            str(bound): 0 for bound in BATCH_BUCKETS
+        }
+        self.batch_sizes["more"] = 0
+    
+    def put(self, event: EncodedEvent) -> bool:
+        """
+        Queue an event for this dashboard.
+        
+        Returns:
+            False if the subscriber is closed, including when it was just
+            closed for falling too far behind.
+        """
+        if self.closed:
+            return False
+        
+        if self.policy == "coalesce" and event.key is not None:
+            superseded = self._keyed.pop(event.key, None)
+            if superseded is not None:
+                self._events.remove(superseded)
+                self.coalesced += 1
+        
+        if len(self._events) >= self.maxsize:
+            if self.policy == "disconnect":
+                self.close()
+                return False
+            self._drop_oldest()
+        
+        self._events.append(event)
+        if self.policy == "coalesce" and event.key is not None:
+            self._keyed[event.key] = event
+        self.max_depth = max(self.max_depth, len(self._events))
+        self._ready.set()
+        return True
+    
+    def _drop_oldest(self) -> None:
+        oldest = self._events.popleft()
+        if oldest.key is not None and self._keyed.get(oldest.key) is oldest:
+            del self._keyed[oldest.key]
+        self.dropped += 1
+    
+    async def get(self) -> EncodedEvent:
+        """Wait for the next event; a 'shutdown' event once closed."""
+        while not self._events:
+            if self.closed:
+                return EncodedEvent("shutdown", {}, "")
+            self._ready.clear()
+            await self._ready.wait()
+        
+        return self._pop()
+    
+    async def get_batch(self, max_bytes: int, linger_ms: float = 0) -> List[EncodedEvent]:
+        """
+        Wait for the next events and take as many as fit in one frame.
+        
+        Args:
+            max_bytes: Approximate limit on the frames' combined length
+            linger_ms: After the first event, how long to wait for more
+                while the batch has room
+        
+        Returns:
+            At least one event, or an empty list once closed.
+        """
+        first = await self.get()
+        if first.type == "shutdown":
+            return []
+        
+        batch = [first]
+        size = len(first.frame)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + linger_ms / 1000
+        while True:
+            while self._events and size + len(self._events[0].frame) + 1 <= max_bytes:
+                event = self._pop()
+                batch.append(event)
+                size += len(event.frame) + 1
+            
+            # Full, or nothing more to wait for
+            remaining = deadline - loop.time()
+            if self._events or self.closed or remaining <= 0:
+                break
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        
+        self.batches += 1
+        bucket = next((str(bound) for bound in BATCH_BUCKETS if len(batch) <= bound), "more")
+        self.batch_sizes[bucket] += 1
+        return batch
+    
+    def _pop(self) -> EncodedEvent:
+        event = self._events.popleft()
+        if event.key is not None and self._keyed.get(event.key) is event:
+            del self._keyed[event.key]
+        self.delivered += 1
+        return event
+    
+    def close(self) -> None:
+        """Drop queued events and wake the sender so it stops."""
+        self.closed = True
+        self._events.clear()
+        self._keyed.clear()
+        self._ready.set()
+    
+    @property
+    def lag_ms(self) -> float:
+        """How long the oldest queued event has been waiting."""
+        if not self._events:
+            return 0.0
+        return (time.monotonic() - self._events[0].published) * 1000
+    
+    def matches(self, topics: Dict[str, str]) -> bool:
+        """Check an event's topics against every dimension of the filter."""
+        if self.topics is None:
+            return True
+        return all(topics.get(dimension) in values for dimension, values in self.topics.items())
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, lag and drop counters."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "policy": self.policy,
+            "topics": {d: sorted(v) for d, v in self.topics.items()} if self.topics else None,
+            "depth": len(self._events),
+            "max_depth": self.max_depth,
+            "lag_ms": round(self.lag_ms, 1),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "batch_sizes": dict(self.batch_sizes)
+        }
+
 
 class EventBus:
     """
     In-memory event bus for broadcasting events to dashboard WebSocket clients.
     Thread-safe through asyncio primitives.
+    
+    Subscribers without a topic filter get every event. Filtered ones are
+    indexed by (dimension, value) under their most selective dimension, so
+    a publish only looks at subscribers that asked for one of the event's
+    topics and checks their remaining dimensions.
+    
+    Every event gets the next sequence number of this bus's `epoch`, and
+    the last `replay_size` events are kept so a reconnecting dashboard can
+    `resume` from the last one it saw instead of reloading everything.
     """
     
-    def __init__(self):
-        # Set of asyncio queues for each connected client
-        self._subscribers: Set[asyncio.Queue] = set()
+    def __init__(
+        self,
+        queue_max: Optional[int] = None,
+        policy: Optional[str] = None,
+        replay_size: Optional[int] = None
+    ):
+        self.queue_max = settings.event_queue_max if queue_max is None else queue_max
+        self.policy = settings.event_slow_consumer_policy if policy is None else policy
+        if self.policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {self.policy}")
+        self.replay_size = settings.event_replay_size if replay_size is None else replay_size
+        
+        # Sequence numbers restart with the process; the epoch tells a
+        # dashboard whether its last_seq still means anything
+        self.epoch = uuid.uuid4().hex
+        self.seq = 0
+        self._history: Deque[EncodedEvent] = deque(maxlen=max(1, self.replay_size))
+        self.resumes = 0
+        self.replayed = 0
+        self.snapshots = 0
+        
+        # Bounded queue for each connected client
+        self._subscribers: Set[Subscriber] = set()
+        # Subscribers with no filter, and filtered ones by (dimension, value)
+        self._unfiltered: Set[Subscriber] = set()
+        self._by_topic: Dict[Tuple[str, str], Set[Subscriber]] = {}
         self._lock = asyncio.Lock()
+        # In-process callbacks, called synchronously on publish
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
     
-    async def subscribe(self) -> asyncio.Queue:
+    async def subscribe(
+        self,
+        name: str = "",
+        topics: Optional[Dict[str, Iterable[str]]] = None
+    ) -> Subscriber:
         """
         Subscribe to events.
         
+        Args:
+            name: Label for the subscriber in metrics, e.g. the client address
+            topics: Initial topic filter, as for set_topics
+        
         Returns:
-            Queue that will receive events.
+            Subscriber whose get() returns EncodedEvent objects.
         """
-        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = Subscriber(self.queue_max, self.policy, name)
+        subscriber.topics = _topic_filters(topics)
         async with self._lock:
-            self._subscribers.add(queue)
+            self._subscribers.add(subscriber)
+            self._index(subscriber)
             logger.info(f"New subscriber added. Total: {len(self._subscribers)}")
-        return queue
+        return subscriber
     
-    async def unsubscribe(self, queue: asyncio.Queue) -> None:
+    async def resume(
+        self,
+        epoch: Optional[str],
+        last_seq: Optional[int],
+        name: str = "",
+        topics: Optional[Dict[str, Iterable[str]]] = None
+    ) -> Tuple[Subscriber, int, Optional[List[EncodedEvent]]]:
+        """
+        Subscribe a reconnecting dashboard and get the events it missed.
+        
+        Args:
+            epoch: Epoch the dashboard's last event came from
+            last_seq: Sequence number of that event
+            name: Label for the subscriber in metrics
+            topics: Topic filter, as for set_topics; only matching events
+                are replayed
+        
+        Returns:
+            The subscriber; the current sequence number, which the
+            subscriber's first event follows; and the events after
+            `last_seq`, or None if some of them are no longer kept (or the
+            epoch changed) and the dashboard needs a snapshot instead.
+        """
+        subscriber = Subscriber(self.queue_max, self.policy, name)
+        subscriber.topics = _topic_filters(topics)
+        async with self._lock:
+            self._subscribers.add(subscriber)
+            self._index(subscriber)
+            replay = self._replay_since(epoch, last_seq)
+            seq = self.seq
+        
+        if replay is None:
+            self.snapshots += 1
+        else:
+            if subscriber.topics is not None:
+                replay = [e for e in replay if subscriber.matches(event_topics(e.type, e.data))]
+            self.resumes += 1
+            self.replayed += len(replay)
+        logger.info(
+            f"Subscriber resumed from seq {last_seq}: "
+            f"{'snapshot' if replay is None else f'{len(replay)} events replayed'}. "
+            f"Total: {len(self._subscribers)}"
+        )
+        return subscriber, seq, replay
+    
+    def _replay_since(self, epoch: Optional[str], last_seq: Optional[int]) -> Optional[List[EncodedEvent]]:
+        if epoch != self.epoch or last_seq is None or last_seq > self.seq:
+            return None
+        if last_seq == self.seq:
+            return []
+        if self.replay_size == 0 or not self._history or self._history[0].seq > last_seq + 1:
+            return None
+        # Sequence numbers in the history are consecutive
+        start = last_seq + 1 - self._history[0].seq
+        return list(itertools.islice(self._history, start, None))
+    
+    async def unsubscribe(self, subscriber: Subscriber) -> None:
         """
         Unsubscribe from events.
         
         Args:
-            queue: The queue to unsubscribe.
+            subscriber: The subscriber to remove.
         """
         async with self._lock:
-            self._subscribers.discard(queue)
+            self._remove(subscriber)
             logger.info(f"Subscriber removed. Total: {len(self._subscribers)}")
     
+    async def set_topics(
+        self,
+        subscriber: Subscriber,
+        topics: Optional[Dict[str, Iterable[str]]]
+    ) -> None:
+        """
+        Set which events a subscriber receives.
+        
+        Args:
+            subscriber: Subscriber to filter
+            topics: Accepted values per dimension in TOPIC_DIMENSIONS; an
+                event must match every dimension given. None or empty
+                receives every event.
+        """
+        filters = _topic_filters(topics)
+        async with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._unindex(subscriber)
+            subscriber.topics = filters
+            self._index(subscriber)
+    
+    def _index(self, subscriber: Subscriber) -> None:
+        if subscriber.topics is None:
+            self._unfiltered.add(subscriber)
+            return
+        dimension = next(d for d in TOPIC_DIMENSIONS if d in subscriber.topics)
+        for value in subscriber.topics[dimension]:
+            self._by_topic.setdefault((dimension, value), set()).add(subscriber)
+    
+    def _unindex(self, subscriber: Subscriber) -> None:
+        self._unfiltered.discard(subscriber)
+        if subscriber.topics is None:
+            return
+        dimension = next(d for d in TOPIC_DIMENSIONS if d in subscriber.topics)
+        for value in subscriber.topics[dimension]:
+            key = (dimension, value)
+            bucket = self._by_topic.get(key)
+            if bucket is not None:
+                bucket.discard(subscriber)
+                if not bucket:
+                    del self._by_topic[key]
+    
+    def _remove(self, subscriber: Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.discard(subscriber)
+            self._unindex(subscriber)
+    
+    def _interested(self, event_type: str, data: Dict[str, Any]) -> List[Subscriber]:
+        """Get the subscribers whose filter accepts an event."""
+        if not self._by_topic:
+            return list(self._unfiltered)
+        
+        interested = list(self._unfiltered)
+        topics = event_topics(event_type, data)
+        for dimension in TOPIC_DIMENSIONS:
+            value = topics.get(dimension)
+            if value is None:
+                continue
+            # Each filtered subscriber is in exactly one dimension's buckets
+            for subscriber in self._by_topic.get((dimension, value), ()):
+                if subscriber.matches(topics):
+                    interested.append(subscriber)
+        return interested
+    
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Register an in-process listener for all events.
+        
+        Args:
+            callback: Called with (event_type, data) on every publish. Must
+                not block; schedule a task for any real work.
+        """
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Remove a listener registered with add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
     async def publish(self, event_type: str, data: Dict[str, Any]) -> None:
         """
         Publish an event to all subscribers.
@@ -56,31 +514,37 @@ class EventBus:
             event_type: Type of the event (e.g., 'call_started', 'transcript_user')
             data: Event data payload
         """
-        event = {
-            "type": event_type,
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": data
-        }
+        for callback in list(self._listeners):
+            try:
+                callback(event_type, data)
+            except Exception as e:
+                logger.error(f"Error in event listener for '{event_type}': {e}")
         
         async with self._lock:
-            if not self._subscribers:
+            interested = self._interested(event_type, data)
+            self.seq += 1
+            if not interested and self.replay_size == 0:
                 logger.debug(f"No subscribers for event: {event_type}")
                 return
             
-            # Send to all subscribers
-            dead_queues = []
-            for queue in self._subscribers:
-                try:
-                    queue.put_nowait(event)
-                except asyncio.QueueFull:
-                    logger.warning("Subscriber queue full, marking for removal")
-                    dead_queues.append(queue)
+            # Encode once; every subscriber and replay gets the same frame
+            event = EncodedEvent.encode(event_type, data, self.seq)
+            if self.replay_size:
+                self._history.append(event)
+            closed = []
+            for subscriber in interested:
+                if not subscriber.put(event):
+                    closed.append(subscriber)
             
-            # Remove dead queues
-            for queue in dead_queues:
-                self._subscribers.discard(queue)
+            # Remove subscribers closed for being too slow
+            for subscriber in closed:
+                logger.warning(
+                    f"Disconnecting slow subscriber {subscriber.name or subscriber.id} "
+                    f"({subscriber.maxsize} events behind)"
+                )
+                self._remove(subscriber)
         
-        logger.debug(f"Published event '{event_type}' to {len(self._subscribers)} subscribers")
+        logger.debug(f"Published event '{event_type}' to {len(interested)} subscribers")
     
     async def publish_call_started(self, call_id: str, caller_number: str = "") -> None:
         """Publish call started event."""
@@ -111,23 +575,61 @@ class EventBus:
             "is_final": is_final
         })
     
+    async def publish_transcript_delta(
+        self,
+        call_id: str,
+        seq: int,
+        delta: str,
+        is_final: bool,
+        text: Optional[str] = None
+    ) -> None:
+        """
+        Publish a piece of the agent's transcript.
+        
+        Args:
+            call_id: Call the transcript belongs to
+            seq: Per-call sequence number, starting at 1
+            delta: Text added since the previous event
+            is_final: True when this closes the current message
+            text: Full text of the message, sent with the final event
+        """
+        data: Dict[str, Any] = {
+            "call_id": call_id,
+            "seq": seq,
+            "delta": delta,
+            "is_final": is_final
+        }
+        if text is not None:
+            data["text"] = text
+        await self.publish("transcript_agent", data)
+    
     async def publish_appointment_created(self, appointment: Dict[str, Any]) -> None:
         """Publish appointment created event."""
         await self.publish("appointment_created", {
             "appointment": appointment
         })
     
-    async def publish_appointment_updated(self, appointment: Dict[str, Any]) -> None:
-        """Publish appointment updated event."""
-        await self.publish("appointment_updated", {
-            "appointment": appointment
-        })
+    async def publish_appointment_updated(
+        self,
+        appointment: Dict[str, Any],
+        previous: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish appointment updated event, with the version it replaced if known."""
+        data: Dict[str, Any] = {"appointment": appointment}
+        if previous is not None:
+            data["previous"] = previous
+        await self.publish("appointment_updated", data)
     
-    async def publish_appointment_deleted(self, appointment_id: str) -> None:
-        """Publish appointment deleted event."""
-        await self.publish("appointment_deleted", {
-            "appointment_id": appointment_id
-        })
+    async def publish_appointment_deleted(
+        self,
+        appointment_id: str,
+        appointment: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish appointment deleted event, with the deleted appointment if known."""
+        data: Dict[str, Any] = {"appointment_id": appointment_id}
+        if appointment is not None:
+            data["appointment"] = appointment
+        await self.publish("appointment_deleted", data)
     
     async def publish_error(self, code: str, message: str) -> None:
         """Publish error event."""
@@ -141,16 +643,33 @@ class EventBus:
         """Get current number of subscribers."""
         return len(self._subscribers)
     
+    @property
+    def subscriber_stats(self) -> List[Dict[str, Any]]:
+        """Get queue depth, lag and drop counters for each subscriber."""
+        return [subscriber.stats for subscriber in sorted(self._subscribers, key=lambda s: s.id)]
+    
+    @property
+    def replay_stats(self) -> Dict[str, Any]:
+        """Get the replay buffer's range and resume counters."""
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "buffered": len(self._history),
+            "oldest_seq": self._history[0].seq if self._history else None,
+            "resumes": self.resumes,
+            "replayed": self.replayed,
+            "snapshots": self.snapshots
+        }
+    
     async def shutdown(self) -> None:
         """Clean shutdown of the event bus."""
         async with self._lock:
-            for queue in self._subscribers:
-                # Send shutdown signal
-                try:
-                    queue.put_nowait({"type": "shutdown"})
-                except asyncio.QueueFull:
-                    pass
+            for subscriber in self._subscribers:
+                # Senders see a 'shutdown' event and stop
+                subscriber.close()
             self._subscribers.clear()
+            self._unfiltered.clear()
+            self._by_topic.clear()
         logger.info("Event bus shut down")
 
 
@@ -5,7 +5,9 @@ Handles WebSocket connection and communication with OpenAI's Realtime API.
 
 import json
 import asyncio
-from typing import Optional, Callable, Awaitable, Dict, Any
+import weakref
+from collections import deque
+from typing import Deque, Optional, Callable, Awaitable, Dict, Any, Set
 import websockets
 from websockets.client import WebSocketClientProtocol
 
@@ -14,14 +16,78 @@ from app.utils.logging import get_logger, CallLogger
 
 logger = get_logger(__name__)
 
-# OpenAI Realtime API WebSocket URL
-OPENAI_REALTIME_URL = "wss://api.openai.com/v1/realtime"
+# input_audio_buffer.append is built by splicing the base64 payload into
+# this template; base64 never needs JSON escaping
+_AUDIO_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_AUDIO_APPEND_SUFFIX = '"}'
+
+# Services with an open connection, for aggregate metrics
+_active_services: "weakref.WeakSet[OpenAIRealtimeService]" = weakref.WeakSet()
+
+
+class SendQueue:
+    """
+    Outbound message queue with two priorities.
+    
+    Control messages (session updates, function results, cancels) are
+    never dropped and always go out before queued audio. Audio is
+    bounded; when the socket can't keep up the oldest audio is dropped,
+    since stale audio is worth less than fresh audio.
+    """
+    
+    def __init__(self, audio_max: int):
+        self._control: Deque[str] = deque()
+        self._audio: Deque[str] = deque()
+        self._audio_max = max(1, audio_max)
+        self._ready = asyncio.Event()
+        
+        self.sent = 0
+        self.audio_dropped = 0
+        self.max_audio_depth = 0
+    
+    def put_control(self, text: str) -> None:
+        """Queue a control message ahead of all audio."""
+        self._control.append(text)
+        self._ready.set()
+    
+    def put_audio(self, text: str) -> None:
+        """Queue an audio message, dropping the oldest audio if full."""
+        if len(self._audio) >= self._audio_max:
+            self._audio.popleft()
+            self.audio_dropped += 1
+        self._audio.append(text)
+        self.max_audio_depth = max(self.max_audio_depth, len(self._audio))
+        self._ready.set()
+    
+    async def get(self) -> str:
+        """Wait for the next message, control first."""
+        while not self._control and not self._audio:
+            self._ready.clear()
+            await self._ready.wait()
+        self.sent += 1
+        if self._control:
+            return self._control.popleft()
+        return self._audio.popleft()
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get queue depth and throughput counters."""
+        return {
+            "control_depth": len(self._control),
+            "audio_depth": len(self._audio),
+            "max_audio_depth": self.max_audio_depth,
+            "audio_dropped": self.audio_dropped,
+            "sent": self.sent
+        }
 
 
 class OpenAIRealtimeService:
     """
     Service for managing OpenAI Realtime API connections.
     Each instance handles one call session.
+    
+    All outbound messages go through a SendQueue drained by a single
+    writer task, so callers never wait on the socket.
     """
     
     def __init__(self, call_id: str):
@@ -29,9 +95,24 @@ class OpenAIRealtimeService:
         self.log = CallLogger(call_id)
         self.ws: Optional[WebSocketClientProtocol] = None
         self._connected = False
+        self._send_queue = SendQueue(settings.openai_audio_queue_max)
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # Function calls run in the background so audio keeps flowing
+        self._tool_semaphore = asyncio.Semaphore(max(1, settings.openai_tool_concurrency))
+        self._tool_tasks: Set[asyncio.Task] = set()
+        
+        # Response in flight, and the last one cancelled by a barge-in
+        self._response_id: Optional[str] = None
+        self._cancelled_response_id: Optional[str] = None
+        
+        # Last session.update sent, so an unchanged config isn't resent
+        self._session_config: Optional[Dict[str, Any]] = None
+        # Greeting a pooled session's instructions were built with
+        self.greeting: Optional[str] = None
         
         # Callbacks
-        self.on_audio: Optional[Callable[[bytes], Awaitable[None]]] = None
+        self.on_audio: Optional[Callable[[str, Optional[str]], Awaitable[None]]] = None
         self.on_transcript_user: Optional[Callable[[str, bool], Awaitable[None]]] = None
         self.on_transcript_agent: Optional[Callable[[str], Awaitable[None]]] = None
         self.on_function_call: Optional[Callable[[str, Dict], Awaitable[str]]] = None
@@ -50,19 +131,21 @@ class OpenAIRealtimeService:
             True if connected successfully.
         """
         try:
-            url = f"{OPENAI_REALTIME_URL}?model={settings.openai_model}"
+            url = f"{settings.openai_realtime_url}?model={settings.openai_model}"
             
             self.log.info(f"Connecting to OpenAI Realtime API...")
             
             self.ws = await websockets.connect(
                 url,
-                additional_headers={
+                extra_headers={
                     "Authorization": f"Bearer {settings.openai_api_key}",
                     "OpenAI-Beta": "realtime=v1"
                 }
             )
             
             self._connected = True
+            self._writer_task = asyncio.create_task(self._write_loop())
+            _active_services.add(self)
             self.log.info("Connected to OpenAI Realtime API")
             
             # Configure session
@@ -98,13 +181,65 @@ class OpenAIRealtimeService:
             }
         }
         
+        self._session_config = session_config
         await self._send(session_config)
         self.log.info("Session configuration sent")
     
+    async def update_session(self, system_prompt: str, tools: list) -> None:
+        """
+        Reconfigure an already connected session, e.g. one taken from the
+        pool. Nothing is sent if the configuration is unchanged.
+        
+        Args:
+            system_prompt: System instructions for the AI
+            tools: List of tool definitions
+        """
+        current = self._session_config["session"] if self._session_config else {}
+        if current.get("instructions") == system_prompt and current.get("tools") == tools:
+            return
+        await self._send_session_update(system_prompt, tools)
+    
+    def assign_call(self, call_id: str) -> None:
+        """Attach a pre-connected session to the call that is using it."""
+        self.call_id = call_id
+        self.log = CallLogger(call_id)
+    
     async def _send(self, message: Dict[str, Any]) -> None:
-        """Send a message to OpenAI."""
+        """Queue a control message for OpenAI, ahead of any queued audio."""
         if self.ws and self._connected:
-            await self.ws.send(json.dumps(message))
+            self._send_queue.put_control(json.dumps(message))
+    
+    async def _write_loop(self) -> None:
+        """Single writer: drain the send queue into the WebSocket."""
+        try:
+            while self._connected:
+                text = await self._send_queue.get()
+                await self.ws.send(text)
+        except asyncio.CancelledError:
+            raise
+        except websockets.exceptions.ConnectionClosed:
+            self._connected = False
+        except Exception as e:
+            self.log.error(f"Error sending to OpenAI: {e}")
+            self._connected = False
+    
+    @property
+    def send_queue_stats(self) -> Dict[str, int]:
+        """Get this session's send queue counters."""
+        return self._send_queue.stats
+    
+    @staticmethod
+    def aggregate_send_queue_stats() -> Dict[str, int]:
+        """Get send queue counters summed over all connected sessions."""
+        totals = {"sessions": 0}
+        for service in list(_active_services):
+            totals["sessions"] += 1
+            for key, value in service.send_queue_stats.items():
+                if key == "max_audio_depth":
+                    totals[key] = max(totals.get(key, 0), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
     
     async def send_audio(self, audio_base64: str) -> None:
         """
@@ -115,12 +250,8 @@ class OpenAIRealtimeService:
         """
         if not self._connected:
             return
-            
-        message = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_base64
-        }
-        await self._send(message)
+        
+        self._send_queue.put_audio(_AUDIO_APPEND_PREFIX + audio_base64 + _AUDIO_APPEND_SUFFIX)
     
     async def send_function_result(
         self, 
@@ -150,10 +281,55 @@ class OpenAIRealtimeService:
         
         self.log.info(f"Sent function result for call_id: {call_id}")
     
+    async def send_system_message(self, text: str) -> None:
+        """
+        Add a system message to the conversation without requesting a response.
+        Used to tell the model about changes after the session started.
+        
+        Args:
+            text: Message text
+        """
+        message = {
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "system",
+                "content": [{"type": "input_text", "text": text}]
+            }
+        }
+        await self._send(message)
+    
     async def cancel_response(self) -> None:
         """Cancel the current response (for interruptions)."""
         await self._send({"type": "response.cancel"})
     
+    async def truncate_item(self, item_id: str, audio_end_ms: int) -> None:
+        """
+        Cut an assistant audio item to what the caller actually heard,
+        so the model doesn't think it said the rest.
+        
+        Args:
+            item_id: Assistant message item to truncate
+            audio_end_ms: Milliseconds of the item's audio that were played
+        """
+        await self._send({
+            "type": "conversation.item.truncate",
+            "item_id": item_id,
+            "content_index": 0,
+            "audio_end_ms": audio_end_ms
+        })
+    
+    async def _interrupt(self) -> None:
+        """Stop the response in flight when the caller starts speaking."""
+        if self._response_id:
+            # Audio deltas already on the wire for it are dropped on arrival
+            self._cancelled_response_id = self._response_id
+            self._response_id = None
+            await self.cancel_response()
+        
+        if self.on_interruption:
+            await self.on_interruption()
+    
     async def handle_messages(self) -> None:
         """
         Main loop for handling incoming messages from OpenAI.
@@ -193,8 +369,13 @@ class OpenAIRealtimeService:
         # Audio output
         elif event_type == "response.audio.delta":
             audio_base64 = message.get("delta", "")
+            if (
+                self._cancelled_response_id is not None
+                and message.get("response_id") == self._cancelled_response_id
+            ):
+                return
             if audio_base64 and self.on_audio:
-                await self.on_audio(audio_base64)
+                await self.on_audio(audio_base64, message.get("item_id"))
                 
         # User transcription
         elif event_type == "conversation.item.input_audio_transcription.completed":
@@ -219,15 +400,19 @@ class OpenAIRealtimeService:
         # Interruption
         elif event_type == "input_audio_buffer.speech_started":
             self.log.debug("User started speaking (potential interruption)")
+            await self._interrupt()
             
         elif event_type == "input_audio_buffer.speech_stopped":
             self.log.debug("User stopped speaking")
             
         # Response lifecycle
         elif event_type == "response.created":
+            self._response_id = message.get("response", {}).get("id")
             self.log.debug("Response started")
             
         elif event_type == "response.done":
+            if message.get("response", {}).get("id") == self._response_id:
+                self._response_id = None
             self.log.debug("Response completed")
             
         # Errors
@@ -244,7 +429,17 @@ class OpenAIRealtimeService:
                 self.log.debug(f"Rate limits updated: {message.get('rate_limits', [])}")
     
     async def _handle_function_call(self, message: Dict[str, Any]) -> None:
-        """Handle a function call from OpenAI."""
+        """
+        Start a function call in the background.
+        The receive loop must not wait for it, or audio deltas would
+        stall for as long as the function takes.
+        """
+        task = asyncio.create_task(self._run_function_call(message))
+        self._tool_tasks.add(task)
+        task.add_done_callback(self._tool_tasks.discard)
+    
+    async def _run_function_call(self, message: Dict[str, Any]) -> None:
+        """Run a function call and send its result, within the concurrency and time limits."""
         function_name = message.get("name", "")
         call_id = message.get("call_id", "")
         
@@ -255,25 +450,56 @@ class OpenAIRealtimeService:
         
         self.log.info(f"Function call: {function_name} with args: {arguments}")
         
-        if self.on_function_call:
+        if not self.on_function_call:
+            return
+        
+        async with self._tool_semaphore:
+            # Shielded so a timeout doesn't abandon e.g. a half-done booking
+            work = asyncio.ensure_future(self.on_function_call(function_name, arguments))
             try:
-                result = await self.on_function_call(function_name, arguments)
-                await self.send_function_result(call_id, result)
+                result = await asyncio.wait_for(
+                    asyncio.shield(work), timeout=settings.openai_tool_timeout_s
+                )
+            except asyncio.TimeoutError:
+                self.log.error(
+                    f"Function {function_name} timed out after {settings.openai_tool_timeout_s}s"
+                )
+                result = json.dumps({
+                    "success": False,
+                    "error": "Operațiunea durează prea mult; rezultatul nu este cunoscut încă."
+                })
             except Exception as e:
-                error_result = json.dumps({
+                result = json.dumps({
                     "success": False,
                     "error": str(e)
                 })
-                await self.send_function_result(call_id, error_result)
+        
+        await self.send_function_result(call_id, result)
     
     async def disconnect(self) -> None:
         """Disconnect from OpenAI."""
         self._connected = False
+        _active_services.discard(self)
+        for task in list(self._tool_tasks):
+            # Only the wrapper is cancelled; the shielded work still finishes
+            task.cancel()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
         if self.ws:
             await self.ws.close()
-            self.log.info("Disconnected from OpenAI")
+            self.log.info(f"Disconnected from OpenAI (send queue: {self.send_queue_stats})")
     
     @property
     def is_connected(self) -> bool:
         """Check if connected to OpenAI."""
         return self._connected
+    
+    @property
+    def is_open(self) -> bool:
+        """Check the socket itself is still open, even if nothing reads it."""
+        return self._connected and self.ws is not None and self.ws.close_code is None
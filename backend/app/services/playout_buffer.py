@@ -0,0 +1,196 @@
+"""
+Outbound audio playout toward Twilio.
+OpenAI streams agent audio faster than real time. Instead of handing all of
+it to Twilio at once, the buffer re-chunks it into 20 ms μ-law frames and
+sends them at the rate they are played, keeping only a small lead in
+Twilio's buffer. That keeps memory low and lets us know exactly how much
+the caller has heard when it has to be cut off.
+"""
+
+import asyncio
+import binascii
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.utils.logging import get_logger
+from app.services.audio_batcher import BYTES_PER_MS, FRAME_MS
+
+logger = get_logger(__name__)
+
+FRAME_BYTES = FRAME_MS * BYTES_PER_MS
+
+
+class PlayoutBuffer:
+    """
+    Paces agent audio to Twilio in real time.
+    
+    Positions are counted in bytes of the whole outbound stream (one byte
+    per sample at 8 kHz). Audio counts as played once its playout time has
+    passed on the local clock; audio still inside the `lead_ms` window has
+    been sent but not heard yet.
+    """
+    
+    def __init__(self, send: Callable[[str], Awaitable[None]], lead_ms: int):
+        self._send = send
+        self._lead = lead_ms / 1000
+        self._pending = bytearray()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Set once sending fails or the buffer is closed; later audio is dropped
+        self.closed = False
+        
+        # Stream positions in bytes
+        self._pushed = 0
+        self._sent = 0
+        # Loop time at which everything sent so far finishes playing
+        self._play_end = 0.0
+        # (start position, item_id) of items that may still be playing
+        self._items: Deque[Tuple[int, Optional[str]]] = deque()
+        
+        self.frames_out = 0
+        self.flushes = 0
+        self.max_buffered_ms = 0
+    
+    def start(self) -> None:
+        """Start the pacing task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def push(self, payload: str, item_id: Optional[str] = None) -> None:
+        """
+        Queue a base64 μ-law chunk for playout.
+        
+        Args:
+            payload: Base64 audio from a response.audio.delta
+            item_id: Conversation item the audio belongs to
+        """
+        if self.closed:
+            return
+        if not self._items or self._items[-1][1] != item_id:
+            self._items.append((self._pushed, item_id))
+        
+        audio = binascii.a2b_base64(payload)
+        self._pending += audio
+        self._pushed += len(audio)
+        self.max_buffered_ms = max(self.max_buffered_ms, len(self._pending) // BYTES_PER_MS)
+        self._wakeup.set()
+    
+    @property
+    def buffered_ms(self) -> int:
+        """Audio queued here and not yet sent to Twilio."""
+        return len(self._pending) // BYTES_PER_MS
+    
+    def _played(self) -> int:
+        """Stream position the caller has heard up to."""
+        ahead = max(0.0, self._play_end - asyncio.get_running_loop().time())
+        return max(0, self._sent - int(ahead * 1000) * BYTES_PER_MS)
+    
+    def playing_item(self) -> Tuple[Optional[str], int]:
+        """
+        Get the item being heard now and how far into it the caller is.
+        
+        Returns:
+            (item_id, played_ms); item_id is None if nothing was played.
+        """
+        played = self._played()
+        while len(self._items) > 1 and self._items[1][0] <= played:
+            self._items.popleft()
+        if not self._items:
+            return None, 0
+        start, item_id = self._items[0]
+        return item_id, max(0, played - start) // BYTES_PER_MS
+    
+    def flush(self) -> Optional[Tuple[Optional[str], int]]:
+        """
+        Drop all audio that hasn't been played yet.
+        
+        Audio already sent to Twilio is forgotten too, so the caller must
+        also clear Twilio's buffer.
+        
+        Returns:
+            (item_id, played_ms) of the item that was cut off, or None
+            if everything had already been played.
+        """
+        item_id, played_ms = self.playing_item()
+        played = self._played()
+        if played >= self._pushed:
+            return None
+        
+        self._pending.clear()
+        self._sent = self._pushed = played
+        self._play_end = asyncio.get_running_loop().time()
+        self._items.clear()
+        self.flushes += 1
+        # Wake the pacing task so it stops waiting on dropped audio
+        self._wakeup.set()
+        return item_id, played_ms
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            now = loop.time()
+            delay = self._play_end - self._lead - now
+            if delay > 0:
+                # Twilio already has enough; wait for room or for new audio
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            if len(self._pending) < FRAME_BYTES and self._play_end > now:
+                # Partial frame: give the rest of it time to arrive while
+                # Twilio still has audio, then send it as-is
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._play_end - now)
+                except asyncio.TimeoutError:
+                    pass
+                if len(self._pending) < FRAME_BYTES and self._play_end > loop.time():
+                    continue
+            
+            frame = bytes(self._pending[:FRAME_BYTES])
+            del self._pending[:FRAME_BYTES]
+            
+            now = loop.time()
+            if self._play_end < now:
+                self._play_end = now
+            self._play_end += len(frame) / (BYTES_PER_MS * 1000)
+            self._sent += len(frame)
+            self.frames_out += 1
+            
+            try:
+                await self._send(binascii.b2a_base64(frame, newline=False).decode("ascii"))
+            except Exception as e:
+                # The Twilio socket is gone; the rest of the audio can't be sent either
+                logger.error(f"Error sending audio to Twilio, stopping playout: {e}")
+                self.closed = True
+                self._pending.clear()
+                return
+    
+    async def close(self) -> None:
+        """Stop pacing and drop anything left."""
+        self.closed = True
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get playout counters."""
+        return {
+            "frames_out": self.frames_out,
+            "flushes": self.flushes,
+            "max_buffered_ms": self.max_buffered_ms
+        }
@@ -0,0 +1,247 @@
+"""
+Pool of pre-connected OpenAI Realtime sessions.
+Connecting to OpenAI (TLS and WebSocket handshake) and configuring the
+session would otherwise happen after Twilio opens the media stream, right
+in the caller's wait for the first word. The pool keeps a few sessions
+connected and configured ahead of time so a new call just takes one.
+"""
+
+import asyncio
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.utils.logging import get_logger
+from app.utils.prompt_builder import get_tool_definitions
+from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.availability import availability_view
+
+logger = get_logger(__name__)
+
+# Twilio opens the media stream a moment after the webhook answers; a
+# reservation not claimed by then goes back to the pool
+RESERVATION_TTL_S = 30
+MAINTAIN_INTERVAL_S = 5
+RETRY_MIN_S = 1
+RETRY_MAX_S = 60
+
+
+class RealtimeSessionPool:
+    """
+    Keeps `size` idle realtime sessions connected and configured.
+    
+    - Idle sessions older than `max_idle_s`, or whose socket was closed,
+      are dropped and replaced.
+    - `reserve` sets a session aside for a call that is about to connect
+      (from the /incoming-call webhook) and returns a token for it.
+    - `take` hands the reserved session to the call, or any idle one if
+      there is no reservation. Every checkout starts a refill.
+    - Failed connects back off exponentially, so a bad key or an outage
+      doesn't turn into a reconnect loop.
+    """
+    
+    def __init__(self, size: int, max_idle_s: float):
+        self.size = max(0, size)
+        self.max_idle_s = max_idle_s
+        
+        # (connected at, session), oldest first
+        self._idle: Deque[Tuple[float, OpenAIRealtimeService]] = deque()
+        # token -> (reserved at, connected at, session)
+        self._reserved: Dict[str, Tuple[float, float, OpenAIRealtimeService]] = {}
+        self._connecting = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._maintain_task: Optional[asyncio.Task] = None
+        
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_MIN_S
+        
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    async def startup(self) -> None:
+        """Fill the pool and start keeping it topped up."""
+        if self.size == 0 or not settings.openai_api_key:
+            logger.info("Realtime session pool disabled")
+            return
+        self._refill()
+        if self._maintain_task is None:
+            self._maintain_task = asyncio.create_task(self._maintain_loop())
+    
+    async def shutdown(self) -> None:
+        """Stop refilling and close every pooled session."""
+        if self._maintain_task is not None:
+            self._maintain_task.cancel()
+            try:
+                await self._maintain_task
+            except asyncio.CancelledError:
+                pass
+            self._maintain_task = None
+        
+        for task in list(self._tasks):
+            task.cancel()
+        
+        sessions = [service for _, service in self._idle]
+        sessions += [service for _, _, service in self._reserved.values()]
+        self._idle.clear()
+        self._reserved.clear()
+        for service in sessions:
+            await service.disconnect()
+    
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def _refill(self) -> None:
+        """Start connecting as many sessions as the pool is short."""
+        if self.size == 0 or not settings.openai_api_key:
+            return
+        if asyncio.get_running_loop().time() < self._retry_at:
+            return
+        
+        # Reserved sessions are already spoken for, so they don't count
+        missing = self.size - len(self._idle) - self._connecting
+        for _ in range(missing):
+            self._connecting += 1
+            self._spawn(self._connect_one())
+    
+    async def _connect_one(self) -> None:
+        loop = asyncio.get_running_loop()
+        service = OpenAIRealtimeService("pool")
+        try:
+            # The call that takes this session keeps its greeting, so the
+            # instructions only change if the availability did
+            service.greeting = await availability_view.pick_greeting()
+            system_prompt = await availability_view.get_system_prompt(service.greeting)
+            connected = await service.connect(system_prompt, get_tool_definitions())
+        except Exception as e:
+            logger.error(f"Error pre-connecting realtime session: {e}")
+            connected = False
+        finally:
+            self._connecting -= 1
+        
+        if not connected:
+            await service.disconnect()
+            self._retry_at = loop.time() + self._retry_delay
+            logger.warning(f"Realtime session pool: connect failed, retrying in {self._retry_delay}s")
+            self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_S)
+            return
+        
+        self._retry_delay = RETRY_MIN_S
+        self._idle.append((loop.time(), service))
+    
+    def _discard(self, service: OpenAIRealtimeService) -> None:
+        self.expired += 1
+        self._spawn(service.disconnect())
+    
+    def _is_fresh(self, connected_at: float, service: OpenAIRealtimeService) -> bool:
+        age = asyncio.get_running_loop().time() - connected_at
+        return service.is_open and age < self.max_idle_s
+    
+    def _pop_idle(self) -> Optional[Tuple[float, OpenAIRealtimeService]]:
+        """Take the oldest idle session that is still usable."""
+        while self._idle:
+            connected_at, service = self._idle.popleft()
+            if self._is_fresh(connected_at, service):
+                return connected_at, service
+            self._discard(service)
+        return None
+    
+    def reserve(self) -> Optional[str]:
+        """
+        Set an idle session aside for a call that is about to connect.
+        
+        Returns:
+            Token to pass to `take`, or None if no session is ready.
+        """
+        entry = self._pop_idle()
+        if entry is None:
+            self._refill()
+            return None
+        
+        token = uuid.uuid4().hex
+        self._reserved[token] = (asyncio.get_running_loop().time(), *entry)
+        self._refill()
+        return token
+    
+    def take(self, token: Optional[str], call_id: str) -> Optional[OpenAIRealtimeService]:
+        """
+        Check a session out of the pool for a call.
+        
+        Args:
+            token: Reservation token from `reserve`, if the call has one
+            call_id: Call that will use the session
+        
+        Returns:
+            A connected, configured session, or None if none is ready and
+            the caller must connect its own.
+        """
+        service = None
+        reservation = self._reserved.pop(token, None) if token else None
+        if reservation is not None:
+            _, connected_at, reserved = reservation
+            if self._is_fresh(connected_at, reserved):
+                service = reserved
+            else:
+                self._discard(reserved)
+        
+        if service is None:
+            entry = self._pop_idle()
+            if entry is not None:
+                service = entry[1]
+        
+        self._refill()
+        if service is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        service.assign_call(call_id)
+        return service
+    
+    async def _maintain_loop(self) -> None:
+        """Replace stale sessions, release unclaimed reservations, top up."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(MAINTAIN_INTERVAL_S)
+            try:
+                now = loop.time()
+                for token, (reserved_at, connected_at, service) in list(self._reserved.items()):
+                    if now - reserved_at >= RESERVATION_TTL_S:
+                        del self._reserved[token]
+                        if len(self._idle) < self.size:
+                            self._idle.append((connected_at, service))
+                        else:
+                            # Its replacement already connected
+                            self._discard(service)
+                
+                idle = sorted(self._idle, key=lambda entry: entry[0])
+                self._idle.clear()
+                for connected_at, service in idle:
+                    if self._is_fresh(connected_at, service):
+                        self._idle.append((connected_at, service))
+                    else:
+                        self._discard(service)
+                
+                self._refill()
+            except Exception as e:
+                logger.error(f"Error maintaining realtime session pool: {e}")
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get pool occupancy and checkout counters."""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "reserved": len(self._reserved),
+            "connecting": self._connecting,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired
+        }
+
+
+# Global pool instance
+session_pool = RealtimeSessionPool(settings.openai_pool_size, settings.openai_pool_max_idle_s)
@@ -0,0 +1,108 @@
+"""
+Agent transcript streaming to the dashboard.
+OpenAI sends the agent's transcript a few characters at a time. Instead of
+republishing the whole text so far, the stream publishes only what is new,
+merged over a short window, with a sequence number per call so the
+dashboard can rebuild the text and spot gaps.
+"""
+
+import asyncio
+from typing import List, Optional
+
+from app.utils.logging import get_logger
+from app.services.event_bus import event_bus
+
+logger = get_logger(__name__)
+
+SENTENCE_END = (".", "!", "?")
+
+
+class TranscriptStream:
+    """
+    Publishes one call's agent transcript as transcript_agent deltas.
+    
+    Deltas arriving within `window_ms` of each other go out as one event.
+    A sentence ending flushes right away and closes the dashboard message;
+    that final event also carries the full sentence, so a dashboard that
+    missed a delta still ends up with the right text.
+    """
+    
+    def __init__(self, call_id: str, window_ms: float):
+        self.call_id = call_id
+        self.window_ms = window_ms
+        self.seq = 0
+        
+        # Deltas not yet published, and all deltas of the current sentence
+        self._pending: List[str] = []
+        self._sentence: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        self.deltas_in = 0
+        self.events_out = 0
+    
+    async def add(self, delta: str) -> None:
+        """
+        Add a transcript delta from OpenAI.
+        
+        Args:
+            delta: New transcript text
+        """
+        self.deltas_in += 1
+        self._pending.append(delta)
+        self._sentence.append(delta)
+        
+        if delta.endswith(SENTENCE_END):
+            await self.flush(final=True)
+        elif self.window_ms <= 0:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.window_ms / 1000, self._on_timer
+            )
+    
+    def _on_timer(self) -> None:
+        self._timer = None
+        if self._pending and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._timed_flush())
+    
+    async def _timed_flush(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            self._flush_task = None
+    
+    async def flush(self, final: bool = False) -> None:
+        """
+        Publish pending text now.
+        
+        Args:
+            final: Also close the current sentence (e.g. when the agent is
+                interrupted mid-sentence)
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending and not (final and self._sentence):
+            return
+        
+        delta = "".join(self._pending)
+        self._pending.clear()
+        text = None
+        if final:
+            text = "".join(self._sentence)
+            self._sentence.clear()
+        
+        self.seq += 1
+        self.events_out += 1
+        try:
+            await event_bus.publish_transcript_delta(self.call_id, self.seq, delta, final, text)
+        except Exception as e:
+            logger.error(f"Error publishing transcript delta: {e}")
+    
+    async def close(self) -> None:
+        """Publish whatever is left and close the sentence."""
+        await self.flush(final=True)
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
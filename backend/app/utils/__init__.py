@@ -1,14 +1,24 @@
 # Utils module
 from app.utils.logging import setup_logging, get_logger, CallLogger
+from app.utils.io_pool import io_pool, IOPool
 from app.utils.json_store import json_store, JsonStore
-from app.utils.prompt_builder import build_system_prompt, get_appointment_tool_definition
+from app.utils.prompt_builder import (
+    build_system_prompt,
+    get_appointment_tool_definition,
+    get_availability_tool_definitions,
+    get_tool_definitions
+)
 
 __all__ = [
     "setup_logging",
     "get_logger", 
     "CallLogger",
+    "io_pool",
+    "IOPool",
     "json_store",
     "JsonStore",
     "build_system_prompt",
-    "get_appointment_tool_definition"
+    "get_appointment_tool_definition",
+    "get_availability_tool_definitions",
+    "get_tool_definitions"
 ]
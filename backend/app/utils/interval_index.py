@@ -0,0 +1,103 @@
+"""
+Sorted interval index for overlap checks.
+Holds half-open [start, end) intervals (e.g. minutes since midnight)
+sorted by start, so overlap and gap queries start from a bisect.
+"""
+
+from bisect import bisect_left
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+class IntervalIndex:
+    """
+    Half-open intervals sorted by start, each tagged with a key.
+    
+    Because intervals are sorted by start only, a query also has to look
+    back past intervals that start earlier but are long enough to reach
+    into the queried range. The longest interval ever added bounds that
+    look-back, which keeps `overlaps` at O(log n) plus the handful of
+    intervals starting within that distance.
+    """
+    
+    def __init__(self):
+        self._intervals: List[Tuple[int, int, Any]] = []
+        self._starts: List[int] = []
+        self._max_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._intervals)
+    
+    def __iter__(self) -> Iterator[Tuple[int, int, Any]]:
+        return iter(self._intervals)
+    
+    def add(self, start: int, end: int, key: Any) -> None:
+        """Add an interval [start, end) tagged with a key."""
+        position = bisect_left(self._starts, start)
+        self._starts.insert(position, start)
+        self._intervals.insert(position, (start, end, key))
+        self._max_length = max(self._max_length, end - start)
+    
+    def remove(self, start: int, key: Any) -> bool:
+        """
+        Remove the interval with the given start and key.
+        
+        Returns:
+            True if removed, False if not found.
+        """
+        position = bisect_left(self._starts, start)
+        while position < len(self._starts) and self._starts[position] == start:
+            if self._intervals[position][2] == key:
+                del self._starts[position]
+                del self._intervals[position]
+                return True
+            position += 1
+        return False
+    
+    def _first_candidate(self, start: int) -> int:
+        """Index of the first interval that could still be running at `start`."""
+        return bisect_left(self._starts, start - self._max_length + 1)
+    
+    def overlaps(self, start: int, end: int) -> bool:
+        """Check whether [start, end) overlaps any interval."""
+        stop = bisect_left(self._starts, end)
+        for position in range(self._first_candidate(start), stop):
+            if self._intervals[position][1] > start:
+                return True
+        return False
+    
+    def earliest_gap(
+        self,
+        length: int,
+        not_before: int,
+        not_after: int,
+        step: int = 1,
+        origin: int = 0
+    ) -> Optional[int]:
+        """
+        Find the earliest start of a free [start, start + length) range.
+        
+        Args:
+            length: Length of the range needed
+            not_before: Earliest allowed start
+            not_after: Latest allowed end
+            step: Starts must lie on a grid of this step...
+            origin: ...counted from this origin
+        
+        Returns:
+            The start of the earliest free range, or None if there is none.
+        """
+        step = max(1, step)
+        cursor = self._align(not_before, step, origin)
+        for position in range(self._first_candidate(cursor), len(self._intervals)):
+            start, end, _ = self._intervals[position]
+            if start >= cursor + length:
+                break
+            if end > cursor:
+                cursor = self._align(end, step, origin)
+        
+        return cursor if cursor + length <= not_after else None
+    
+    @staticmethod
+    def _align(value: int, step: int, origin: int) -> int:
+        """Round a value up onto the step grid."""
+        return origin + -(-(value - origin) // step) * step
@@ -0,0 +1,103 @@
+"""
+Bounded executors for blocking storage work.
+Keeps file I/O and JSON (de)serialization off the event loop so that
+audio relaying for live calls is never stalled by a large read or write.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class IOPool:
+    """
+    Lazily created executors for storage work.
+    
+    File I/O always runs on a bounded thread pool. JSON encoding and
+    decoding runs on the same thread pool in "thread" mode, or on a
+    bounded process pool in "process" mode (useful when large payloads
+    would otherwise hold the GIL for noticeable periods).
+    """
+    
+    ENCODE_MODES = ("thread", "process")
+    
+    def __init__(self, max_workers: int = 4, encode_mode: str = "thread"):
+        if encode_mode not in self.ENCODE_MODES:
+            logger.warning(f"Unknown encode mode '{encode_mode}', falling back to 'thread'")
+            encode_mode = "thread"
+        
+        self.max_workers = max(1, max_workers)
+        self.encode_mode = encode_mode
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._encode_executor: Optional[ProcessPoolExecutor] = None
+    
+    @property
+    def uses_process_encoding(self) -> bool:
+        """Whether JSON (de)serialization runs in a separate process."""
+        return self.encode_mode == "process"
+    
+    def _get_io_executor(self) -> ThreadPoolExecutor:
+        """Get or create the thread pool used for file I/O."""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="store-io"
+            )
+        return self._io_executor
+    
+    def _get_encode_executor(self) -> Executor:
+        """Get or create the executor used for JSON (de)serialization."""
+        if not self.uses_process_encoding:
+            return self._get_io_executor()
+        if self._encode_executor is None:
+            self._encode_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._encode_executor
+    
+    async def _run(self, executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return await loop.run_in_executor(executor, func, *args)
+    
+    async def run_io(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking I/O function on the I/O thread pool.
+        
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for the callable
+        
+        Returns:
+            The callable's return value.
+        """
+        return await self._run(self._get_io_executor(), func, *args, **kwargs)
+    
+    async def run_encode(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a CPU-bound (de)serialization function on the encode executor.
+        In process mode, the callable and its arguments must be picklable.
+        """
+        return await self._run(self._get_encode_executor(), func, *args, **kwargs)
+    
+    def shutdown(self) -> None:
+        """Shut down all executors, waiting for pending work to finish."""
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=True)
+            self._io_executor = None
+        if self._encode_executor is not None:
+            self._encode_executor.shutdown(wait=True)
+            self._encode_executor = None
+        logger.info("Storage I/O pool shut down")
+
+
+# Global I/O pool instance
+io_pool = IOPool(
+    max_workers=settings.store_io_workers,
+    encode_mode=settings.store_encode_mode
+)
@@ -0,0 +1,361 @@
+"""
+Append-only journal storage for JSON array files.
+Each change is written as one NDJSON record instead of rewriting the
+whole file, and state is rebuilt in memory from snapshot + journal.
+"""
+
+import json
+import os
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, List, Optional, Sequence
+
+from app.config import settings
+from app.utils.logging import get_logger
+from app.utils.io_pool import io_pool
+from app.utils.json_store import JsonStore, DateTimeEncoder
+
+logger = get_logger(__name__)
+
+
+def _open_append(path: str) -> IO[str]:
+    """Open a journal file for appending (runs on the I/O pool)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, 'a', encoding='utf-8')
+
+
+def _append_line(handle: IO[str], line: str) -> int:
+    """Append one record durably and return the new file size."""
+    handle.write(line)
+    handle.flush()
+    os.fsync(handle.fileno())
+    return handle.tell()
+
+
+def _read_records(path: str) -> List[Dict[str, Any]]:
+    """Read all complete records from a journal file."""
+    if not os.path.exists(path):
+        return []
+    
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line is expected after a crash mid-append
+                logger.warning(f"Skipping unreadable journal record {path}:{line_number}")
+    return records
+
+
+def _rotate(path: str, old_path: str) -> None:
+    """Move a journal aside, appending to a leftover rotated journal if any."""
+    if not os.path.exists(path):
+        return
+    if os.path.exists(old_path):
+        # A previous compaction never finished; keep its records too
+        with open(path, 'r', encoding='utf-8') as src, open(old_path, 'a', encoding='utf-8') as dst:
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(path)
+    else:
+        os.replace(path, old_path)
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JournalStore:
+    """
+    Journal-backed storage for JSON array files.
+    
+    The regular JSON file (e.g. 'appointments.json') is used as the
+    snapshot and is read/written through a JsonStore. Every create,
+    update or delete is appended as one NDJSON record to
+    '<name>.journal.ndjson' next to it and applied to an in-memory copy
+    of the list, so writes are O(1). Once the journal grows past the
+    compaction threshold, the in-memory state is written out as a new
+    snapshot in the background and the journal starts over.
+    
+    Exposes the same list contract as JsonStore. Objects returned by
+    `read` are shared and must be treated as read-only.
+    """
+    
+    def __init__(self, snapshot_store: JsonStore, compact_threshold_bytes: int = 1_000_000):
+        self._snapshot_store = snapshot_store
+        self.compact_threshold_bytes = compact_threshold_bytes
+        
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # filename -> {item id: item}, in insertion order
+        self._states: Dict[str, Dict[str, Dict]] = {}
+        # filename -> cached list view of the state
+        self._views: Dict[str, List[Dict]] = {}
+        self._handles: Dict[str, IO[str]] = {}
+        self._journal_sizes: Dict[str, int] = {}
+        self._compactions: Dict[str, asyncio.Task] = {}
+    
+    def _get_lock(self, filename: str) -> asyncio.Lock:
+        """Get or create a lock for the given file."""
+        if filename not in self._locks:
+            self._locks[filename] = asyncio.Lock()
+        return self._locks[filename]
+    
+    def _journal_path(self, filename: str) -> str:
+        """Get full path of the journal for a data file."""
+        base, _ = os.path.splitext(filename)
+        return os.path.join(settings.data_dir, f"{base}.journal.ndjson")
+    
+    @staticmethod
+    def _apply(state: Dict[str, Dict], record: Dict[str, Any]) -> None:
+        """Apply one journal record to an in-memory state."""
+        op = record.get("op")
+        if op == "create":
+            item = record["item"]
+            state[item.get("id")] = item
+        elif op == "update":
+            item_id = record["id"]
+            if item_id in state:
+                state[item_id] = {**state[item_id], **record["updates"]}
+        elif op == "delete":
+            state.pop(record["id"], None)
+        else:
+            logger.warning(f"Unknown journal op: {op}")
+    
+    async def _ensure_loaded(self, filename: str) -> Dict[str, Dict]:
+        """Rebuild state from snapshot + journal on first access. Caller holds the lock."""
+        state = self._states.get(filename)
+        if state is not None:
+            return state
+        
+        snapshot = await self._snapshot_store.read(filename)
+        state = {}
+        for item in snapshot if isinstance(snapshot, list) else []:
+            state[item.get("id")] = item
+        
+        journal_path = self._journal_path(filename)
+        replayed = 0
+        # A leftover rotated journal means a compaction was interrupted;
+        # replaying it again is safe because every op is idempotent.
+        for path in (f"{journal_path}.old", journal_path):
+            for record in await io_pool.run_io(_read_records, path):
+                self._apply(state, record)
+                replayed += 1
+        
+        self._states[filename] = state
+        self._journal_sizes[filename] = (
+            os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+        )
+        logger.info(f"Loaded {len(state)} records for {filename} ({replayed} replayed from journal)")
+        return state
+    
+    async def _append_record(self, filename: str, record: Dict[str, Any]) -> None:
+        """Durably append a record to the journal. Caller holds the lock."""
+        handle = self._handles.get(filename)
+        if handle is None:
+            handle = await io_pool.run_io(_open_append, self._journal_path(filename))
+            self._handles[filename] = handle
+        
+        record["ts"] = datetime.utcnow().isoformat()
+        line = json.dumps(record, ensure_ascii=False, cls=DateTimeEncoder) + "\n"
+        self._journal_sizes[filename] = await io_pool.run_io(_append_line, handle, line)
+        
+        if self._journal_sizes[filename] >= self.compact_threshold_bytes:
+            self._schedule_compaction(filename)
+    
+    def _schedule_compaction(self, filename: str) -> None:
+        """Start a background compaction unless one is already running."""
+        task = self._compactions.get(filename)
+        if task is None or task.done():
+            self._compactions[filename] = asyncio.create_task(self.compact(filename))
+    
+    async def compact(self, filename: str) -> None:
+        """
+        Write the current state as a new snapshot and reset the journal.
+        
+        The journal is rotated under the lock, so new writes continue
+        into a fresh journal while the snapshot is written.
+        """
+        journal_path = self._journal_path(filename)
+        old_path = f"{journal_path}.old"
+        
+        try:
+            async with self._get_lock(filename):
+                state = await self._ensure_loaded(filename)
+                data = list(state.values())
+                
+                handle = self._handles.pop(filename, None)
+                if handle is not None:
+                    await io_pool.run_io(handle.close)
+                await io_pool.run_io(_rotate, journal_path, old_path)
+                self._journal_sizes[filename] = 0
+            
+            await self._snapshot_store.write(filename, data)
+            await io_pool.run_io(_remove_if_exists, old_path)
+            logger.info(f"Compacted {filename}: {len(data)} records in snapshot")
+        except Exception as e:
+            logger.error(f"Error compacting {filename}: {e}")
+    
+    async def read(self, filename: str) -> Any:
+        """
+        Read the current contents of a journaled JSON array file.
+        
+        Args:
+            filename: Name of the JSON file (e.g., 'appointments.json')
+        
+        Returns:
+            List of items.
+        """
+        view = self._views.get(filename)
+        if view is not None:
+            return view
+        
+        async with self._get_lock(filename):
+            state = await self._ensure_loaded(filename)
+            view = list(state.values())
+            self._views[filename] = view
+            return view
+    
+    async def write(self, filename: str, data: Any) -> None:
+        """
+        Replace the whole contents of a file.
+        Writes a new snapshot directly and discards the journal.
+        """
+        async with self._get_lock(filename):
+            await self._snapshot_store.write(filename, data)
+            
+            handle = self._handles.pop(filename, None)
+            if handle is not None:
+                await io_pool.run_io(handle.close)
+            journal_path = self._journal_path(filename)
+            await io_pool.run_io(_remove_if_exists, journal_path)
+            await io_pool.run_io(_remove_if_exists, f"{journal_path}.old")
+            
+            self._states[filename] = {
+                item.get("id"): item for item in data if isinstance(item, dict)
+            }
+            self._journal_sizes[filename] = 0
+            self._views.pop(filename, None)
+    
+    async def append_to_list(
+        self,
+        filename: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]] = None,
+        conflicts: Optional[Callable[[Dict], bool]] = None
+    ) -> bool:
+        """
+        Append an item to a journaled JSON array file unless it conflicts
+        with an existing item (see JsonStore.append_to_list).
+        
+        Args:
+            filename: Name of the JSON file containing an array
+            item: Item to append
+            conflict_scope: Fields that must match for a conflict
+            conflicts: Optional extra test on in-scope existing items
+        
+        Returns:
+            True if appended, False if a conflicting item exists.
+        """
+        async with self._get_lock(filename):
+            state = await self._ensure_loaded(filename)
+            if conflict_scope is not None:
+                for existing in state.values():
+                    if (all(existing.get(f) == item.get(f) for f in conflict_scope)
+                            and (conflicts is None or conflicts(existing))):
+                        return False
+            
+            await self._append_record(filename, {"op": "create", "item": item})
+            state[item.get("id")] = item
+            self._views.pop(filename, None)
+            return True
+    
+    async def update_in_list(
+        self,
+        filename: str,
+        item_id: str,
+        updates: Dict,
+        id_field: str = "id"
+    ) -> Optional[Dict]:
+        """
+        Update an item in a journaled JSON array file by ID.
+        
+        Returns:
+            Updated item or None if not found.
+        """
+        async with self._get_lock(filename):
+            state = await self._ensure_loaded(filename)
+            key = self._find_key(state, item_id, id_field)
+            if key is None:
+                return None
+            
+            await self._append_record(filename, {"op": "update", "id": key, "updates": updates})
+            state[key] = {**state[key], **updates}
+            self._views.pop(filename, None)
+            return state[key]
+    
+    async def delete_from_list(
+        self,
+        filename: str,
+        item_id: str,
+        id_field: str = "id"
+    ) -> bool:
+        """
+        Delete an item from a journaled JSON array file by ID.
+        
+        Returns:
+            True if deleted, False if not found.
+        """
+        async with self._get_lock(filename):
+            state = await self._ensure_loaded(filename)
+            key = self._find_key(state, item_id, id_field)
+            if key is None:
+                return False
+            
+            await self._append_record(filename, {"op": "delete", "id": key})
+            del state[key]
+            self._views.pop(filename, None)
+            return True
+    
+    async def find_in_list(self, filename: str, **criteria: Any) -> List[Dict]:
+        """
+        Find items whose fields equal the given values.
+        Lookups by 'id' alone are served from the in-memory map.
+        """
+        if set(criteria) == {"id"}:
+            async with self._get_lock(filename):
+                state = await self._ensure_loaded(filename)
+                item = state.get(criteria["id"])
+                return [item] if item is not None else []
+        
+        return [
+            item for item in await self.read(filename)
+            if all(item.get(field) == value for field, value in criteria.items())
+        ]
+    
+    @staticmethod
+    def _find_key(state: Dict[str, Dict], item_id: str, id_field: str) -> Optional[str]:
+        """Find the state key for an item, scanning only for non-default ID fields."""
+        if id_field == "id":
+            return item_id if item_id in state else None
+        for key, item in state.items():
+            if item.get(id_field) == item_id:
+                return key
+        return None
+    
+    async def close(self) -> None:
+        """Wait for running compactions and close journal files."""
+        pending = [task for task in self._compactions.values() if not task.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
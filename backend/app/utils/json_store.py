@@ -1,16 +1,28 @@
 """
 JSON file storage utility for simple data persistence.
-Provides async read/write operations for JSON files.
+Provides async read/write operations for JSON files, backed by an
+in-memory cache that is invalidated when the file changes on disk.
+Blocking file I/O and JSON (de)serialization run on the storage I/O pool.
+Writes are atomic (temp file + fsync + rename) and writes to the same file
+arriving within a short window are committed together.
 """
 
 import json
 import os
 import asyncio
-from typing import Any, Dict, List, Optional
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
 from datetime import datetime, date
 
 from app.config import settings
 from app.utils.logging import get_logger
+from app.utils.io_pool import io_pool
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 logger = get_logger(__name__)
 
@@ -26,14 +38,164 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _read_text(path: str) -> str:
+    """Read a file's contents (runs on the I/O pool)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_text(path: str, text: str) -> None:
+    """
+    Atomically and durably replace a file's contents (runs on the I/O pool).
+    Writes a temp file in the same directory, fsyncs it and renames it over
+    the target, so readers see either the old or the new file, never a mix.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _quarantine(path: str) -> str:
+    """Move an unreadable file aside so it isn't overwritten. Returns the new path."""
+    target = f"{path}.corrupt-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    os.replace(path, target)
+    return target
+
+
+def _decode(text: str) -> Any:
+    """Parse JSON text (runs on the encode executor)."""
+    return json.loads(text)
+
+
+def _encode(data: Any) -> str:
+    """Serialize data to JSON text (runs on the encode executor)."""
+    return json.dumps(data, indent=2, ensure_ascii=False, cls=DateTimeEncoder)
+
+
+def _load_file(path: str) -> Any:
+    """Read and parse a JSON file in one step (thread encode mode)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dump_file(path: str, data: Any) -> None:
+    """Serialize and write a JSON file in one step (thread encode mode)."""
+    _write_text(path, _encode(data))
+
+
+def _acquire_file_lock(path: str) -> int:
+    """Take an exclusive advisory lock on a lock file (blocks; runs on the I/O pool)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _release_file_lock(fd: int) -> None:
+    """Release an advisory lock taken by `_acquire_file_lock`."""
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class _PendingWrite:
+    """Writes to one file waiting to be committed together."""
+    
+    __slots__ = ("data", "future", "writers")
+    
+    def __init__(self, data: Any, future: asyncio.Future):
+        self.data = data
+        self.future = future
+        self.writers = 1
+
+
 class JsonStore:
     """
     Simple JSON file-based storage.
     Thread-safe through asyncio locks.
+    
+    Parsed file contents are cached per file and reused as long as the
+    file's mtime and size on disk are unchanged. Writes go through the
+    cache, so a write followed by a read never touches the disk twice.
+    Objects returned by `read` are shared with the cache and must be
+    treated as read-only; copy them before mutating.
+    
+    Writes are group-committed: the first write to a file opens a group
+    that is committed after `group_commit_window` seconds, and any write
+    to the same file arriving before then replaces the group's data and
+    waits on the same commit. A burst of bookings costs one fsync.
+    
+    In multi-process mode (several uvicorn workers sharing the data
+    directory), commits and read-modify-write operations also hold an
+    OS advisory lock per file, and a watcher polls watched files so each
+    worker learns about changes made by the others.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_enabled: bool = True,
+        group_commit_window: float = 0.0,
+        multiprocess: bool = False,
+        watch_interval: float = 0.5
+    ):
         self._locks: Dict[str, asyncio.Lock] = {}
+        # Held across read-modify-write in the list helpers
+        self._mutation_locks: Dict[str, asyncio.Lock] = {}
+        self._cache_enabled = cache_enabled
+        # filename -> (stat signature, parsed data)
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        self.group_commit_window = group_commit_window
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._commit_tasks: Set[asyncio.Task] = set()
+        self.commits = 0
+        self.coalesced_writes = 0
+        
+        if multiprocess and fcntl is None:
+            logger.error("Multi-process store mode needs fcntl; running single-process")
+            multiprocess = False
+        self.multiprocess = multiprocess
+        # Serializes this process's attempts to take each OS file lock
+        self._file_locks: Dict[str, asyncio.Lock] = {}
+        
+        self.watch_interval = watch_interval
+        # filename -> callbacks run when another process changes the file
+        self._watchers: Dict[str, List[Callable[[str], None]]] = {}
+        # filename -> last signature this process wrote or observed
+        self._known_signatures: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
     
     def _get_lock(self, filename: str) -> asyncio.Lock:
         """Get or create a lock for the given file."""
@@ -41,33 +203,148 @@ class JsonStore:
             self._locks[filename] = asyncio.Lock()
         return self._locks[filename]
     
+    def _get_mutation_lock(self, filename: str) -> asyncio.Lock:
+        """Get or create the read-modify-write lock for the given file."""
+        if filename not in self._mutation_locks:
+            self._mutation_locks[filename] = asyncio.Lock()
+        return self._mutation_locks[filename]
+    
     def _get_path(self, filename: str) -> str:
         """Get full path for a data file."""
         return os.path.join(settings.data_dir, filename)
     
+    def _lock_path(self, filename: str) -> str:
+        """Get the advisory lock file path for a data file."""
+        return os.path.join(settings.data_dir, ".locks", filename.replace("/", "__") + ".lock")
+    
+    @asynccontextmanager
+    async def _file_lock(self, filename: str) -> AsyncIterator[None]:
+        """
+        Hold the cross-process lock for a file (no-op in single-process mode).
+        Must be taken before the per-file asyncio lock.
+        """
+        if not self.multiprocess:
+            yield
+            return
+        
+        if filename not in self._file_locks:
+            self._file_locks[filename] = asyncio.Lock()
+        
+        async with self._file_locks[filename]:
+            fd = await io_pool.run_io(_acquire_file_lock, self._lock_path(filename))
+            try:
+                yield
+            finally:
+                await io_pool.run_io(_release_file_lock, fd)
+    
+    @staticmethod
+    def _stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        """Get (mtime_ns, size, inode) for a file, or None if it doesn't exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def signature(self, filename: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Get a value that changes whenever a file changes on disk.
+        
+        Returns:
+            (mtime_ns, size, inode), or None if the file doesn't exist.
+        """
+        return self._stat_signature(self._get_path(filename))
+    
+    def invalidate(self, filename: Optional[str] = None) -> None:
+        """
+        Drop cached data for a file, or for all files.
+        
+        Args:
+            filename: File to invalidate. Clears the whole cache if omitted.
+        """
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(filename, None)
+    
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters."""
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "entries": len(self._cache)
+        }
+    
+    @property
+    def write_stats(self) -> Dict[str, int]:
+        """Get group commit counters."""
+        return {
+            "commits": self.commits,
+            "coalesced_writes": self.coalesced_writes,
+            "pending": len(self._pending)
+        }
+    
+    async def _load(self, path: str) -> Any:
+        """Read and parse a JSON file off the event loop."""
+        if io_pool.uses_process_encoding:
+            text = await io_pool.run_io(_read_text, path)
+            return await io_pool.run_encode(_decode, text)
+        return await io_pool.run_io(_load_file, path)
+    
+    async def _dump(self, path: str, data: Any) -> None:
+        """Serialize and write a JSON file off the event loop."""
+        if io_pool.uses_process_encoding:
+            text = await io_pool.run_encode(_encode, data)
+            await io_pool.run_io(_write_text, path, text)
+        else:
+            await io_pool.run_io(_dump_file, path, data)
+    
     async def read(self, filename: str) -> Any:
         """
         Read data from a JSON file.
         
         Args:
             filename: Name of the JSON file (e.g., 'appointments.json')
-            
+        
         Returns:
             Parsed JSON data, or empty list/dict if file doesn't exist.
         """
+        # Data waiting for a group commit is newer than anything on disk
+        pending = self._pending.get(filename)
+        if pending is not None:
+            self.cache_hits += 1
+            return pending.data
+        
         path = self._get_path(filename)
         lock = self._get_lock(filename)
         
         async with lock:
             try:
-                if not os.path.exists(path):
+                signature = self._stat_signature(path)
+                if signature is None:
                     logger.warning(f"File not found: {path}")
                     return [] if 'appointments' in filename else {}
                 
-                with open(path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                if self._cache_enabled:
+                    cached = self._cache.get(filename)
+                    if cached is not None and cached[0] == signature:
+                        self.cache_hits += 1
+                        return cached[1]
+                    self.cache_misses += 1
+                
+                data = await self._load(path)
+                
+                if self._cache_enabled:
+                    self._cache[filename] = (signature, data)
+                return data
             except json.JSONDecodeError as e:
                 logger.error(f"Invalid JSON in {filename}: {e}")
+                # Keep the damaged file for recovery instead of letting the
+                # next write replace it with an empty list
+                moved_to = await io_pool.run_io(_quarantine, path)
+                logger.error(f"Moved unreadable {filename} to {moved_to}")
+                self._cache.pop(filename, None)
                 return [] if 'appointments' in filename else {}
             except Exception as e:
                 logger.error(f"Error reading {filename}: {e}")
@@ -76,40 +353,154 @@ class JsonStore:
     async def write(self, filename: str, data: Any) -> None:
         """
         Write data to a JSON file.
+        Returns once the data (or newer data from the same group) is durable.
         
         Args:
             filename: Name of the JSON file
             data: Data to write (must be JSON serializable)
         """
+        await self._submit_write(filename, data)
+    
+    def _submit_write(self, filename: str, data: Any) -> asyncio.Future:
+        """
+        Add a write to the file's open commit group, opening one if needed.
+        Reads see the data immediately; the returned future resolves when
+        it has been committed to disk.
+        """
+        pending = self._pending.get(filename)
+        if pending is not None:
+            pending.data = data
+            pending.writers += 1
+            self.coalesced_writes += 1
+            return pending.future
+        
+        pending = _PendingWrite(data, asyncio.get_running_loop().create_future())
+        self._pending[filename] = pending
+        
+        task = asyncio.create_task(self._commit(filename, pending))
+        self._commit_tasks.add(task)
+        task.add_done_callback(self._commit_tasks.discard)
+        return pending.future
+    
+    async def _commit(self, filename: str, pending: _PendingWrite) -> None:
+        """Commit a write group after the group commit window."""
+        await asyncio.sleep(self.group_commit_window)
+        
+        async with self._file_lock(filename):
+            async with self._get_lock(filename):
+                # Close the group; writes from now on open the next one
+                if self._pending.get(filename) is pending:
+                    del self._pending[filename]
+                
+                try:
+                    await self._write_locked(filename, pending.data)
+                except Exception as e:
+                    pending.future.set_exception(e)
+                    return
+        
+        pending.future.set_result(None)
+        logger.debug(f"Wrote data to {filename} ({pending.writers} writes in group)")
+    
+    async def _write_locked(self, filename: str, data: Any) -> None:
+        """Write a file now. Caller holds the file's locks."""
         path = self._get_path(filename)
-        lock = self._get_lock(filename)
+        try:
+            await self._dump(path, data)
+        except Exception as e:
+            # Don't trust the cache for a file we failed to write
+            self._cache.pop(filename, None)
+            logger.error(f"Error writing {filename}: {e}")
+            raise
         
-        async with lock:
-            try:
-                # Ensure directory exists
-                os.makedirs(os.path.dirname(path), exist_ok=True)
+        signature = self._stat_signature(path)
+        if self._cache_enabled and signature is not None:
+            self._cache[filename] = (signature, data)
+        self._known_signatures[filename] = signature
+        self.commits += 1
+    
+    async def flush(self) -> None:
+        """Wait until all pending writes are committed."""
+        while self._pending or self._commit_tasks:
+            await asyncio.gather(*list(self._commit_tasks), return_exceptions=True)
+    
+    async def _mutate(
+        self,
+        filename: str,
+        change: Callable[[List[Dict]], Tuple[Optional[List[Dict]], Any]]
+    ) -> Any:
+        """
+        Read-modify-write a JSON array file.
+        
+        Args:
+            filename: Name of the JSON file containing an array
+            change: Gets the current list (read-only) and returns
+                (new list or None for no write, result)
+        
+        Returns:
+            The result returned by `change`.
+        """
+        async with self._get_mutation_lock(filename):
+            if not self.multiprocess:
+                data = await self.read(filename)
+                new_data, result = change(data if isinstance(data, list) else [])
+                if new_data is None:
+                    return result
+                committed = self._submit_write(filename, new_data)
+            else:
+                # Let our own queued group land first; its commit needs the OS lock
+                pending = self._pending.get(filename)
+                if pending is not None:
+                    try:
+                        await asyncio.shield(pending.future)
+                    except Exception:
+                        pass  # Reported to that group's writers
                 
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, cls=DateTimeEncoder)
-                    
-                logger.debug(f"Wrote data to {filename}")
-            except Exception as e:
-                logger.error(f"Error writing {filename}: {e}")
-                raise
+                # Another worker may write between our read and write, so
+                # hold the OS lock across both and write synchronously
+                async with self._file_lock(filename):
+                    data = await self.read(filename)
+                    new_data, result = change(data if isinstance(data, list) else [])
+                    if new_data is not None:
+                        async with self._get_lock(filename):
+                            await self._write_locked(filename, new_data)
+                    return result
+        
+        await committed
+        return result
     
-    async def append_to_list(self, filename: str, item: Dict) -> None:
+    async def append_to_list(
+        self,
+        filename: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]] = None,
+        conflicts: Optional[Callable[[Dict], bool]] = None
+    ) -> bool:
         """
         Append an item to a JSON array file.
         
+        The check for conflicting items and the append happen atomically,
+        also across worker processes in multi-process mode.
+        
         Args:
             filename: Name of the JSON file containing an array
             item: Item to append
+            conflict_scope: Fields that must equal the new item's for an
+                existing item to be considered a conflict
+            conflicts: Optional extra test on in-scope existing items
+        
+        Returns:
+            True if appended, False if a conflicting item exists.
         """
-        data = await self.read(filename)
-        if not isinstance(data, list):
-            data = []
-        data.append(item)
-        await self.write(filename, data)
+        def change(data: List[Dict]) -> Tuple[Optional[List[Dict]], bool]:
+            if conflict_scope is not None:
+                for existing in data:
+                    if (all(existing.get(f) == item.get(f) for f in conflict_scope)
+                            and (conflicts is None or conflicts(existing))):
+                        return None, False
+            # Copy so the cached list isn't mutated before the write succeeds
+            return data + [item], True
+        
+        return await self._mutate(filename, change)
     
     async def update_in_list(
         self, 
@@ -126,21 +517,18 @@ class JsonStore:
             item_id: ID of the item to update
             updates: Dictionary of fields to update
             id_field: Name of the ID field
-            
+        
         Returns:
             Updated item or None if not found.
         """
-        data = await self.read(filename)
-        if not isinstance(data, list):
-            return None
-        
-        for i, item in enumerate(data):
-            if item.get(id_field) == item_id:
-                data[i] = {**item, **updates}
-                await self.write(filename, data)
-                return data[i]
+        def change(data: List[Dict]) -> Tuple[Optional[List[Dict]], Optional[Dict]]:
+            for i, item in enumerate(data):
+                if item.get(id_field) == item_id:
+                    updated = {**item, **updates}
+                    return data[:i] + [updated] + data[i + 1:], updated
+            return None, None
         
-        return None
+        return await self._mutate(filename, change)
     
     async def delete_from_list(
         self, 
@@ -155,23 +543,90 @@ class JsonStore:
             filename: Name of the JSON file
             item_id: ID of the item to delete
             id_field: Name of the ID field
-            
+        
         Returns:
             True if deleted, False if not found.
         """
+        def change(data: List[Dict]) -> Tuple[Optional[List[Dict]], bool]:
+            remaining = [item for item in data if item.get(id_field) != item_id]
+            if len(remaining) == len(data):
+                return None, False
+            return remaining, True
+        
+        return await self._mutate(filename, change)
+    
+    async def find_in_list(self, filename: str, **criteria: Any) -> List[Dict]:
+        """
+        Find items in a JSON array file whose fields equal the given values.
+        
+        Args:
+            filename: Name of the JSON file
+            **criteria: Field/value pairs that must all match
+        
+        Returns:
+            List of matching items.
+        """
         data = await self.read(filename)
         if not isinstance(data, list):
-            return False
-        
-        original_length = len(data)
-        data = [item for item in data if item.get(id_field) != item_id]
+            return []
         
-        if len(data) < original_length:
-            await self.write(filename, data)
-            return True
+        return [
+            item for item in data
+            if all(item.get(field) == value for field, value in criteria.items())
+        ]
+    
+    
+    def watch(self, filename: str, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback for changes to a file made by other processes.
+        Only active in multi-process mode, once `start_watching` was called.
         
-        return False
+        Args:
+            filename: Name of the JSON file to watch
+            callback: Called with the filename after the change is seen
+        """
+        self._watchers.setdefault(filename, []).append(callback)
+        if filename not in self._known_signatures:
+            self._known_signatures[filename] = self._stat_signature(self._get_path(filename))
+    
+    def start_watching(self) -> None:
+        """Start polling watched files (multi-process mode only)."""
+        if self.multiprocess and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+    
+    async def stop_watching(self) -> None:
+        """Stop the change watcher."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+    
+    async def _watch_loop(self) -> None:
+        """Poll watched files and notify on changes from other processes."""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            for filename, callbacks in list(self._watchers.items()):
+                signature = self._stat_signature(self._get_path(filename))
+                if signature == self._known_signatures.get(filename):
+                    continue
+                
+                self._known_signatures[filename] = signature
+                self._cache.pop(filename, None)
+                logger.debug(f"{filename} changed on disk, notifying {len(callbacks)} watchers")
+                for callback in callbacks:
+                    try:
+                        callback(filename)
+                    except Exception as e:
+                        logger.error(f"Error in change callback for {filename}: {e}")
 
 
 # Global store instance
-json_store = JsonStore()
+json_store = JsonStore(
+    cache_enabled=settings.store_cache_enabled,
+    group_commit_window=settings.store_group_commit_ms / 1000,
+    multiprocess=settings.store_multiprocess,
+    watch_interval=settings.store_watch_interval_ms / 1000
+)
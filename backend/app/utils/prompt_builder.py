@@ -1,67 +1,69 @@
 """
 Prompt builder for constructing OpenAI Realtime API instructions.
-Builds dynamic prompts based on clinic data.
+Builds dynamic prompts based on clinic data and defines the call tools.
 """
 
 import random
 from typing import Dict, List, Any
 from datetime import datetime, date
 
+from app.utils.slot_grid import SlotGrid
+
 
 def build_system_prompt(
     clinic: Dict[str, Any],
     doctors: List[Dict[str, Any]],
     services: List[Dict[str, Any]],
-    appointments: List[Dict[str, Any]],
     target_date: date
 ) -> str:
     """
     Build the system prompt for the AI assistant.
     
+    Availability is not part of the prompt; the assistant looks it up
+    with the check_availability and find_next_free_slot tools.
+    
     Args:
         clinic: Clinic information
         doctors: List of doctors
         services: List of available services
-        appointments: Existing appointments for the day
-        target_date: The date for scheduling (today)
+        target_date: Today's date
         
     Returns:
         Complete system prompt string.
     """
+    sections = render_static_sections(clinic, doctors, services)
+    return assemble_system_prompt(sections, pick_greeting(sections), target_date)
+
+
+def render_static_sections(
+    clinic: Dict[str, Any],
+    doctors: List[Dict[str, Any]],
+    services: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Render the parts of the prompt that only depend on the clinic config.
+    The result can be cached until clinic, doctors or services change.
     
-    # Pick a random greeting template
-    greeting = random.choice(clinic.get("greeting_templates", [
-        f"Bună ziua, {clinic['name']}, cu ce vă putem ajuta?"
-    ]))
-    
+    Returns:
+        Dict with the rendered text and the values needed to assemble
+        the rest of the prompt.
+    """
     # Format doctors info
     doctors_info = "\n".join([
-        f"- {doc['name']} ({doc['specialization']}): {', '.join(doc['available_services'])}"
+        f"- {doc['name']} [id: {doc['id']}] ({doc['specialization']}): {', '.join(doc['available_services'])}"
         for doc in doctors
     ])
     
     # Format services info
     services_info = "\n".join([
-        f"- {svc['name']}: {svc['price']} RON ({svc['duration_minutes']} minute) - {svc['description']}"
+        f"- {svc['name']} [id: {svc['id']}]: {svc['price']} RON ({svc['duration_minutes']} minute) - {svc['description']}"
         for svc in services
     ])
     
-    # Calculate available slots per doctor
     working_hours = clinic.get("working_hours", {"start": "08:00", "end": "18:00"})
     slot_duration = clinic.get("working_hours", {}).get("slot_duration_minutes", 30)
     
-    availability_info = _build_availability_info(
-        doctors, appointments, target_date, working_hours, slot_duration
-    )
-    
-    prompt = f"""Ești asistenta telefonică virtuală a clinicii dentare "{clinic['name']}".
-
-SALUT INIȚIAL (folosește la începutul conversației):
-"{greeting}"
-
-INFORMAȚII CLINICĂ:
-- Nume: {clinic['name']}
-- Adresă: {clinic.get('address', 'N/A')}
+    static_info = f"""- Adresă: {clinic.get('address', 'N/A')}
 - Telefon: {clinic.get('phone', 'N/A')}
 - Program: {working_hours['start']} - {working_hours['end']}
 - Durata unei programări: {slot_duration} minute
@@ -70,10 +72,46 @@ DOCTORI DISPONIBILI:
 {doctors_info}
 
 SERVICII ȘI TARIFE:
-{services_info}
+{services_info}"""
+    
+    return {
+        "clinic_name": clinic["name"],
+        "greeting_templates": clinic.get("greeting_templates", [
+            f"Bună ziua, {clinic['name']}, cu ce vă putem ajuta?"
+        ]),
+        "working_hours": working_hours,
+        "slot_duration": slot_duration,
+        "static_info": static_info
+    }
+
+
+def pick_greeting(sections: Dict[str, Any]) -> str:
+    """Pick a random greeting template for a call."""
+    return random.choice(sections["greeting_templates"])
+
+
+def assemble_system_prompt(
+    sections: Dict[str, Any],
+    greeting: str,
+    target_date: date
+) -> str:
+    """
+    Assemble the full prompt from pre-rendered static sections and the
+    per-call parts.
+    
+    Args:
+        sections: Result of render_static_sections
+        greeting: Greeting for this call
+        target_date: Today's date
+    """
+    return f"""Ești asistenta telefonică virtuală a clinicii dentare "{sections['clinic_name']}".
 
-DISPONIBILITATE PENTRU AZI ({target_date.strftime('%d.%m.%Y')}):
-{availability_info}
+SALUT INIȚIAL (folosește la începutul conversației):
+"{greeting}"
+
+INFORMAȚII CLINICĂ:
+- Nume: {sections['clinic_name']}
+{sections['static_info']}
 
 INSTRUCȚIUNI COMPORTAMENT:
 1. Fii caldă, profesionistă și prietenoasă
@@ -81,75 +119,37 @@ INSTRUCȚIUNI COMPORTAMENT:
 3. Dacă pacientul dorește o programare, colectează:
    - Serviciul dorit
    - Preferința de doctor (sau lasă-l să aleagă)
-   - Ora preferată (propune ore disponibile)
+   - Ziua și ora preferată (propune ore disponibile)
    - Numele complet al pacientului
    - Numărul de telefon pentru confirmare
-4. Când ai toate informațiile, folosește funcția create_appointment pentru a finaliza programarea
-5. După programare, confirmă detaliile verbal
-6. Dacă o oră nu este disponibilă, propune alternative
-7. Nu inventa informații - folosește doar datele de mai sus
-8. Dacă nu știi ceva, spune că vei verifica și să te sune din nou
-9. La întrebări despre prețuri, fii transparentă cu tarifele
-10. Poți fi întreruptă de pacient - adaptează-te natural
+4. Pentru ore libere folosește check_availability (o zi anume) sau find_next_free_slot (prima oră liberă)
+5. Când ai toate informațiile, folosește funcția create_appointment pentru a finaliza programarea
+6. După programare, confirmă detaliile verbal
+7. Dacă o oră nu este disponibilă, propune alternative
+8. Nu inventa informații - folosește doar datele de mai sus și rezultatele funcțiilor
+9. Dacă nu știi ceva, spune că vei verifica și să te sune din nou
+10. La întrebări despre prețuri, fii transparentă cu tarifele
+11. Poți fi întreruptă de pacient - adaptează-te natural
 
 IMPORTANT:
-- Data de azi este {target_date.strftime('%d.%m.%Y')}
-- Programările se fac doar pentru azi
-- Verifică disponibilitatea înainte de a confirma o oră
+- Data de azi este {target_date.strftime('%d.%m.%Y')} (în funcții folosește formatul {target_date.isoformat()})
+- Programările se pot face pentru azi sau pentru zilele următoare
+- Verifică disponibilitatea cu funcțiile înainte de a propune sau confirma o oră
 - Folosește funcția create_appointment DOAR când ai toate datele necesare
 """
-    
-    return prompt
 
 
-def _build_availability_info(
-    doctors: List[Dict],
-    appointments: List[Dict],
-    target_date: date,
-    working_hours: Dict,
-    slot_duration: int
-) -> str:
-    """Build availability string showing free/busy slots per doctor."""
-    
-    # Generate all time slots
-    start_hour, start_min = map(int, working_hours["start"].split(":"))
-    end_hour, end_min = map(int, working_hours["end"].split(":"))
-    
-    all_slots = []
-    current_hour, current_min = start_hour, start_min
-    
-    while (current_hour < end_hour) or (current_hour == end_hour and current_min < end_min):
-        all_slots.append(f"{current_hour:02d}:{current_min:02d}")
-        current_min += slot_duration
-        if current_min >= 60:
-            current_hour += 1
-            current_min = 0
+def render_availability_line(doctor: Dict[str, Any], grid: SlotGrid, booked_mask: int) -> str:
+    """Render one doctor's availability line from a booked slot mask."""
+    free = grid.free_mask(booked_mask)
+    if not free:
+        return f"- {doctor['name']}: COMPLET pentru azi"
     
-    # Build availability per doctor
-    availability_lines = []
-    date_str = target_date.isoformat()
-    
-    for doctor in doctors:
-        # Find appointments for this doctor today
-        doctor_appointments = [
-            apt for apt in appointments
-            if apt.get("doctor_id") == doctor["id"] and apt.get("date") == date_str
-        ]
-        booked_times = {apt.get("time") for apt in doctor_appointments}
-        
-        free_slots = [slot for slot in all_slots if slot not in booked_times]
-        
-        if free_slots:
-            # Show first 5 available slots to keep prompt concise
-            slots_preview = ", ".join(free_slots[:5])
-            more = f" (și alte {len(free_slots) - 5} ore)" if len(free_slots) > 5 else ""
-            availability_lines.append(
-                f"- {doctor['name']}: Ore libere: {slots_preview}{more}"
-            )
-        else:
-            availability_lines.append(f"- {doctor['name']}: COMPLET pentru azi")
-    
-    return "\n".join(availability_lines)
+    # Show first 5 available slots to keep prompt concise
+    free_count = grid.count(free)
+    slots_preview = ", ".join(grid.times_for(free, limit=5))
+    more = f" (și alte {free_count - 5} ore)" if free_count > 5 else ""
+    return f"- {doctor['name']}: Ore libere: {slots_preview}{more}"
 
 
 def get_appointment_tool_definition() -> Dict:
@@ -160,7 +160,7 @@ def get_appointment_tool_definition() -> Dict:
     return {
         "type": "function",
         "name": "create_appointment",
-        "description": "Creează o programare la clinica dentară. Folosește această funcție când pacientul dorește să facă o programare și ai colectat toate informațiile necesare: serviciu, doctor, oră, nume și telefon.",
+        "description": "Creează o programare la clinica dentară. Folosește această funcție când pacientul dorește să facă o programare și ai colectat toate informațiile necesare: serviciu, doctor, zi, oră, nume și telefon.",
         "parameters": {
             "type": "object",
             "properties": {
@@ -168,6 +168,10 @@ def get_appointment_tool_definition() -> Dict:
                     "type": "string",
                     "description": "ID-ul doctorului ales (ex: dr-popescu, dr-ionescu, dr-dumitrescu)"
                 },
+                "date": {
+                    "type": "string",
+                    "description": "Data programării în format YYYY-MM-DD (implicit azi)"
+                },
                 "time": {
                     "type": "string",
                     "description": "Ora programării în format HH:MM (ex: 10:00, 14:30)"
@@ -188,3 +192,67 @@ def get_appointment_tool_definition() -> Dict:
             "required": ["doctor_id", "time", "patient_name", "patient_phone", "service_id"]
         }
     }
+
+
+def get_availability_tool_definitions() -> List[Dict]:
+    """
+    Get the function/tool definitions for looking up free slots.
+    Used in OpenAI Realtime API session configuration.
+    """
+    return [
+        {
+            "type": "function",
+            "name": "check_availability",
+            "description": "Verifică orele libere într-o anumită zi pentru un serviciu, la un doctor anume sau la toți doctorii care oferă serviciul.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date": {
+                        "type": "string",
+                        "description": "Data în format YYYY-MM-DD"
+                    },
+                    "service_id": {
+                        "type": "string",
+                        "description": "ID-ul serviciului dorit (ex: consultatie, detartraj, implant)"
+                    },
+                    "doctor_id": {
+                        "type": "string",
+                        "description": "ID-ul doctorului (opțional; lipsă = toți doctorii care oferă serviciul)"
+                    }
+                },
+                "required": ["date", "service_id"]
+            }
+        },
+        {
+            "type": "function",
+            "name": "find_next_free_slot",
+            "description": "Găsește prima oră liberă pentru un serviciu, începând de azi sau de la o anumită zi și oră.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "service_id": {
+                        "type": "string",
+                        "description": "ID-ul serviciului dorit"
+                    },
+                    "doctor_id": {
+                        "type": "string",
+                        "description": "ID-ul doctorului (opțional)"
+                    },
+                    "after_date": {
+                        "type": "string",
+                        "description": "Caută începând cu această dată, format YYYY-MM-DD (opțional)"
+                    },
+                    "after_time": {
+                        "type": "string",
+                        "description": "Caută începând cu această oră, format HH:MM (opțional)"
+                    }
+                },
+                "required": ["service_id"]
+            }
+        }
+    ]
+
+
+def get_tool_definitions() -> List[Dict]:
+    """Get all tool definitions for a call session."""
+    return [get_appointment_tool_definition(), *get_availability_tool_definitions()]
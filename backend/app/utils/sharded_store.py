@@ -0,0 +1,322 @@
+"""
+Per-date sharded storage for JSON array files.
+Partitions a list file like 'appointments.json' into one file per day
+('appointments/YYYY-MM-DD.json') so reads for a day don't load all history.
+"""
+
+import os
+import asyncio
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from app.config import settings
+from app.utils.logging import get_logger
+from app.utils.io_pool import io_pool
+from app.utils.json_store import JsonStore
+
+logger = get_logger(__name__)
+
+# Shard used for items without a valid date
+UNDATED_SHARD = "undated"
+
+
+def shard_for(value: Any) -> str:
+    """
+    Get the shard key for a date value. Only YYYY-MM-DD dates name a shard
+    file; anything else (which could otherwise be a path like '../clinic')
+    goes to the undated shard.
+    """
+    if not isinstance(value, str):
+        return UNDATED_SHARD
+    try:
+        if date.fromisoformat(value).isoformat() == value:
+            return value
+    except ValueError:
+        pass
+    return UNDATED_SHARD
+
+
+def _list_shards(directory: str) -> List[str]:
+    """List shard keys present in a shard directory (runs on the I/O pool)."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name[:-len(".json")] for name in os.listdir(directory)
+        if name.endswith(".json")
+    )
+
+
+class ShardedStore:
+    """
+    Store that splits JSON array files into per-date shard files.
+    
+    Each shard is an ordinary JSON array file read and written through a
+    JsonStore, so it benefits from the same caching and I/O offloading.
+    An id -> shard map, built once when a file is first opened, routes
+    updates and deletes to the right shard. Exposes the JsonStore list
+    contract; `find_in_list(date=...)` only touches that day's shard.
+    """
+    
+    def __init__(self, shard_store: JsonStore, shard_field: str = "date"):
+        self._shard_store = shard_store
+        self.shard_field = shard_field
+        
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # filename -> shard keys with a file on disk
+        self._shards: Dict[str, Set[str]] = {}
+        # filename -> {item id: shard key}
+        self._id_shards: Dict[str, Dict[str, str]] = {}
+    
+    def _get_lock(self, filename: str) -> asyncio.Lock:
+        """Get or create a lock for the given file."""
+        if filename not in self._locks:
+            self._locks[filename] = asyncio.Lock()
+        return self._locks[filename]
+    
+    @staticmethod
+    def _shard_dir(filename: str) -> str:
+        """Get the shard directory name for a data file (relative to data dir)."""
+        base, _ = os.path.splitext(filename)
+        return base
+    
+    def _shard_file(self, filename: str, shard: str) -> str:
+        """Get the shard file name (relative to data dir)."""
+        return f"{self._shard_dir(filename)}/{shard}.json"
+    
+    def _shard_key(self, item: Dict) -> str:
+        """Get the shard an item belongs to."""
+        return shard_for(item.get(self.shard_field))
+    
+    async def _ensure_open(self, filename: str) -> None:
+        """Discover shards and build the id map on first access. Caller holds the lock."""
+        if filename in self._shards:
+            return
+        
+        directory = os.path.join(settings.data_dir, self._shard_dir(filename))
+        legacy_path = os.path.join(settings.data_dir, filename)
+        if not os.path.isdir(directory) and os.path.exists(legacy_path):
+            await self._migrate_single_file(filename)
+        
+        shards = set(await io_pool.run_io(_list_shards, directory))
+        id_shards: Dict[str, str] = {}
+        for shard in shards:
+            for item in await self._shard_store.read(self._shard_file(filename, shard)):
+                id_shards[item.get("id")] = shard
+        
+        self._shards[filename] = shards
+        self._id_shards[filename] = id_shards
+        logger.info(f"Opened {len(shards)} shards for {filename} ({len(id_shards)} items)")
+    
+    async def _migrate_single_file(self, filename: str) -> None:
+        """Split a single JSON array file into per-date shards."""
+        data = await self._shard_store.read(filename)
+        if not isinstance(data, list):
+            data = []
+        
+        grouped: Dict[str, List[Dict]] = {}
+        for item in data:
+            grouped.setdefault(self._shard_key(item), []).append(item)
+        
+        for shard, items in grouped.items():
+            await self._shard_store.write(self._shard_file(filename, shard), items)
+        
+        directory = os.path.join(settings.data_dir, self._shard_dir(filename))
+        await io_pool.run_io(os.makedirs, directory, exist_ok=True)
+        
+        # Keep the original around, but out of the way
+        legacy_path = os.path.join(settings.data_dir, filename)
+        await io_pool.run_io(os.replace, legacy_path, f"{legacy_path}.pre-shard")
+        self._shard_store.invalidate(filename)
+        logger.info(f"Migrated {len(data)} items from {filename} into {len(grouped)} shards")
+    
+    async def _read_shard(self, filename: str, shard: str) -> List[Dict]:
+        """Read one shard, without touching disk for shards that don't exist."""
+        if shard not in self._shards[filename]:
+            return []
+        data = await self._shard_store.read(self._shard_file(filename, shard))
+        return data if isinstance(data, list) else []
+    
+    async def read(self, filename: str) -> Any:
+        """
+        Read all items across every shard, ordered by shard.
+        Prefer `find_in_list(date=...)` when only one day is needed.
+        """
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            items: List[Dict] = []
+            for shard in sorted(self._shards[filename]):
+                items.extend(await self._read_shard(filename, shard))
+            return items
+    
+    async def write(self, filename: str, data: Any) -> None:
+        """Replace all items, re-partitioning them into shards."""
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            
+            grouped: Dict[str, List[Dict]] = {}
+            for item in data:
+                grouped.setdefault(self._shard_key(item), []).append(item)
+            
+            # Stale shards are emptied rather than deleted
+            for shard in self._shards[filename] | set(grouped):
+                await self._shard_store.write(
+                    self._shard_file(filename, shard), grouped.get(shard, [])
+                )
+            
+            self._shards[filename] |= set(grouped)
+            self._id_shards[filename] = {
+                item.get("id"): shard
+                for shard, items in grouped.items() for item in items
+            }
+    
+    async def append_to_list(
+        self,
+        filename: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]] = None,
+        conflicts: Optional[Callable[[Dict], bool]] = None
+    ) -> bool:
+        """
+        Append an item to the shard for its date unless it conflicts with
+        an existing item (see JsonStore.append_to_list). Conflicts are only
+        looked for in the same shard.
+        
+        Args:
+            filename: Name of the logical JSON array file
+            item: Item to append
+            conflict_scope: Fields that must match for a conflict
+            conflicts: Optional extra test on in-scope existing items
+        
+        Returns:
+            True if appended, False if a conflicting item exists.
+        """
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            shard = self._shard_key(item)
+            if not await self._append_to_shard(filename, shard, item, conflict_scope, conflicts):
+                return False
+            self._id_shards[filename][item.get("id")] = shard
+            return True
+    
+    async def _append_to_shard(
+        self,
+        filename: str,
+        shard: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]] = None,
+        conflicts: Optional[Callable[[Dict], bool]] = None
+    ) -> bool:
+        """Append to a shard, creating its file if needed. Caller holds the lock."""
+        shard_file = self._shard_file(filename, shard)
+        if shard in self._shards[filename]:
+            return await self._shard_store.append_to_list(shard_file, item, conflict_scope, conflicts)
+        
+        await self._shard_store.write(shard_file, [item])
+        self._shards[filename].add(shard)
+        return True
+    
+    async def update_in_list(
+        self,
+        filename: str,
+        item_id: str,
+        updates: Dict,
+        id_field: str = "id"
+    ) -> Optional[Dict]:
+        """
+        Update an item by ID, moving it to another shard if its date changes.
+        
+        Returns:
+            Updated item or None if not found.
+        """
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            shard = await self._locate(filename, item_id, id_field)
+            if shard is None:
+                return None
+            
+            shard_file = self._shard_file(filename, shard)
+            current = next(
+                (item for item in await self._read_shard(filename, shard)
+                 if item.get(id_field) == item_id),
+                None
+            )
+            if current is None:
+                return None
+            
+            new_shard = self._shard_key({**current, **updates})
+            if new_shard == shard:
+                return await self._shard_store.update_in_list(shard_file, item_id, updates, id_field)
+            
+            # Add to the new shard before removing from the old one, so a
+            # failure in between leaves a duplicate rather than nothing
+            updated = {**current, **updates}
+            await self._append_to_shard(filename, new_shard, updated)
+            try:
+                if not await self._shard_store.delete_from_list(shard_file, item_id, id_field):
+                    raise RuntimeError(f"{item_id} disappeared from shard {shard}")
+            except Exception:
+                await self._shard_store.delete_from_list(
+                    self._shard_file(filename, new_shard), item_id, id_field
+                )
+                raise
+            self._id_shards[filename][updated.get("id")] = new_shard
+            return updated
+    
+    async def delete_from_list(
+        self,
+        filename: str,
+        item_id: str,
+        id_field: str = "id"
+    ) -> bool:
+        """
+        Delete an item by ID from its shard.
+        
+        Returns:
+            True if deleted, False if not found.
+        """
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            shard = await self._locate(filename, item_id, id_field)
+            if shard is None:
+                return False
+            
+            deleted = await self._shard_store.delete_from_list(
+                self._shard_file(filename, shard), item_id, id_field
+            )
+            if deleted and id_field == "id":
+                self._id_shards[filename].pop(item_id, None)
+            return deleted
+    
+    async def _locate(self, filename: str, item_id: str, id_field: str) -> Optional[str]:
+        """Find the shard holding an item, scanning only for non-default ID fields."""
+        if id_field == "id":
+            return self._id_shards[filename].get(item_id)
+        for shard in sorted(self._shards[filename]):
+            for item in await self._read_shard(filename, shard):
+                if item.get(id_field) == item_id:
+                    return shard
+        return None
+    
+    async def find_in_list(self, filename: str, **criteria: Any) -> List[Dict]:
+        """
+        Find items whose fields equal the given values.
+        Criteria on the shard field or 'id' only read a single shard.
+        """
+        async with self._get_lock(filename):
+            await self._ensure_open(filename)
+            
+            if self.shard_field in criteria:
+                shards = [shard_for(criteria[self.shard_field])]
+            elif "id" in criteria:
+                shard = self._id_shards[filename].get(criteria["id"])
+                shards = [shard] if shard is not None else []
+            else:
+                shards = sorted(self._shards[filename])
+            
+            matches: List[Dict] = []
+            for shard in shards:
+                matches.extend(
+                    item for item in await self._read_shard(filename, shard)
+                    if all(item.get(field) == value for field, value in criteria.items())
+                )
+            return matches
@@ -0,0 +1,127 @@
+"""
+Bitmap representation of a day's appointment slots.
+Slot i of a working day is bit i of an integer, so availability checks
+and "next free slots" queries are bit operations instead of string diffs.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Any
+
+
+def parse_time(value: str) -> int:
+    """Convert 'HH:MM' to minutes since midnight."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes: int) -> str:
+    """Convert minutes since midnight to 'HH:MM'."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class SlotGrid:
+    """
+    The fixed grid of slots in a working day.
+    
+    Masks passed to and returned from the methods are plain ints where
+    bit i set means slot i is booked (or free, for free masks). Time
+    strings are only produced by `times_for` and `next_free`.
+    """
+    
+    def __init__(self, start: str, end: str, slot_minutes: int):
+        self.start_minute = parse_time(start)
+        self.end_minute = parse_time(end)
+        self.slot_minutes = max(1, slot_minutes)
+        
+        self.times: Tuple[str, ...] = tuple(
+            format_time(minute)
+            for minute in range(self.start_minute, self.end_minute, self.slot_minutes)
+        )
+        self.full_mask = (1 << len(self.times)) - 1
+    
+    def __len__(self) -> int:
+        return len(self.times)
+    
+    def mask_for_range(self, start_minute: int, end_minute: int) -> int:
+        """Build a mask of the slots that overlap [start_minute, end_minute)."""
+        first = max(0, (start_minute - self.start_minute) // self.slot_minutes)
+        last = min(len(self.times), -(-(end_minute - self.start_minute) // self.slot_minutes))
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+    
+    def slots_for_duration(self, minutes: int) -> int:
+        """Number of consecutive slots needed for an appointment of `minutes`."""
+        return max(1, -(-minutes // self.slot_minutes))
+    
+    @staticmethod
+    def starts_with_room(free_mask: int, slots: int) -> int:
+        """
+        Get the mask of free slots followed by at least `slots - 1` more
+        free slots, i.e. where an appointment `slots` long fits.
+        """
+        mask = free_mask
+        for shift in range(1, slots):
+            mask &= free_mask >> shift
+        return mask
+    
+    def free_mask(self, booked_mask: int) -> int:
+        """Get the mask of free slots given a booked mask."""
+        return self.full_mask & ~booked_mask
+    
+    @staticmethod
+    def count(mask: int) -> int:
+        """Count the slots set in a mask."""
+        return bin(mask).count("1")
+    
+    def times_for(self, mask: int, limit: Optional[int] = None) -> List[str]:
+        """
+        Get the times for the bits set in a mask, earliest first.
+        
+        Args:
+            mask: Slot mask
+            limit: Optional maximum number of times to return
+        """
+        times = []
+        while mask and (limit is None or len(times) < limit):
+            lowest = mask & -mask
+            times.append(self.times[lowest.bit_length() - 1])
+            mask ^= lowest
+        return times
+    
+    def next_free(
+        self,
+        booked_mask: int,
+        count: int,
+        after: Optional[str] = None,
+        slots: int = 1
+    ) -> List[str]:
+        """
+        Get the next `count` free slots, optionally starting at a time.
+        
+        Args:
+            booked_mask: Mask of booked slots
+            count: Number of slots to return
+            after: Optional 'HH:MM'; only slots at or after it are returned
+            slots: Consecutive free slots needed from each returned start
+        """
+        free = self.starts_with_room(self.free_mask(booked_mask), slots)
+        if after is not None:
+            first = -(-(parse_time(after) - self.start_minute) // self.slot_minutes)
+            free &= ~((1 << max(0, first)) - 1)
+        return self.times_for(free, limit=count)
+
+
+@lru_cache(maxsize=32)
+def get_slot_grid(start: str, end: str, slot_minutes: int) -> SlotGrid:
+    """Get a shared grid for the given working hours."""
+    return SlotGrid(start, end, slot_minutes)
+
+
+def slot_grid_for(working_hours: Dict[str, Any]) -> SlotGrid:
+    """Get the grid for a working_hours config dict."""
+    return get_slot_grid(
+        working_hours.get("start", "08:00"),
+        working_hours.get("end", "18:00"),
+        working_hours.get("slot_duration_minutes", 30)
+    )
@@ -0,0 +1,399 @@
+"""
+SQLite storage backend implementing the JsonStore interface.
+JSON array files become indexed rows, other files are kept as documents.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import settings
+from app.utils.logging import get_logger
+from app.utils.io_pool import io_pool
+from app.utils.json_store import DateTimeEncoder
+
+logger = get_logger(__name__)
+
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS records (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        collection TEXT NOT NULL,
+        id TEXT NOT NULL,
+        doctor_id TEXT,
+        date TEXT,
+        time TEXT,
+        data TEXT NOT NULL,
+        UNIQUE (collection, id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_records_slot ON records (collection, doctor_id, date, time)",
+    "CREATE INDEX IF NOT EXISTS idx_records_date ON records (collection, date)",
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        name TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    )
+    """,
+]
+
+# Item fields mirrored into indexed columns
+INDEXED_FIELDS = ("id", "doctor_id", "date", "time")
+
+
+def _load_json(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, cls=DateTimeEncoder)
+
+
+def _row_values(collection: str, item: Dict) -> tuple:
+    return (
+        collection,
+        str(item.get("id")),
+        item.get("doctor_id"),
+        item.get("date"),
+        item.get("time"),
+        _dumps(item)
+    )
+
+
+class SqliteStore:
+    """
+    SQLite-backed store exposing the JsonStore contract.
+    
+    JSON array files (e.g. 'appointments.json') are stored as rows in
+    the `records` table, keyed by file name and item id, with the fields
+    used for lookups mirrored into indexed columns. Any other file is
+    stored whole in the `documents` table. The database runs in WAL mode
+    and a small pool of connections is shared by the I/O pool threads.
+    """
+    
+    def __init__(self, db_path: str, pool_size: int = 4):
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._connections: List[sqlite3.Connection] = []
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Create a configured connection (autocommit, explicit transactions)."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def _open_sync(self) -> bool:
+        """Open the connection pool and create the schema. Returns True for a new database."""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        is_new = not os.path.exists(self.db_path)
+        
+        for _ in range(self.pool_size):
+            conn = self._connect()
+            self._connections.append(conn)
+            self._pool.put(conn)
+        
+        self._with_connection(self._create_schema)
+        return is_new
+    
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        for statement in SCHEMA:
+            conn.execute(statement)
+    
+    def _with_connection(self, func: Callable[..., Any], *args) -> Any:
+        """Run a function with a pooled connection (runs on the I/O pool)."""
+        conn = self._pool.get()
+        try:
+            return func(conn, *args)
+        finally:
+            self._pool.put(conn)
+    
+    async def open(self, migrate: bool = True) -> None:
+        """
+        Open the database. A brand new database is populated from the
+        existing JSON files in the data directory unless `migrate` is False.
+        """
+        async with self._open_lock:
+            if self._opened:
+                return
+            is_new = await io_pool.run_io(self._open_sync)
+            self._opened = True
+            logger.info(f"SQLite store opened: {self.db_path}")
+        
+        if is_new and migrate:
+            await self.migrate_from_json(settings.data_dir)
+    
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a function with a pooled connection off the event loop."""
+        if not self._opened:
+            await self.open()
+        return await io_pool.run_io(self._with_connection, func, *args)
+    
+    # Synchronous operations, executed with a pooled connection
+    
+    @staticmethod
+    def _read_sync(conn: sqlite3.Connection, name: str) -> Optional[Any]:
+        row = conn.execute("SELECT data FROM documents WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        
+        rows = conn.execute(
+            "SELECT data FROM records WHERE collection = ? ORDER BY seq", (name,)
+        ).fetchall()
+        if rows:
+            return [json.loads(r[0]) for r in rows]
+        return None
+    
+    @staticmethod
+    def _write_sync(conn: sqlite3.Connection, name: str, data: Any) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM documents WHERE name = ?", (name,))
+            conn.execute("DELETE FROM records WHERE collection = ?", (name,))
+            if isinstance(data, list):
+                conn.executemany(
+                    "INSERT INTO records (collection, id, doctor_id, date, time, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [_row_values(name, item) for item in data]
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO documents (name, data) VALUES (?, ?)", (name, _dumps(data))
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    @classmethod
+    def _append_sync(
+        cls,
+        conn: sqlite3.Connection,
+        name: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]],
+        conflicts: Optional[Callable[[Dict], bool]]
+    ) -> bool:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conflict_scope is not None:
+                scope = {field: item.get(field) for field in conflict_scope}
+                for existing in cls._find_sync(conn, name, scope):
+                    if conflicts is None or conflicts(existing):
+                        conn.execute("ROLLBACK")
+                        return False
+            
+            conn.execute(
+                "INSERT INTO records (collection, id, doctor_id, date, time, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                _row_values(name, item)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    @staticmethod
+    def _select_key(conn: sqlite3.Connection, name: str, item_id: str, id_field: str) -> Optional[tuple]:
+        if id_field == "id":
+            return conn.execute(
+                "SELECT seq, data FROM records WHERE collection = ? AND id = ?", (name, item_id)
+            ).fetchone()
+        return conn.execute(
+            "SELECT seq, data FROM records WHERE collection = ? AND json_extract(data, ?) = ?",
+            (name, f"$.{id_field}", item_id)
+        ).fetchone()
+    
+    @classmethod
+    def _update_sync(
+        cls,
+        conn: sqlite3.Connection,
+        name: str,
+        item_id: str,
+        updates: Dict,
+        id_field: str
+    ) -> Optional[Dict]:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = cls._select_key(conn, name, item_id, id_field)
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            
+            seq, data = row
+            item = {**json.loads(data), **updates}
+            _, new_id, doctor_id, date_, time_, encoded = _row_values(name, item)
+            conn.execute(
+                "UPDATE records SET id = ?, doctor_id = ?, date = ?, time = ?, data = ? WHERE seq = ?",
+                (new_id, doctor_id, date_, time_, encoded, seq)
+            )
+            conn.execute("COMMIT")
+            return item
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    @classmethod
+    def _delete_sync(cls, conn: sqlite3.Connection, name: str, item_id: str, id_field: str) -> bool:
+        if id_field == "id":
+            cursor = conn.execute(
+                "DELETE FROM records WHERE collection = ? AND id = ?", (name, item_id)
+            )
+        else:
+            cursor = conn.execute(
+                "DELETE FROM records WHERE collection = ? AND json_extract(data, ?) = ?",
+                (name, f"$.{id_field}", item_id)
+            )
+        return cursor.rowcount > 0
+    
+    @staticmethod
+    def _find_sync(conn: sqlite3.Connection, name: str, criteria: Dict[str, Any]) -> List[Dict]:
+        indexed = {k: v for k, v in criteria.items() if k in INDEXED_FIELDS}
+        others = {k: v for k, v in criteria.items() if k not in INDEXED_FIELDS}
+        
+        sql = "SELECT data FROM records WHERE collection = ?"
+        params: List[Any] = [name]
+        for field, value in indexed.items():
+            sql += f" AND {field} = ?"
+            params.append(value)
+        sql += " ORDER BY seq"
+        
+        items = [json.loads(r[0]) for r in conn.execute(sql, params).fetchall()]
+        if others:
+            items = [
+                item for item in items
+                if all(item.get(field) == value for field, value in others.items())
+            ]
+        return items
+    
+    # JsonStore contract
+    
+    async def read(self, filename: str) -> Any:
+        """
+        Read data stored for a file.
+        
+        Returns:
+            Stored data, or empty list/dict if nothing is stored.
+        """
+        data = await self._run(self._read_sync, filename)
+        if data is None:
+            return [] if 'appointments' in filename else {}
+        return data
+    
+    async def write(self, filename: str, data: Any) -> None:
+        """Replace all data stored for a file."""
+        await self._run(self._write_sync, filename, data)
+    
+    async def append_to_list(
+        self,
+        filename: str,
+        item: Dict,
+        conflict_scope: Optional[Sequence[str]] = None,
+        conflicts: Optional[Callable[[Dict], bool]] = None
+    ) -> bool:
+        """
+        Append an item to a list file unless it conflicts with an existing
+        item (see JsonStore.append_to_list). The check and the insert run
+        in one write transaction, so they are atomic across processes.
+        
+        Returns:
+            True if appended, False if a conflicting item exists.
+        """
+        return await self._run(self._append_sync, filename, item, conflict_scope, conflicts)
+    
+    async def update_in_list(
+        self,
+        filename: str,
+        item_id: str,
+        updates: Dict,
+        id_field: str = "id"
+    ) -> Optional[Dict]:
+        """
+        Update an item in a list file by ID.
+        
+        Returns:
+            Updated item or None if not found.
+        """
+        return await self._run(self._update_sync, filename, item_id, updates, id_field)
+    
+    async def delete_from_list(
+        self,
+        filename: str,
+        item_id: str,
+        id_field: str = "id"
+    ) -> bool:
+        """
+        Delete an item from a list file by ID.
+        
+        Returns:
+            True if deleted, False if not found.
+        """
+        return await self._run(self._delete_sync, filename, item_id, id_field)
+    
+    async def find_in_list(self, filename: str, **criteria: Any) -> List[Dict]:
+        """
+        Find items whose fields equal the given values.
+        Criteria on id, doctor_id, date and time use the table indexes.
+        """
+        return await self._run(self._find_sync, filename, criteria)
+    
+    async def migrate_from_json(self, data_dir: str) -> int:
+        """
+        Import every JSON file in a directory into the database.
+        Arrays become records, anything else is stored as a document.
+        
+        Args:
+            data_dir: Directory containing the *.json data files
+        
+        Returns:
+            Number of files imported.
+        """
+        imported = 0
+        for filename in sorted(await io_pool.run_io(os.listdir, data_dir)):
+            if not filename.endswith(".json"):
+                continue
+            
+            path = os.path.join(data_dir, filename)
+            try:
+                data = await io_pool.run_io(_load_json, path)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Skipping {filename} during migration: {e}")
+                continue
+            
+            await self.write(filename, data)
+            imported += 1
+            logger.info(f"Migrated {filename} into SQLite store")
+        
+        return imported
+    
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        for conn in self._connections:
+            conn.close()
+        self._connections.clear()
+        self._pool = queue.Queue()
+        self._opened = False
+
+
+if __name__ == "__main__":
+    # One-shot migration: python -m app.utils.sqlite_store
+    async def _migrate() -> None:
+        store = SqliteStore(settings.sqlite_path, pool_size=1)
+        await store.open(migrate=False)
+        count = await store.migrate_from_json(settings.data_dir)
+        await store.close()
+        io_pool.shutdown()
+        print(f"Migrated {count} files into {settings.sqlite_path}")
+    
+    asyncio.run(_migrate())
@@ -0,0 +1,43 @@
+"""
+Fast-path helpers for Twilio media stream messages.
+Media frames arrive ~50 times per second per call, so the hot path avoids
+building a dict for them and only falls back to json.loads when needed.
+"""
+
+from typing import Optional
+
+_MEDIA_MARKER = '"event":"media"'
+_PAYLOAD_MARKER = '"payload":"'
+
+
+def extract_media_payload(message: str) -> Optional[str]:
+    """
+    Pull the base64 audio payload out of a Twilio 'media' message.
+    
+    Only handles the compact form Twilio sends. Returns None for any
+    other event, or if the message doesn't look exactly as expected, in
+    which case the caller should parse it with json.loads.
+    
+    Args:
+        message: Raw text of a Twilio media stream message
+    
+    Returns:
+        The payload string, or None.
+    """
+    if _MEDIA_MARKER not in message:
+        return None
+    
+    start = message.find(_PAYLOAD_MARKER)
+    if start < 0:
+        return None
+    start += len(_PAYLOAD_MARKER)
+    
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    
+    payload = message[start:end]
+    if "\\" in payload:
+        # Escaped characters need a real JSON parser
+        return None
+    return payload
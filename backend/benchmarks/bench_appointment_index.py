@@ -0,0 +1,75 @@
+"""
+Benchmark: slot overlap checks via AppointmentIndex vs. a linear scan.
+
+Run from the backend directory:
+    python -m benchmarks.bench_appointment_index [appointment_count]
+"""
+
+import sys
+import random
+import timeit
+from datetime import date, timedelta
+
+from app.services.appointment_index import AppointmentIndex, DEFAULT_DURATION_MINUTES
+from app.utils.slot_grid import parse_time
+
+DOCTORS = ["dr-popescu", "dr-ionescu", "dr-dumitrescu"]
+TIMES = [f"{h:02d}:{m:02d}" for h in range(8, 18) for m in (0, 30)]
+SLOT_MINUTES = DEFAULT_DURATION_MINUTES
+
+
+def make_appointments(count: int) -> list:
+    """Generate `count` appointments spread over past and future days."""
+    start = date.today() - timedelta(days=count // (len(DOCTORS) * len(TIMES)))
+    appointments = []
+    for i in range(count):
+        day = start + timedelta(days=i // (len(DOCTORS) * len(TIMES)))
+        appointments.append({
+            "id": f"apt-{i:08x}",
+            "doctor_id": DOCTORS[i % len(DOCTORS)],
+            "date": day.isoformat(),
+            "time": TIMES[(i // len(DOCTORS)) % len(TIMES)],
+            "patient_phone": f"+4072{i % 100000:07d}",
+        })
+    return appointments
+
+
+def linear_overlaps(appointments: list, doctor_id: str, target_date: str, start: int, end: int) -> bool:
+    """The pre-index approach: scan every appointment."""
+    return any(
+        parse_time(apt["time"]) < end and start < parse_time(apt["time"]) + SLOT_MINUTES
+        for apt in appointments
+        if apt.get("doctor_id") == doctor_id and apt.get("date") == target_date
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    appointments = make_appointments(count)
+    queries = []
+    for _ in range(200):
+        start = parse_time(random.choice(TIMES))
+        queries.append((
+            random.choice(DOCTORS), random.choice(appointments)["date"], start, start + SLOT_MINUTES
+        ))
+    
+    build_s = timeit.timeit(lambda: AppointmentIndex().rebuild(appointments), number=1)
+    index = AppointmentIndex()
+    index.rebuild(appointments)
+    
+    linear_s = timeit.timeit(
+        lambda: [linear_overlaps(appointments, *q) for q in queries], number=1
+    )
+    indexed_s = timeit.timeit(
+        lambda: [index.overlaps(*q) for q in queries], number=100
+    ) / 100
+    
+    print(f"Appointments:        {count:,}")
+    print(f"Index rebuild:       {build_s * 1000:.1f} ms")
+    print(f"Linear slot check:   {linear_s / len(queries) * 1e6:,.1f} µs/query")
+    print(f"Indexed slot check:  {indexed_s / len(queries) * 1e6:,.3f} µs/query")
+    print(f"Speedup:             {linear_s / indexed_s:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: message rate and CPU for inbound audio at different batch sizes.
+
+Pushes `seconds` of 20 ms Twilio frames per call through AudioBatcher for
+`calls` calls and reports the OpenAI messages per second and the CPU
+spent per call-second, including building each append message, framing
+it as a WebSocket message and writing it to a socket.
+
+Run from the backend directory:
+    python -m benchmarks.bench_audio_batching [calls] [seconds]
+"""
+
+import sys
+import os
+import base64
+import asyncio
+import socket
+import time
+
+from websockets.frames import Frame, Opcode
+
+from app.services.audio_batcher import AudioBatcher, FRAME_MS
+
+PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+SUFFIX = '"}'
+
+
+async def run(batch_ms: int, frames: list, calls: int) -> dict:
+    messages = 0
+    writer, reader = socket.socketpair()
+    reader.setblocking(False)
+    
+    async def send(chunk: str) -> None:
+        nonlocal messages
+        messages += 1
+        text = PREFIX + chunk + SUFFIX
+        writer.send(Frame(Opcode.TEXT, text.encode("utf-8")).serialize(mask=True, extensions=[]))
+        if messages % 32 == 0:
+            # Keep the socket buffer from filling up
+            try:
+                while reader.recv(1 << 20):
+                    pass
+            except BlockingIOError:
+                pass
+    
+    batchers = [AudioBatcher(send, batch_ms) for _ in range(calls)]
+    start = time.process_time()
+    for frame in frames:
+        for batcher in batchers:
+            await batcher.add(frame)
+        # Let the loop run once per 20 ms tick, as it would live
+        await asyncio.sleep(0)
+    for batcher in batchers:
+        await batcher.close()
+    cpu = time.process_time() - start
+    writer.close()
+    reader.close()
+    
+    seconds = len(frames) * FRAME_MS / 1000
+    return {
+        "messages_per_second": messages / seconds / calls,
+        "cpu_us_per_call_second": cpu / seconds / calls * 1e6
+    }
+
+
+async def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    frames = [
+        base64.b64encode(os.urandom(160)).decode("ascii")
+        for _ in range(int(seconds * 1000 / FRAME_MS))
+    ]
+    
+    print(f"{calls} calls, {seconds:.0f} s of audio each")
+    print(f"{'batch':>8} {'msgs/s/call':>12} {'CPU µs per call-second':>24}")
+    for batch_ms in (20, 60, 100, 200):
+        # Best of three to keep scheduler noise out
+        runs = [await run(batch_ms, frames, calls) for _ in range(3)]
+        result = min(runs, key=lambda r: r["cpu_us_per_call_second"])
+        print(
+            f"{batch_ms:>6}ms {result['messages_per_second']:>12.1f} "
+            f"{result['cpu_us_per_call_second']:>24.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Benchmark: interruption-to-silence latency when the caller barges in.
+
+OpenAI streams a long answer faster than real time; a fake Twilio socket
+plays the media frames it receives in real time, like Twilio's outbound
+buffer. Partway through, the caller starts speaking
+(input_audio_buffer.speech_started) and we measure how long the caller
+keeps hearing the agent. Compares forwarding every delta straight to
+Twilio without interruption handling (the old behaviour) with the paced
+playout buffer plus cancel / clear / truncate.
+
+Run from the backend directory:
+    python -m benchmarks.bench_barge_in [answer_seconds] [interrupt_after_seconds]
+"""
+
+import sys
+import os
+import json
+import base64
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.services.call_handler import CallHandler
+from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.playout_buffer import PlayoutBuffer
+from app.services.audio_batcher import BYTES_PER_MS
+
+DELTA_MS = 200       # audio per response.audio.delta
+SPEEDUP = 4          # OpenAI generates audio this much faster than real time
+
+
+class FakeTwilio:
+    """Plays media frames in real time and honours 'clear'."""
+    
+    def __init__(self):
+        self.play_end = 0.0
+        self.sent_ms = 0.0
+        self.heard_ms: Optional[float] = None
+    
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        if message["event"] == "media":
+            ms = len(base64.b64decode(message["media"]["payload"])) / BYTES_PER_MS
+            self.play_end = max(self.play_end, now) + ms / 1000
+            self.sent_ms += ms
+        elif message["event"] == "clear":
+            self.heard_ms = self.sent_ms - max(0.0, self.play_end - now) * 1000
+            self.play_end = min(self.play_end, now)
+
+
+class LegacyHandler(CallHandler):
+    """Forwards audio as it arrives and ignores interruptions, like before."""
+    
+    async def _handle_openai_audio(self, audio_base64: str, item_id: Optional[str] = None) -> None:
+        await self._send_twilio_audio(audio_base64)
+    
+    async def _handle_interruption(self) -> None:
+        pass
+
+
+async def measure(handler_class: type, answer_s: float, interrupt_s: float) -> Dict[str, Any]:
+    twilio = FakeTwilio()
+    handler = handler_class("bench")
+    handler.twilio_ws = twilio
+    handler.stream_sid = "MZbench"
+    
+    service = OpenAIRealtimeService("bench")
+    service._connected = True
+    service.ws = object()  # only needs to be truthy; sends are queued
+    service.on_audio = handler._handle_openai_audio
+    service.on_interruption = handler._handle_interruption
+    handler.openai_service = service
+    
+    handler.playout = PlayoutBuffer(handler._send_twilio_audio, settings.playout_lead_ms)
+    handler.playout.start()
+    
+    delta = base64.b64encode(os.urandom(DELTA_MS * BYTES_PER_MS)).decode("ascii")
+    deltas = int(answer_s * 1000 / DELTA_MS)
+    
+    async def generate() -> None:
+        await service._process_message({"type": "response.created", "response": {"id": "resp_1"}})
+        for _ in range(deltas):
+            await service._process_message({
+                "type": "response.audio.delta",
+                "response_id": "resp_1",
+                "item_id": "item_1",
+                "delta": delta
+            })
+            await asyncio.sleep(DELTA_MS / 1000 / SPEEDUP)
+    
+    generator = asyncio.create_task(generate())
+    await asyncio.sleep(interrupt_s)
+    
+    interrupted_at = time.perf_counter()
+    await service._process_message({"type": "input_audio_buffer.speech_started"})
+    # Let in-flight deltas arrive and the playout task react
+    await asyncio.sleep(0.3)
+    generator.cancel()
+    
+    silence_at = max(twilio.play_end, interrupted_at)
+    await handler.playout.close()
+    
+    sent = []
+    while service._send_queue.stats["control_depth"]:
+        sent.append(json.loads(await service._send_queue.get()))
+    truncate = next((m for m in sent if m["type"] == "conversation.item.truncate"), None)
+    
+    return {
+        "latency_ms": (silence_at - interrupted_at) * 1000,
+        "queued_at_twilio_ms": twilio.sent_ms,
+        "cancelled": any(m["type"] == "response.cancel" for m in sent),
+        "truncate_ms": truncate["audio_end_ms"] if truncate else None,
+        "heard_ms": twilio.heard_ms
+    }
+
+
+async def main() -> None:
+    answer_s = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    interrupt_s = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    
+    legacy = await measure(LegacyHandler, answer_s, interrupt_s)
+    paced = await measure(CallHandler, answer_s, interrupt_s)
+    
+    print(f"{answer_s:.0f} s answer generated at {SPEEDUP}x real time, caller interrupts after {interrupt_s:.1f} s")
+    print(f"Forward all:  agent keeps talking {legacy['latency_ms']:8.1f} ms after barge-in "
+          f"({legacy['queued_at_twilio_ms']:.0f} ms of audio sent to Twilio)")
+    print(f"Playout:      agent keeps talking {paced['latency_ms']:8.1f} ms after barge-in "
+          f"({paced['queued_at_twilio_ms']:.0f} ms of audio sent to Twilio)")
+    print(f"              response.cancel sent: {paced['cancelled']}, "
+          f"truncated at {paced['truncate_ms']} ms, caller heard {paced['heard_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark: dashboard frames and CPU with batched multi-event frames.
+
+Serves `dashboards` real WebSocket connections over loopback and
+publishes bursts of `burst` events every `interval_ms`, standing in for a
+busy clinic (several calls streaming transcripts while the calendar
+changes). Compares sending one frame per event (the old send loop) with
+Subscriber.get_batch + batch_frame, and reports frames, CPU and the
+delay from publish to a dashboard receiving the event.
+
+Run from the backend directory:
+    python -m benchmarks.bench_dashboard_batching [dashboards] [bursts] [burst] [interval_ms]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from statistics import median
+from typing import Dict, List
+
+import websockets
+
+from app.services.event_bus import EventBus, Subscriber, batch_frame
+
+BATCH_MS = 10
+BATCH_MAX_BYTES = 65536
+
+
+async def send_each(ws, subscriber: Subscriber) -> int:
+    frames = 0
+    while True:
+        event = await subscriber.get()
+        if event.type == "shutdown":
+            return frames
+        await ws.send(event.frame)
+        frames += 1
+
+
+async def send_batched(ws, subscriber: Subscriber) -> int:
+    frames = 0
+    while True:
+        batch = await subscriber.get_batch(BATCH_MAX_BYTES, BATCH_MS)
+        if not batch:
+            return frames
+        await ws.send(batch_frame(batch))
+        frames += 1
+
+
+async def receive(url: str, expected: int, delays: List[float], ready: asyncio.Event) -> int:
+    frames = 0
+    events = 0
+    async with websockets.connect(url, max_size=None) as ws:
+        ready.set()
+        while events < expected:
+            parsed = json.loads(await ws.recv())
+            now = time.perf_counter()
+            frames += 1
+            for message in parsed if isinstance(parsed, list) else [parsed]:
+                delays.append((now - message["data"]["sent_at"]) * 1000)
+                events += 1
+    return frames
+
+
+async def run(sender, dashboards: int, bursts: int, burst: int, interval_ms: float) -> Dict[str, float]:
+    bus = EventBus(queue_max=bursts * burst, policy="drop_oldest", replay_size=0)
+    subscribers: List[Subscriber] = []
+    
+    async def handler(ws, *args) -> None:
+        subscriber = await bus.subscribe()
+        subscribers.append(subscriber)
+        await sender(ws, subscriber)
+    
+    server = await websockets.serve(handler, "127.0.0.1", 0, max_size=None)
+    url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    expected = bursts * burst
+    delays: List[float] = []
+    readies = [asyncio.Event() for _ in range(dashboards)]
+    clients = [asyncio.create_task(receive(url, expected, delays, r)) for r in readies]
+    for ready in readies:
+        await ready.wait()
+    while bus.subscriber_count < dashboards:
+        await asyncio.sleep(0.01)
+    
+    start = time.process_time()
+    for b in range(bursts):
+        for i in range(burst):
+            if i % 10 == 9:
+                await bus.publish("appointment_updated", {
+                    "appointment": {
+                        "id": f"appt-{b}", "doctor_id": "dr_popescu", "date": "2026-10-17",
+                        "time": "10:30", "status": "confirmed"
+                    },
+                    "sent_at": time.perf_counter()
+                })
+            else:
+                await bus.publish("transcript_agent", {
+                    "call_id": f"call-{i % 5}", "seq": b, "delta": "Avem liber mâine la ",
+                    "is_final": False, "sent_at": time.perf_counter()
+                })
+        await asyncio.sleep(interval_ms / 1000)
+    received = await asyncio.gather(*clients)
+    cpu = time.process_time() - start
+    batch_sizes = subscribers[0].stats["batch_sizes"]
+    
+    await bus.shutdown()
+    server.close()
+    await server.wait_closed()
+    return {
+        "frames": sum(received) / dashboards,
+        "cpu_ms": cpu * 1000,
+        "p50_ms": median(delays),
+        "max_ms": max(delays),
+        "batch_sizes": {size: count for size, count in batch_sizes.items() if count}
+    }
+
+
+async def main() -> None:
+    dashboards = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    bursts = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    burst = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    interval_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 20
+    
+    print(f"{dashboards} dashboards, {bursts} bursts of {burst} events every {interval_ms:.0f} ms")
+    for name, sender in (("Frame per event", send_each), (f"Batched ({BATCH_MS} ms)", send_batched)):
+        r = await run(sender, dashboards, bursts, burst, interval_ms)
+        print(f"{name:>16}: {r['frames']:6.0f} frames per dashboard, {r['cpu_ms']:7.0f} ms CPU, "
+              f"delay p50 {r['p50_ms']:5.1f} ms, max {r['max_ms']:6.1f} ms")
+        if r["batch_sizes"]:
+            print(f"{'':>16}  batch sizes (events <= bucket: batches): {r['batch_sizes']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark: a reconnect storm after a network blip.
+
+`dashboards` dashboards drop off while `missed` events are published, then
+all reconnect at once. Compares every dashboard re-fetching /api/config
+(the old behaviour) with resuming from its last_seq out of the event bus's
+replay buffer, and with the snapshot fallback when the gap was evicted.
+Counts store reads (cache hits and misses) and bytes sent. Only reads the
+data files.
+
+Run from the backend directory:
+    python -m benchmarks.bench_dashboard_resume [dashboards] [missed]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from typing import Dict
+
+from app.utils.json_store import json_store
+from app.routers.config import get_config
+from app.routers.websockets import _snapshot_frame
+from app.services.event_bus import EventBus
+
+
+def store_reads() -> int:
+    stats = json_store.cache_stats
+    return stats["hits"] + stats["misses"]
+
+
+async def publish_blip(bus: EventBus, missed: int) -> None:
+    for i in range(missed):
+        await bus.publish_transcript_delta("bench-call", i + 1, "Avem liber la ", False)
+
+
+async def refetch(dashboards: int, missed: int) -> Dict[str, float]:
+    bus = EventBus(replay_size=0)
+    await publish_blip(bus, missed)
+    reads, sent = store_reads(), 0
+    start = time.process_time()
+    for _ in range(dashboards):
+        subscriber = await bus.subscribe()
+        config = await get_config()
+        sent += len(json.dumps(config, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        await bus.unsubscribe(subscriber)
+    return {"cpu_ms": (time.process_time() - start) * 1000, "reads": store_reads() - reads, "kb": sent / 1024}
+
+
+async def resume(dashboards: int, missed: int, replay_size: int) -> Dict[str, float]:
+    bus = EventBus(replay_size=replay_size)
+    last_seq = bus.seq
+    await publish_blip(bus, missed)
+    reads, sent = store_reads(), 0
+    start = time.process_time()
+    for _ in range(dashboards):
+        subscriber, seq, replay = await bus.resume(bus.epoch, last_seq)
+        if replay is None:
+            sent += len((await _snapshot_frame(seq)).encode("utf-8"))
+        else:
+            sent += sum(len(event.frame.encode("utf-8")) for event in replay)
+        await bus.unsubscribe(subscriber)
+    return {
+        "cpu_ms": (time.process_time() - start) * 1000,
+        "reads": store_reads() - reads,
+        "kb": sent / 1024,
+        "snapshots": bus.snapshots
+    }
+
+
+async def main() -> None:
+    dashboards = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    missed = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    # Warm the store cache so every path starts from the same state
+    await get_config()
+    
+    old = await refetch(dashboards, missed)
+    new = await resume(dashboards, missed, replay_size=1000)
+    evicted = await resume(dashboards, missed, replay_size=missed // 2)
+    assert new["snapshots"] == 0 and evicted["snapshots"] == dashboards
+    
+    print(f"{dashboards} dashboards reconnecting after missing {missed} events")
+    for name, r in (("Re-fetch config", old), ("Replay gap", new), ("Snapshot fallback", evicted)):
+        print(f"{name:>18}: {r['cpu_ms']:7.1f} ms CPU, {r['reads']:5d} store reads, {r['kb']:8.1f} KB sent")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
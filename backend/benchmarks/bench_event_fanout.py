@@ -0,0 +1,141 @@
+"""
+Benchmark: CPU to fan one event out to N dashboard subscribers.
+
+Publishes transcript and appointment events to N subscribers, each drained
+by a task that stands in for `_handle_dashboard_send`. Compares the old
+path (a dict on every queue, encoded by send_json once per dashboard) with
+EncodedEvent (encoded once at publish, sent as the same text frame).
+
+Run from the backend directory:
+    python -m benchmarks.bench_event_fanout [events]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.services.event_bus import EventBus, EncodedEvent
+
+SUBSCRIBER_COUNTS = (1, 50, 500)
+
+APPOINTMENT = {
+    "id": "a1b2c3d4",
+    "patient_name": "Ion Popescu",
+    "phone": "+40712345678",
+    "doctor_id": "dr_popescu",
+    "service_id": "consultatie",
+    "date": "2026-10-17",
+    "time": "10:30",
+    "notes": "Durere la măseaua de minte",
+    "status": "confirmed"
+}
+
+
+class FakeWebSocket:
+    """Counts bytes the way starlette's send_json / send_text would produce them."""
+    
+    def __init__(self):
+        self.sent = 0
+    
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        self.sent += len(text.encode("utf-8"))
+    
+    async def send_text(self, text: str) -> None:
+        self.sent += len(text.encode("utf-8"))
+
+
+class DictBus(EventBus):
+    """Puts the event dict on every queue, like before."""
+    
+    async def subscribe(self, name: str = "") -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue
+    
+    async def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        event = {
+            "type": event_type,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": data
+        }
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+    
+    async def shutdown(self) -> None:
+        for queue in self._subscribers:
+            queue.put_nowait({"type": "shutdown"})
+        self._subscribers.clear()
+
+
+async def drain_dicts(queue: asyncio.Queue, websocket: FakeWebSocket) -> None:
+    while True:
+        event = await queue.get()
+        if event.get("type") == "shutdown":
+            return
+        await websocket.send_json(event)
+
+
+async def drain_frames(queue: asyncio.Queue, websocket: FakeWebSocket) -> None:
+    while True:
+        event = await queue.get()
+        if event.type == "shutdown":
+            return
+        await websocket.send_text(event.frame)
+
+
+def make_events(count: int) -> List[tuple]:
+    events = []
+    for i in range(count):
+        if i % 10 == 0:
+            events.append(("appointment_created", {"appointment": dict(APPOINTMENT, id=str(i))}))
+        else:
+            events.append(("transcript_agent", {
+                "call_id": "9f1c2e4a-5b6d-4e8f-a0b1-c2d3e4f5a6b7",
+                "text": f"Avem liber mâine la ora {i % 12 + 8}:30, vă convine?",
+                "is_final": True
+            }))
+    return events
+
+
+async def run(bus: EventBus, drain, subscribers: int, events: List[tuple]) -> float:
+    sockets = [FakeWebSocket() for _ in range(subscribers)]
+    queues = [await bus.subscribe() for _ in range(subscribers)]
+    tasks = [asyncio.create_task(drain(q, ws)) for q, ws in zip(queues, sockets)]
+    
+    start = time.process_time()
+    for event_type, data in events:
+        await bus.publish(event_type, data)
+        # Let subscribers send, as the server would between publishes
+        await asyncio.sleep(0)
+    await bus.shutdown()
+    await asyncio.gather(*tasks)
+    cpu = time.process_time() - start
+    
+    assert len({ws.sent for ws in sockets}) == 1
+    return cpu / len(events) * 1e6
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    events = make_events(count)
+    
+    # Both paths must put the same event on the wire
+    old_socket = FakeWebSocket()
+    encoded = EncodedEvent.encode(*events[0])
+    await old_socket.send_json(json.loads(encoded.frame))
+    assert old_socket.sent == len(encoded.frame.encode("utf-8"))
+    
+    print(f"{count} events per run, CPU per published event")
+    print(f"{'subscribers':>12} {'encode per send':>16} {'encode once':>12} {'speedup':>8}")
+    for subscribers in SUBSCRIBER_COUNTS:
+        old = min([await run(DictBus(), drain_dicts, subscribers, events) for _ in range(3)])
+        new = min([await run(EventBus(), drain_frames, subscribers, events) for _ in range(3)])
+        print(f"{subscribers:>12} {old:>13.1f} µs {new:>9.1f} µs {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark: duration-aware overlap and gap queries via AppointmentIndex
+vs. a linear scan over all appointments.
+
+Run from the backend directory:
+    python -m benchmarks.bench_interval_index [appointment_count]
+"""
+
+import sys
+import random
+import timeit
+from datetime import date, timedelta
+
+from app.services.appointment_index import AppointmentIndex
+from app.utils.slot_grid import get_slot_grid, parse_time
+
+DOCTORS = ["dr-popescu", "dr-ionescu", "dr-dumitrescu"]
+DURATIONS = {"consultatie": 30, "implant": 60, "aparat-dentar": 90}
+TIMES = [f"{h:02d}:{m:02d}" for h in range(8, 18) for m in (0, 30)]
+GRID = get_slot_grid("08:00", "18:00", 30)
+
+
+def make_appointments(count: int) -> list:
+    """Generate `count` non-overlapping appointments of mixed durations."""
+    appointments = []
+    day = date.today() - timedelta(days=count // 30)
+    while len(appointments) < count:
+        for doctor_id in DOCTORS:
+            minute = GRID.start_minute
+            while minute < GRID.end_minute and len(appointments) < count:
+                service_id = random.choice(list(DURATIONS))
+                if random.random() < 0.7 and minute + DURATIONS[service_id] <= GRID.end_minute:
+                    appointments.append({
+                        "id": f"apt-{len(appointments):08x}",
+                        "doctor_id": doctor_id,
+                        "date": day.isoformat(),
+                        "time": f"{minute // 60:02d}:{minute % 60:02d}",
+                        "service_id": service_id,
+                    })
+                    minute += DURATIONS[service_id]
+                else:
+                    minute += GRID.slot_minutes
+        day += timedelta(days=1)
+    return appointments
+
+
+def linear_spans(appointments: list, doctor_id: str, target_date: str) -> list:
+    """The pre-index approach: scan every appointment for the doctor's day."""
+    spans = []
+    for apt in appointments:
+        if apt.get("doctor_id") == doctor_id and apt.get("date") == target_date:
+            start = parse_time(apt["time"])
+            spans.append((start, start + DURATIONS.get(apt.get("service_id"), 30)))
+    return spans
+
+
+def linear_overlaps(appointments: list, doctor_id: str, target_date: str, start: int, end: int) -> bool:
+    return any(s < end and start < e for s, e in linear_spans(appointments, doctor_id, target_date))
+
+
+def linear_earliest_gap(appointments: list, doctor_id: str, target_date: str, length: int):
+    spans = linear_spans(appointments, doctor_id, target_date)
+    for start in range(GRID.start_minute, GRID.end_minute - length + 1, GRID.slot_minutes):
+        if not any(s < start + length and start < e for s, e in spans):
+            return start
+    return None
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    appointments = make_appointments(count)
+    index = AppointmentIndex(durations=DURATIONS)
+    index.rebuild(appointments)
+    
+    overlap_queries = []
+    gap_queries = []
+    for _ in range(200):
+        doctor_id = random.choice(DOCTORS)
+        target_date = random.choice(appointments)["date"]
+        start = parse_time(random.choice(TIMES))
+        overlap_queries.append((doctor_id, target_date, start, start + random.choice([30, 60, 90])))
+        gap_queries.append((doctor_id, target_date, random.choice([30, 60, 90])))
+    
+    # Both approaches must agree before timing them
+    for q in overlap_queries:
+        assert index.overlaps(*q) == linear_overlaps(appointments, *q)
+    for doctor_id, target_date, length in gap_queries:
+        assert (index.earliest_gap(doctor_id, target_date, length, GRID)
+                == linear_earliest_gap(appointments, doctor_id, target_date, length))
+    
+    linear_overlap_s = timeit.timeit(
+        lambda: [linear_overlaps(appointments, *q) for q in overlap_queries], number=1
+    )
+    indexed_overlap_s = timeit.timeit(
+        lambda: [index.overlaps(*q) for q in overlap_queries], number=100
+    ) / 100
+    linear_gap_s = timeit.timeit(
+        lambda: [linear_earliest_gap(appointments, *q) for q in gap_queries], number=1
+    )
+    indexed_gap_s = timeit.timeit(
+        lambda: [index.earliest_gap(d, t, length, GRID) for d, t, length in gap_queries], number=100
+    ) / 100
+    
+    print(f"Appointments:         {count:,}")
+    print(f"Linear overlap check: {linear_overlap_s / len(overlap_queries) * 1e6:,.1f} µs/query")
+    print(f"Indexed overlap:      {indexed_overlap_s / len(overlap_queries) * 1e6:,.3f} µs/query")
+    print(f"Speedup:              {linear_overlap_s / indexed_overlap_s:,.0f}x")
+    print(f"Linear earliest gap:  {linear_gap_s / len(gap_queries) * 1e6:,.1f} µs/query")
+    print(f"Indexed earliest gap: {indexed_gap_s / len(gap_queries) * 1e6:,.3f} µs/query")
+    print(f"Speedup:              {linear_gap_s / indexed_gap_s:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
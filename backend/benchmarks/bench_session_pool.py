@@ -0,0 +1,144 @@
+"""
+Benchmark: time-to-greeting with and without the realtime session pool.
+
+Starts a local mock of the OpenAI Realtime endpoint that delays the
+WebSocket handshake by `handshake_ms` (standing in for TCP + TLS + upgrade
+round trips) and answers response.create with its first audio delta after
+`model_ms`. For each simulated call it measures the time from Twilio's
+'start' until the first agent audio arrives: connecting a new session per
+call (the old behaviour) versus taking a pre-connected one from the pool.
+
+Run from the backend directory:
+    python -m benchmarks.bench_session_pool [calls] [handshake_ms] [model_ms]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from statistics import median
+from typing import List
+
+import websockets
+
+from app.config import settings
+from app.utils.prompt_builder import get_tool_definitions
+from app.services.availability import availability_view
+from app.services.openai_realtime import OpenAIRealtimeService
+from app.services.session_pool import RealtimeSessionPool
+
+
+class MockRealtimeServer:
+    """Just enough of the Realtime API to configure a session and greet."""
+    
+    def __init__(self, handshake_ms: float, model_ms: float):
+        self.handshake_ms = handshake_ms
+        self.model_ms = model_ms
+        self.connections = 0
+        # session.update messages after a connection's first one
+        self.reconfigured = 0
+    
+    async def process_request(self, *args) -> None:
+        # Accepts both the legacy (path, headers) and new (connection, request) hooks
+        self.connections += 1
+        await asyncio.sleep(self.handshake_ms / 1000)
+        return None
+    
+    async def handler(self, ws, *args) -> None:
+        await ws.send(json.dumps({"type": "session.created"}))
+        configured = False
+        async for raw in ws:
+            message = json.loads(raw)
+            if message["type"] == "session.update":
+                self.reconfigured += configured
+                configured = True
+                await ws.send(json.dumps({"type": "session.updated"}))
+            elif message["type"] == "response.create":
+                await ws.send(json.dumps({"type": "response.created", "response": {"id": "resp_1"}}))
+                await asyncio.sleep(self.model_ms / 1000)
+                await ws.send(json.dumps({
+                    "type": "response.audio.delta",
+                    "response_id": "resp_1",
+                    "item_id": "item_1",
+                    "delta": "//////////8="
+                }))
+
+
+async def greet(service: OpenAIRealtimeService) -> None:
+    """Ask for the greeting and wait for its first audio."""
+    await service._send({"type": "response.create"})
+    while True:
+        message = json.loads(await service.ws.recv())
+        if message["type"] == "response.audio.delta":
+            return
+
+
+async def cold_call(call_id: str) -> float:
+    start = time.perf_counter()
+    system_prompt = await availability_view.get_system_prompt()
+    service = OpenAIRealtimeService(call_id)
+    if not await service.connect(system_prompt, get_tool_definitions()):
+        raise RuntimeError("connect to mock server failed")
+    await greet(service)
+    elapsed = time.perf_counter() - start
+    await service.disconnect()
+    return elapsed * 1000
+
+
+async def warm_call(pool: RealtimeSessionPool, call_id: str) -> float:
+    start = time.perf_counter()
+    service = pool.take(None, call_id)
+    if service is None:
+        raise RuntimeError("pool was empty")
+    system_prompt = await availability_view.get_system_prompt(service.greeting)
+    await service.update_session(system_prompt, get_tool_definitions())
+    await greet(service)
+    elapsed = time.perf_counter() - start
+    await service.disconnect()
+    return elapsed * 1000
+
+
+async def wait_for_idle(pool: RealtimeSessionPool) -> None:
+    while pool.stats["idle"] < pool.size:
+        await asyncio.sleep(0.01)
+
+
+async def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    handshake_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    model_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 250
+    
+    mock = MockRealtimeServer(handshake_ms, model_ms)
+    server = await websockets.serve(
+        mock.handler, "127.0.0.1", 0, process_request=mock.process_request
+    )
+    port = server.sockets[0].getsockname()[1]
+    settings.openai_realtime_url = f"ws://127.0.0.1:{port}/v1/realtime"
+    settings.openai_api_key = settings.openai_api_key or "bench"
+    
+    cold: List[float] = [await cold_call(f"cold-{i}") for i in range(calls)]
+    
+    pool = RealtimeSessionPool(size=2, max_idle_s=300)
+    await pool.startup()
+    warm: List[float] = []
+    for i in range(calls):
+        # Calls arrive further apart than a refill takes
+        await wait_for_idle(pool)
+        warm.append(await warm_call(pool, f"warm-{i}"))
+    # Don't close the server under a refill's handshake
+    await wait_for_idle(pool)
+    stats = pool.stats
+    await pool.shutdown()
+    
+    server.close()
+    await server.wait_closed()
+    
+    print(f"Mock server: {handshake_ms:.0f} ms handshake, first audio {model_ms:.0f} ms after response.create")
+    print(f"Connect per call:  median {median(cold):6.1f} ms, max {max(cold):6.1f} ms to first audio")
+    print(f"Session pool:      median {median(warm):6.1f} ms, max {max(warm):6.1f} ms to first audio")
+    print(f"Pool: {stats['hits']} hits, {stats['misses']} misses, "
+          f"session.update resent on {mock.reconfigured} of {calls} checkouts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
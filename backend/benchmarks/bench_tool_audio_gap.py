@@ -0,0 +1,95 @@
+"""
+Benchmark: longest gap in forwarded audio while a slow function call runs.
+
+Feeds OpenAIRealtimeService a stream of response.audio.delta messages
+every 20 ms, with a function call in the middle whose handler takes
+`tool_ms`, and measures the longest pause between on_audio callbacks.
+Compares awaiting the function inline (the old behaviour) with the
+background dispatch, and fails if any audio is lost or the background
+gap exceeds MAX_GAP_FRAMES frames.
+
+Run from the backend directory:
+    python -m benchmarks.bench_tool_audio_gap [tool_ms]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services.openai_realtime import OpenAIRealtimeService
+
+FRAME_MS = 20
+FRAMES = 60
+# Allowed background gap, in frames, for event loop scheduling jitter
+MAX_GAP_FRAMES = 3
+
+
+class InlineService(OpenAIRealtimeService):
+    """Awaits function calls on the receive loop, like before."""
+    
+    async def _handle_function_call(self, message: Dict[str, Any]) -> None:
+        await self._run_function_call(message)
+
+
+async def measure(service_class: type, tool_ms: float) -> Dict[str, float]:
+    service = service_class("bench")
+    service._connected = True
+    service.ws = object()  # only needs to be truthy; sends are queued
+    
+    arrivals: List[float] = []
+    results: List[str] = []
+    
+    async def on_audio(delta: str, item_id: Optional[str] = None) -> None:
+        arrivals.append(time.perf_counter())
+    
+    async def on_function_call(name: str, arguments: Dict) -> str:
+        await asyncio.sleep(tool_ms / 1000)
+        results.append(name)
+        return json.dumps({"success": True})
+    
+    service.on_audio = on_audio
+    service.on_function_call = on_function_call
+    
+    # Simulated receive loop: one message every FRAME_MS
+    for i in range(FRAMES):
+        if i == FRAMES // 3:
+            await service._process_message({
+                "type": "response.function_call_arguments.done",
+                "name": "create_appointment",
+                "call_id": "call-1",
+                "arguments": "{}"
+            })
+        await service._process_message({"type": "response.audio.delta", "delta": "AAAA"})
+        await asyncio.sleep(FRAME_MS / 1000)
+    
+    while not results:
+        await asyncio.sleep(0.01)
+    
+    assert len(arrivals) == FRAMES, f"{FRAMES - len(arrivals)} of {FRAMES} audio deltas were not forwarded"
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    return {
+        "max_gap_ms": max(gaps) * 1000,
+        "avg_gap_ms": sum(gaps) / len(gaps) * 1000
+    }
+
+
+async def main() -> None:
+    tool_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 300
+    
+    inline = await measure(InlineService, tool_ms)
+    background = await measure(OpenAIRealtimeService, tool_ms)
+    
+    print(f"Function call duration: {tool_ms:.0f} ms, audio every {FRAME_MS} ms")
+    print(f"Inline:      max gap {inline['max_gap_ms']:7.1f} ms, avg {inline['avg_gap_ms']:5.1f} ms")
+    print(f"Background:  max gap {background['max_gap_ms']:7.1f} ms, avg {background['avg_gap_ms']:5.1f} ms")
+    
+    assert background["max_gap_ms"] <= FRAME_MS * MAX_GAP_FRAMES, (
+        f"audio stalled for {background['max_gap_ms']:.1f} ms during a background function call "
+        f"(limit {FRAME_MS * MAX_GAP_FRAMES} ms)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
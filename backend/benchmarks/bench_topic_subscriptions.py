@@ -0,0 +1,145 @@
+"""
+Benchmark: event-bus CPU and deliveries with topic subscriptions.
+
+Publishes the traffic of `calls` concurrent calls (agent transcript deltas,
+caller turns) plus appointment changes to 50 dashboards:
+40 calendar views each following one doctor and 10 following one call.
+Compares broadcasting everything (each dashboard throws away what it
+doesn't show), scanning every subscriber's filter on each publish, and
+the bus's topic index, which only looks at the subscribers that asked.
+
+Run from the backend directory:
+    python -m benchmarks.bench_topic_subscriptions [calls] [events]
+"""
+
+import sys
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.services.event_bus import EventBus, Subscriber, event_topics
+
+DOCTORS = [f"dr_{i:02d}" for i in range(8)]
+CALENDAR_DASHBOARDS = 40
+CALL_DASHBOARDS = 10
+APPOINTMENT_TYPES = ["appointment_created", "appointment_updated", "appointment_deleted"]
+
+
+class ScanBus(EventBus):
+    """Checks every subscriber's filter on every publish."""
+    
+    def _interested(self, event_type: str, data: Dict[str, Any]) -> List[Subscriber]:
+        topics = event_topics(event_type, data)
+        return [s for s in self._subscribers if s.matches(topics)]
+
+
+def make_events(calls: int, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for i in range(count):
+        call_id = f"call-{i % calls:03d}"
+        if i % 20 == 0:
+            doctor_id = DOCTORS[i // 20 % len(DOCTORS)]
+            events.append(("appointment_updated", {"appointment": {
+                "id": f"appt-{i}",
+                "patient_name": "Ion Popescu",
+                "doctor_id": doctor_id,
+                "service_id": "consultatie",
+                "date": "2026-10-17",
+                "time": "10:30",
+                "status": "confirmed"
+            }}))
+        elif i % 5 == 0:
+            events.append(("transcript_user", {
+                "call_id": call_id, "text": "Aș vrea o programare mâine.", "is_final": True
+            }))
+        else:
+            events.append(("transcript_agent", {
+                "call_id": call_id, "seq": i, "delta": "Avem liber la ", "is_final": False
+            }))
+    return events
+
+
+def dashboard_filters(calls: int) -> List[Dict[str, List[str]]]:
+    filters = [
+        {"type": APPOINTMENT_TYPES, "doctor_id": [DOCTORS[i % len(DOCTORS)]]}
+        for i in range(CALENDAR_DASHBOARDS)
+    ]
+    filters += [{"call_id": [f"call-{i % calls:03d}"]} for i in range(CALL_DASHBOARDS)]
+    return filters
+
+
+async def drain(subscriber: Subscriber, wanted: Dict[str, List[str]], counters: Dict[str, int]) -> None:
+    # Stands in for _handle_dashboard_send plus the dashboard's own filtering
+    probe = Subscriber(1, "drop_oldest")
+    probe.topics = {d: frozenset(v) for d, v in wanted.items()}
+    while True:
+        event = await subscriber.get()
+        if event.type == "shutdown":
+            return
+        counters["sent"] += 1
+        counters["bytes"] += len(event.frame.encode("utf-8"))
+        if probe.matches(event_topics(event.type, event.data)):
+            counters["used"] += 1
+
+
+async def run(bus: EventBus, filtered: bool, calls: int, events: List[tuple]) -> Dict[str, float]:
+    filters = dashboard_filters(calls)
+    subscribers = [await bus.subscribe() for _ in filters]
+    if filtered:
+        for subscriber, topics in zip(subscribers, filters):
+            await bus.set_topics(subscriber, topics)
+    counters = [{"sent": 0, "bytes": 0, "used": 0} for _ in subscribers]
+    tasks = [
+        asyncio.create_task(drain(s, f, c))
+        for s, f, c in zip(subscribers, filters, counters)
+    ]
+    
+    start = time.process_time()
+    publish = 0.0
+    for event_type, data in events:
+        t = time.process_time()
+        await bus.publish(event_type, data)
+        publish += time.process_time() - t
+        await asyncio.sleep(0)
+    await bus.shutdown()
+    await asyncio.gather(*tasks)
+    cpu = time.process_time() - start
+    
+    return {
+        "publish_us": publish / len(events) * 1e6,
+        "cpu_us": cpu / len(events) * 1e6,
+        "sent": sum(c["sent"] for c in counters),
+        "used": sum(c["used"] for c in counters),
+        "kb": sum(c["bytes"] for c in counters) / 1024
+    }
+
+
+async def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    events = make_events(calls, count)
+    
+    results = {}
+    for name, bus_class, filtered in (
+        ("Broadcast", EventBus, False),
+        ("Scan filters", ScanBus, True),
+        ("Topic index", EventBus, True)
+    ):
+        runs = [await run(bus_class(queue_max=count, policy="drop_oldest"), filtered, calls, events)
+                for _ in range(3)]
+        results[name] = min(runs, key=lambda r: r["cpu_us"])
+    
+    # Filtering must not lose anything a dashboard shows
+    assert results["Topic index"]["used"] == results["Broadcast"]["used"]
+    assert results["Topic index"]["sent"] == results["Topic index"]["used"]
+    
+    print(f"{count} events from {calls} calls, {CALENDAR_DASHBOARDS} calendar + "
+          f"{CALL_DASHBOARDS} call dashboards")
+    print(f"{'':>13} {'publish':>10} {'total CPU':>10} {'frames sent':>12} {'used':>7} {'KB sent':>9}")
+    for name, r in results.items():
+        print(f"{name:>13} {r['publish_us']:>7.1f} µs {r['cpu_us']:>7.1f} µs "
+              f"{r['sent']:>12} {r['used']:>7} {r['kb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark: dashboard bytes and event-bus CPU for one long agent answer.
+
+Feeds the agent transcript of a long answer (the agent reading out a list
+of free slots) a few characters at a time, every `delta_ms`, to `dashboards`
+subscribers. Compares republishing the whole text so far once it passes 50
+characters (the old behaviour) with TranscriptStream's coalesced deltas,
+and checks that a dashboard can rebuild the exact text from the deltas.
+
+Run from the backend directory:
+    python -m benchmarks.bench_transcript_deltas [dashboards] [delta_ms]
+"""
+
+import sys
+import json
+import asyncio
+import time
+from typing import Dict, List
+
+from app.config import settings
+from app.services.event_bus import event_bus
+from app.services.transcript_stream import TranscriptStream, SENTENCE_END
+
+ANSWER = (
+    "Doctorul Popescu are liber mâine la " + ", ".join(
+        f"{hour:02d}:{minute:02d}" for hour in range(9, 17) for minute in (0, 30)
+    ) + ". Doctorița Ionescu are liber joi la " + ", ".join(
+        f"{hour:02d}:{minute:02d}" for hour in range(10, 18) for minute in (0, 30)
+    ) + ". Care dintre aceste ore vă convine cel mai bine pentru consultație?"
+)
+TOKEN_CHARS = 4
+
+
+class OldAgentTranscript:
+    """Republishes the whole buffer, like the old CallHandler."""
+    
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.buffer = ""
+    
+    async def add(self, delta: str) -> None:
+        self.buffer += delta
+        if len(self.buffer) > 50 or delta.endswith(SENTENCE_END):
+            await event_bus.publish_transcript(
+                self.call_id, self.buffer, is_user=False,
+                is_final=delta.endswith(SENTENCE_END)
+            )
+            if delta.endswith(SENTENCE_END):
+                self.buffer = ""
+    
+    async def close(self) -> None:
+        pass
+
+
+async def drain(subscriber, counters: Dict[str, int], rebuilt: List[str]) -> None:
+    message = ""
+    while True:
+        event = await subscriber.get()
+        if event.type == "shutdown":
+            return
+        counters["events"] += 1
+        counters["bytes"] += len(event.frame.encode("utf-8"))
+        data = json.loads(event.frame)["data"]
+        if "delta" in data:
+            message += data["delta"]
+            if data["is_final"]:
+                assert message == data["text"]
+                rebuilt.append(message)
+                message = ""
+
+
+async def run(stream_class, dashboards: int, delta_ms: float) -> Dict[str, float]:
+    subscribers = [await event_bus.subscribe() for _ in range(dashboards)]
+    counters = [{"events": 0, "bytes": 0} for _ in subscribers]
+    rebuilt: List[List[str]] = [[] for _ in subscribers]
+    tasks = [
+        asyncio.create_task(drain(s, c, r))
+        for s, c, r in zip(subscribers, counters, rebuilt)
+    ]
+    
+    stream = stream_class("bench-call")
+    tokens = [ANSWER[i:i + TOKEN_CHARS] for i in range(0, len(ANSWER), TOKEN_CHARS)]
+    start = time.process_time()
+    for token in tokens:
+        await stream.add(token)
+        await asyncio.sleep(delta_ms / 1000)
+    await stream.close()
+    await asyncio.sleep(0.01)
+    cpu = time.process_time() - start
+    
+    for subscriber in subscribers:
+        subscriber.close()
+        await event_bus.unsubscribe(subscriber)
+    await asyncio.gather(*tasks)
+    
+    if stream_class is not OldAgentTranscript:
+        assert "".join(rebuilt[0]) == ANSWER, "deltas did not rebuild the answer"
+    return {
+        "events": counters[0]["events"],
+        "kb_per_dashboard": counters[0]["bytes"] / 1024,
+        "cpu_ms": cpu * 1000
+    }
+
+
+async def main() -> None:
+    dashboards = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    delta_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    
+    old = await run(OldAgentTranscript, dashboards, delta_ms)
+    new = await run(
+        lambda call_id: TranscriptStream(call_id, settings.transcript_coalesce_ms),
+        dashboards, delta_ms
+    )
+    
+    print(f"{len(ANSWER)} character answer in {TOKEN_CHARS}-character deltas every {delta_ms:.0f} ms, "
+          f"{dashboards} dashboards")
+    print(f"Whole text:  {old['events']:4d} events, {old['kb_per_dashboard']:7.1f} KB per dashboard, "
+          f"{old['cpu_ms']:6.1f} ms CPU")
+    print(f"Deltas:      {new['events']:4d} events, {new['kb_per_dashboard']:7.1f} KB per dashboard, "
+          f"{new['cpu_ms']:6.1f} ms CPU  ({settings.transcript_coalesce_ms:.0f} ms window)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
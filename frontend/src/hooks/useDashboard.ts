@@ -1,7 +1,7 @@
 import { useEffect, useRef, useCallback } from 'react';
 import { useConversationStore } from '@/stores/conversationStore';
 import { useScheduleStore } from '@/stores/scheduleStore';
-import type { DashboardEvent, TranscriptData, CallStartedData, CallEndedData, AppointmentEventData } from '@/types';
+import type { DashboardEvent, TopicFilter, TranscriptData, AgentTranscriptData, CallStartedData, CallEndedData, AppointmentEventData, ConnectionStatusData, ConfigResponse } from '@/types';
 
 const WS_URL = `${window.location.protocol === 'https:' ? 'wss:' : 'ws:'}//${window.location.host}/ws/dashboard`;
 const RECONNECT_DELAY = 3000;
@@ -11,9 +11,14 @@ export function useDashboardWebSocket() {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectAttempts = useRef(0);
   const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // Topic filter to restore after a reconnect; null receives every event
+  const topicFilterRef = useRef<TopicFilter | null>(null);
+  // Last event seen, so a reconnect only receives what was missed
+  const epochRef = useRef<string | null>(null);
+  const lastSeqRef = useRef<number | null>(null);
   
-  const { setConnected, startCall, endCall, addUserMessage, addAgentMessage, updateLastAgentMessage } = useConversationStore();
-  const { addAppointment, updateAppointment, removeAppointment } = useScheduleStore();
+  const { setConnected, startCall, endCall, addUserMessage, applyAgentDelta } = useConversationStore();
+  const { setConfig, addAppointment, updateAppointment, removeAppointment } = useScheduleStore();
   
   const connect = useCallback(() => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
@@ -23,7 +28,17 @@ export function useDashboardWebSocket() {
     console.log('Connecting to dashboard WebSocket...');
     
     try {
-      wsRef.current = new WebSocket(WS_URL);
+      // Resume and filter from the start, so the replay only has what we show
+      const params = new URLSearchParams();
+      if (epochRef.current && lastSeqRef.current !== null) {
+        params.set('epoch', epochRef.current);
+        params.set('last_seq', String(lastSeqRef.current));
+      }
+      if (topicFilterRef.current) {
+        params.set('topics', JSON.stringify(topicFilterRef.current));
+      }
+      const query = params.toString();
+      wsRef.current = new WebSocket(query ? `${WS_URL}?${query}` : WS_URL);
       
       wsRef.current.onopen = () => {
         console.log('Dashboard WebSocket connected');
@@ -52,8 +67,15 @@ export function useDashboardWebSocket() {
       
       wsRef.current.onmessage = (event) => {
         try {
-          const message: DashboardEvent = JSON.parse(event.data);
-          handleMessage(message);
+          // Events that queued up together arrive as one array frame
+          const parsed: DashboardEvent | DashboardEvent[] = JSON.parse(event.data);
+          const messages = Array.isArray(parsed) ? parsed : [parsed];
+          for (const message of messages) {
+            if (message.seq !== undefined) {
+              lastSeqRef.current = message.seq;
+            }
+            handleMessage(message);
+          }
         } catch (e) {
           console.error('Failed to parse WebSocket message:', e);
         }
@@ -65,8 +87,19 @@ export function useDashboardWebSocket() {
   
   const handleMessage = useCallback((message: DashboardEvent) => {
     switch (message.type) {
-      case 'connection_status':
-        console.log('Connection status:', message.data);
+      case 'connection_status': {
+        const data = message.data as ConnectionStatusData;
+        console.log('Connection status:', data);
+        if (data.epoch !== undefined && data.seq !== undefined) {
+          epochRef.current = data.epoch;
+          lastSeqRef.current = data.seq;
+        }
+        break;
+      }
+      
+      case 'snapshot':
+        // Missed events were no longer kept; take the whole schedule
+        setConfig(message.data as ConfigResponse);
         break;
         
       case 'call_started': {
@@ -87,12 +120,8 @@ export function useDashboardWebSocket() {
       }
       
       case 'transcript_agent': {
-        const data = message.data as TranscriptData;
-        if (data.is_final) {
-          addAgentMessage(data.text);
-        } else {
-          updateLastAgentMessage(data.text);
-        }
+        const data = message.data as AgentTranscriptData;
+        applyAgentDelta(data.call_id, data.seq, data.delta, data.is_final, data.text);
         break;
       }
       
@@ -114,6 +143,10 @@ export function useDashboardWebSocket() {
         break;
       }
       
+      case 'subscription':
+        console.log('Subscription:', message.data);
+        break;
+        
       case 'error':
         console.error('Server error:', message.data);
         break;
@@ -125,7 +158,7 @@ export function useDashboardWebSocket() {
       default:
         console.log('Unknown message type:', message.type);
     }
-  }, [startCall, endCall, addUserMessage, addAgentMessage, updateLastAgentMessage, addAppointment, updateAppointment, removeAppointment]);
+  }, [startCall, endCall, addUserMessage, applyAgentDelta, setConfig, addAppointment, updateAppointment, removeAppointment]);
   
   const disconnect = useCallback(() => {
     if (reconnectTimeoutRef.current) {
@@ -146,6 +179,20 @@ export function useDashboardWebSocket() {
     }
   }, []);
   
+  const subscribe = useCallback((filter: TopicFilter) => {
+    topicFilterRef.current = filter;
+    if (wsRef.current?.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ command: 'subscribe', data: filter }));
+    }
+  }, []);
+  
+  const unsubscribe = useCallback(() => {
+    topicFilterRef.current = null;
+    if (wsRef.current?.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ command: 'unsubscribe' }));
+    }
+  }, []);
+  
   // Connect on mount
   useEffect(() => {
     connect();
@@ -163,5 +210,7 @@ export function useDashboardWebSocket() {
     connect,
     disconnect,
     sendPing,
+    subscribe,
+    unsubscribe,
   };
 }
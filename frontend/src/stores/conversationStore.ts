@@ -19,6 +19,9 @@ interface ConversationState {
   // Chat messages
   messages: ChatMessage[];
   
+  // Last agent transcript delta applied, per call
+  agentSeq: Record<string, number>;
+  
   // Actions
   setConnected: (connected: boolean) => void;
   startCall: (callId: string, callerNumber: string) => void;
@@ -26,7 +29,7 @@ interface ConversationState {
   addUserMessage: (text: string, isFinal: boolean) => void;
   addAgentMessage: (text: string) => void;
   addSystemMessage: (text: string) => void;
-  updateLastAgentMessage: (text: string) => void;
+  applyAgentDelta: (callId: string, seq: number, delta: string, isFinal: boolean, text?: string) => void;
   clearMessages: () => void;
 }
 
@@ -42,6 +45,8 @@ export const useConversationStore = create<ConversationState>((set, get) => ({
   
   messages: [],
   
+  agentSeq: {},
+  
   setConnected: (connected) => set({ isConnected: connected }),
   
   startCall: (callId, callerNumber) => {
@@ -53,6 +58,7 @@ export const useConversationStore = create<ConversationState>((set, get) => ({
         startTime: new Date(),
       },
       messages: [], // Clear previous messages
+      agentSeq: { ...get().agentSeq, [callId]: 0 },
     });
     
     // Add system message
@@ -121,27 +127,38 @@ export const useConversationStore = create<ConversationState>((set, get) => ({
     });
   },
   
-  updateLastAgentMessage: (text) => {
-    const { messages } = get();
+  applyAgentDelta: (callId, seq, delta, isFinal, text) => {
+    const { messages, agentSeq } = get();
+    
+    // Already applied; seq counts per call, so calls can overlap
+    if (seq <= (agentSeq[callId] ?? 0)) {
+      return;
+    }
+    
+    // The final event's full text also repairs any missed deltas
     const lastAgentIndex = messages.findLastIndex((m) => m.type === 'agent');
     
     if (lastAgentIndex >= 0 && !messages[lastAgentIndex].isFinal) {
       set({
+        agentSeq: { ...agentSeq, [callId]: seq },
         messages: messages.map((m, i) =>
-          i === lastAgentIndex ? { ...m, text: m.text + text } : m
+          i === lastAgentIndex
+            ? { ...m, text: isFinal && text !== undefined ? text : m.text + delta, isFinal }
+            : m
         ),
       });
     } else {
       // Create new agent message
       set({
+        agentSeq: { ...agentSeq, [callId]: seq },
         messages: [
           ...messages,
           {
             id: generateId(),
             type: 'agent',
-            text,
+            text: isFinal && text !== undefined ? text : delta,
             timestamp: new Date(),
-            isFinal: false,
+            isFinal,
           },
         ],
       });
@@ -49,8 +49,11 @@ export const useScheduleStore = create<ScheduleState>((set, get) => ({
   },
   
   addAppointment: (appointment) => {
+    // A snapshot can already hold an appointment whose created event follows it
     set((state) => ({
-      appointments: [...state.appointments, appointment],
+      appointments: state.appointments.some((apt) => apt.id === appointment.id)
+        ? state.appointments.map((apt) => (apt.id === appointment.id ? appointment : apt))
+        : [...state.appointments, appointment],
     }));
   },
   
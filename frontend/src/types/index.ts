@@ -51,10 +51,14 @@ export type EventType =
   | 'appointment_updated'
   | 'appointment_deleted'
   | 'connection_status'
+  | 'subscription'
+  | 'snapshot'
   | 'error'
   | 'pong';
 
 export interface DashboardEvent {
+  // Event bus sequence number, sent back as last_seq on reconnect
+  seq?: number;
   type: EventType;
   timestamp: string;
   data: Record<string, unknown>;
@@ -76,13 +80,36 @@ export interface TranscriptData {
   is_final: boolean;
 }
 
+// Agent transcript arrives as deltas; the final event of a message also
+// carries its full text
+export interface AgentTranscriptData {
+  call_id: string;
+  seq: number;
+  delta: string;
+  is_final: boolean;
+  text?: string;
+}
+
 export interface AppointmentEventData {
   appointment: Appointment;
+  // Version an update replaced, when the server knows it
+  previous?: Appointment;
+}
+
+// Events a dashboard subscribes to; empty lists match everything
+export interface TopicFilter {
+  types?: EventType[];
+  call_ids?: string[];
+  doctor_ids?: string[];
+  dates?: string[];
 }
 
 export interface ConnectionStatusData {
   status: 'connected' | 'disconnected' | 'reconnecting';
   message: string;
+  epoch?: string;
+  seq?: number;
+  resumed?: boolean;
 }
 
 // Chat message for display